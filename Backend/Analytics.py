@@ -4,24 +4,74 @@ HR Analytics Dashboard - Comprehensive Data Analysis
 Professional analytics for HR metrics and insights
 """
 
-from sqlalchemy import create_engine, func, extract, case
+from sqlalchemy import create_engine, func, extract, case, text
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Import ORM models (assuming they're in the same directory)
-from orm import Base, Employee, Attendance, Event, Payroll, Review, KPIOverview
+from orm import Base, Employee, Attendance, Event, Payroll, Review, KPIOverview, install_pragmas
+import rollups
 
 # Database connection
-engine = create_engine('sqlite:///hr.sqlite', echo=False)
+engine = install_pragmas(create_engine('sqlite:///hr.sqlite', echo=False))
 Session = sessionmaker(bind=engine)
 
+# Read-only pool for running analyses in parallel, one connection per analysis.
+# SQLite releases the GIL while it executes a query, so threads are enough.
+read_only_engine = install_pragmas(create_engine(
+    'sqlite:///file:hr.sqlite?mode=ro&uri=true', echo=False,
+    pool_size=10, max_overflow=0, connect_args={'check_same_thread': False}
+))
+ReadOnlySession = sessionmaker(bind=read_only_engine)
+
+# Per-employee score for the performance vs compensation analysis.
+PERF_COMP_SCORE_SQL = {
+    'latest': """
+        SELECT employee_id, score FROM (
+            SELECT employee_id, score,
+                   ROW_NUMBER() OVER (PARTITION BY employee_id ORDER BY review_date DESC) AS rn
+            FROM reviews
+        ) WHERE rn = 1
+    """,
+    'average': "SELECT employee_id, AVG(score) AS score FROM reviews GROUP BY employee_id"
+}
+# Payroll has no pay date. pay_period holds a 'YYYY-MM' period in generated and synced data, but a pay
+# frequency ('monthly') in hr.sqlite, so only period-shaped values are ordered by value; the rest rank
+# below them, by insertion order (rowid), latest first.
+PERF_COMP_SALARY_ORDER = (
+    "CASE WHEN pay_period GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]*' THEN pay_period ELSE '' END DESC, rowid DESC"
+)
+PERF_COMP_SAMPLE_SIZE = 500
+
 class HRAnalytics:
     """Comprehensive HR Analytics Suite"""
     
-    def __init__(self, session):
+    def __init__(self, session, use_rollups=None):
         self.session = session
+        # None: read the rollup tables when this database has them and they are current (see rollups.py).
+        self._use_rollups = use_rollups
+
+    @property
+    def use_rollups(self):
+        if self._use_rollups is None:
+            conn = self.session.connection().connection.dbapi_connection
+            self._use_rollups = rollups.is_built(conn)
+            if self._use_rollups:
+                stale = rollups.stale_sources(conn)
+                if stale:
+                    print(f"Rollups are behind {', '.join(stale)}; reading the fact tables until they are rebuilt")
+                    self._use_rollups = False
+        return self._use_rollups
+
+    def _rows(self, sql):
+        return self.session.execute(text(sql)).all()
     
     def analyze_workforce_composition(self):
         """
@@ -57,21 +107,16 @@ class HRAnalytics:
         """
         Analyze employee tenure and retention patterns
         """
-        employees = self.session.query(Employee).all()
-        tenure_data = []
-        
-        for emp in employees:
-            if emp.hire_date:
-                tenure_days = (datetime.now() - emp.hire_date).days
-                tenure_years = tenure_days / 365.25
-                tenure_data.append({
-                    'employee_id': emp.employee_id,
-                    'name': f"{emp.first_name} {emp.last_name}",
-                    'dept': emp.dept,
-                    'tenure_years': round(tenure_years, 2)
-                })
-        
-        df_tenure = pd.DataFrame(tenure_data)
+        # Only the two needed columns, with the day count computed by SQLite, straight into arrays
+        # (no Employee objects or per-row dicts).
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
+        query = self.session.query(
+            Employee.dept,
+            (func.julianday(now) - func.julianday(Employee.hire_date)).label('tenure_days')
+        ).filter(Employee.hire_date.isnot(None))
+        df_tenure = pd.read_sql(query.statement, self.session.connection())
+        # Whole days, as (now - hire_date).days counts them.
+        df_tenure['tenure_years'] = (np.floor(df_tenure['tenure_days']) / 365.25).round(2)
         avg_tenure = df_tenure['tenure_years'].mean()
         median_tenure = df_tenure['tenure_years'].median()
         
@@ -95,6 +140,8 @@ class HRAnalytics:
         """
         Analyze attendance patterns and absenteeism rates
         """
+        if self.use_rollups:
+            return self._attendance_patterns_from_rollups()
         total_records = self.session.query(func.count(Attendance.date)).scalar()
         total_absences = self.session.query(func.sum(Attendance.absent)).scalar()
         
@@ -131,6 +178,8 @@ class HRAnalytics:
         """
         Analyze compensation structure and payroll distribution
         """
+        if self.use_rollups:
+            return self._payroll_compensation_from_rollups()
         salary_stats = self.session.query(
             func.min(Payroll.base_salary).label('min_salary'),
             func.max(Payroll.base_salary).label('max_salary'),
@@ -164,17 +213,12 @@ class HRAnalytics:
         """
         Analyze performance review scores and trends
         """
+        if self.use_rollups:
+            return self._performance_reviews_from_rollups()
         perf_stats = self.session.query(
             func.avg(Review.score).label('avg_score')
         ).first()
         
-        employee_performance = self.session.query(
-            Employee.first_name,
-            Employee.last_name,
-            Employee.dept,
-            func.avg(Review.score).label('avg_score')
-        ).join(Review, Employee.employee_id == Review.employee_id).group_by(Employee.employee_id).order_by(func.avg(Review.score).desc()).all()
-        
         dept_performance = self.session.query(
             Employee.dept,
             func.avg(Review.score).label('avg_score')
@@ -182,10 +226,90 @@ class HRAnalytics:
         
         return {
             'overall_avg': round(perf_stats.avg_score, 2),
-            'top_performers': [{'name': f"{e.first_name} {e.last_name}", 'dept': e.dept, 'score': round(e.avg_score, 2)} for e in employee_performance[:10]],
+            'top_performers': self._top_performers(),
             'dept_performance': [{'dept': d.dept, 'avg_score': round(d.avg_score, 2)} for d in dept_performance]
         }
     
+    def _attendance_patterns_from_rollups(self):
+        total_records, total_absences = self._rows(
+            "SELECT SUM(days), SUM(absent_days) FROM rollup_attendance_dept_month"
+        )[0]
+        absence_rate = 0
+        if total_records and total_absences:
+            absence_rate = (total_absences / total_records) * 100
+
+        employee_absences = self._rows("""
+            SELECT e.first_name, e.last_name, e.dept,
+                   ROUND(SUM(r.absent_days) * 100.0 / SUM(r.days), 2) AS absence_rate
+            FROM rollup_attendance_employee_month r JOIN employees e ON e.employee_id = r.employee_id
+            GROUP BY r.employee_id HAVING SUM(r.absent_days) > 0
+            ORDER BY absence_rate DESC LIMIT 10
+        """)
+        dept_absences = self._rows("""
+            SELECT dept, ROUND(SUM(absent_days) * 100.0 / SUM(days), 2) AS absence_rate
+            FROM rollup_attendance_dept_month WHERE dept != ''
+            GROUP BY dept HAVING SUM(days) > 0 ORDER BY absence_rate DESC
+        """)
+
+        return {
+            'overall_absence_rate': round(absence_rate, 2),
+            'top_absentees': [{'name': f"{e.first_name} {e.last_name}", 'dept': e.dept, 'rate': e.absence_rate} for e in employee_absences],
+            'dept_absence_rates': [{'dept': d.dept, 'rate': d.absence_rate} for d in dept_absences]
+        }
+
+    def _payroll_compensation_from_rollups(self):
+        salary_stats = self._rows("""
+            SELECT MIN(salary_min) AS min_salary, MAX(salary_max) AS max_salary,
+                   SUM(salary_sum) / SUM(records) AS avg_salary, SUM(salary_sum) AS total_payroll
+            FROM rollup_payroll_dept_period
+        """)[0]
+        dept_compensation = self._rows("""
+            SELECT dept, SUM(salary_sum) / SUM(records) AS avg_salary, SUM(salary_sum) AS total_cost
+            FROM rollup_payroll_dept_period WHERE dept != ''
+            GROUP BY dept HAVING SUM(records) > 0 ORDER BY avg_salary DESC
+        """)
+        role_compensation = self._rows("""
+            SELECT role, SUM(salary_sum) / SUM(records) AS avg_salary
+            FROM rollup_payroll_dept_period WHERE role != ''
+            GROUP BY role HAVING SUM(records) > 0 ORDER BY avg_salary DESC
+        """)
+
+        return {
+            'overall': {
+                'min': salary_stats.min_salary,
+                'max': salary_stats.max_salary,
+                'avg': round(salary_stats.avg_salary, 2),
+                'total': salary_stats.total_payroll
+            },
+            'by_department': [{'dept': d.dept, 'avg': round(d.avg_salary, 2), 'total': d.total_cost} for d in dept_compensation],
+            'by_role': [{'role': r.role, 'avg': round(r.avg_salary, 2)} for r in role_compensation]
+        }
+
+    def _performance_reviews_from_rollups(self):
+        overall_avg = self._rows(
+            "SELECT SUM(score_sum) * 1.0 / SUM(score_count) FROM rollup_reviews_dept"
+        )[0][0]
+        dept_performance = self._rows("""
+            SELECT dept, SUM(score_sum) * 1.0 / SUM(score_count) AS avg_score
+            FROM rollup_reviews_dept WHERE dept != ''
+            GROUP BY dept HAVING SUM(score_count) > 0 ORDER BY avg_score DESC
+        """)
+
+        return {
+            'overall_avg': round(overall_avg, 2),
+            'top_performers': self._top_performers(),
+            'dept_performance': [{'dept': d.dept, 'avg_score': round(d.avg_score, 2)} for d in dept_performance]
+        }
+
+    def _top_performers(self):
+        employee_performance = self.session.query(
+            Employee.first_name,
+            Employee.last_name,
+            Employee.dept,
+            func.avg(Review.score).label('avg_score')
+        ).join(Review, Employee.employee_id == Review.employee_id).group_by(Employee.employee_id).order_by(func.avg(Review.score).desc()).limit(10).all()
+        return [{'name': f"{e.first_name} {e.last_name}", 'dept': e.dept, 'score': round(e.avg_score, 2)} for e in employee_performance]
+
     def analyze_turnover_metrics(self):
         """
         Analyze employee turnover and retention
@@ -210,74 +334,194 @@ class HRAnalytics:
         Analyze hiring patterns and trends
         """
         six_months_ago = datetime.now() - timedelta(days=180)
-        recent_hires = self.session.query(Employee).filter(Employee.hire_date >= six_months_ago).all()
-        
-        hiring_by_dept = {}
-        for hire in recent_hires:
-            hiring_by_dept[hire.dept] = hiring_by_dept.get(hire.dept, 0) + 1
+        hiring_by_dept = dict(self.session.query(
+            Employee.dept,
+            func.count(Employee.employee_id)
+        ).filter(Employee.hire_date >= six_months_ago).group_by(Employee.dept).all())
             
         return {
-            'recent_hires_count': len(recent_hires),
+            'recent_hires_count': sum(hiring_by_dept.values()),
             'by_department': hiring_by_dept
         }
 
     def analyze_turnover_by_department(self):
         """
         Analyze employee turnover by department.
+        Event types are matched case-insensitively: hr.sqlite records 'termination', other feeds 'Termination'.
         """
         turnover_by_dept = self.session.query(
             Employee.dept,
             func.count(Event.employee_id).label('terminations')
-        ).join(Event, Employee.employee_id == Event.employee_id).filter(Event.event_type == 'Termination').group_by(Employee.dept).all()
+        ).join(Event, Employee.employee_id == Event.employee_id).filter(func.lower(Event.event_type) == 'termination').group_by(Employee.dept).all()
         
         return [{'dept': d.dept, 'terminations': d.terminations} for d in turnover_by_dept]
 
-    def analyze_performance_vs_compensation(self):
+    def analyze_performance_vs_compensation(self, score_basis='latest', sample_size=PERF_COMP_SAMPLE_SIZE,
+                                            score_bins=5, salary_bins=10):
         """
         Analyze the relationship between performance and compensation.
+        One point per employee: latest (or average) review score against current salary,
+        summarised as a 2D histogram and correlations plus a fixed-size sample for plotting,
+        so the result size doesn't depend on how many employees or periods there are.
         """
-        performance_compensation = self.session.query(
-            Employee.first_name,
-            Employee.last_name,
-            Review.score,
-            Payroll.base_salary
-        ).join(Review, Employee.employee_id == Review.employee_id).join(Payroll, Employee.employee_id == Payroll.employee_id).all()
-        
-        return [{'name': f'{pc.first_name} {pc.last_name}', 'performance': pc.score, 'compensation': pc.base_salary} for pc in performance_compensation]
+        score_sql = PERF_COMP_SCORE_SQL[score_basis]
+        points = pd.read_sql(text(f"""
+            WITH scores AS ({score_sql}),
+            salaries AS (
+                SELECT employee_id, base_salary FROM (
+                    SELECT employee_id, base_salary,
+                           ROW_NUMBER() OVER (PARTITION BY employee_id ORDER BY {PERF_COMP_SALARY_ORDER}) AS rn
+                    FROM payroll
+                ) WHERE rn = 1
+            )
+            SELECT scores.employee_id, scores.score, salaries.base_salary
+            FROM scores JOIN salaries ON salaries.employee_id = scores.employee_id
+            WHERE scores.score IS NOT NULL AND salaries.base_salary IS NOT NULL
+        """), self.session.connection())
+
+        result = {
+            'score_basis': score_basis,
+            'employees': len(points),
+            'correlation': {'pearson': None, 'spearman': None},
+            'histogram': {'score_edges': [], 'salary_edges': [], 'counts': []},
+            'sample': []
+        }
+        if points.empty:
+            return result
+
+        # Spearman is Pearson on the ranks (Series.corr(method='spearman') would need scipy).
+        correlations = {
+            'pearson': points['score'].corr(points['base_salary']),
+            'spearman': points['score'].rank().corr(points['base_salary'].rank())
+        }
+        for method, value in correlations.items():
+            result['correlation'][method] = None if pd.isna(value) else round(float(value), 4)
+
+        counts, score_edges, salary_edges = np.histogram2d(
+            points['score'], points['base_salary'], bins=[score_bins, salary_bins]
+        )
+        result['histogram'] = {
+            'score_edges': [round(float(edge), 2) for edge in score_edges],
+            'salary_edges': [round(float(edge), 2) for edge in salary_edges],
+            'counts': counts.astype(int).tolist()
+        }
+
+        sample = points.sample(n=min(sample_size, len(points)), random_state=0) if sample_size else points.iloc[:0]
+        names = dict(self.session.query(
+            Employee.employee_id,
+            Employee.first_name + ' ' + Employee.last_name
+        ).filter(Employee.employee_id.in_(sample['employee_id'].tolist())).all()) if len(sample) else {}
+        result['sample'] = [
+            {'name': names.get(row.employee_id), 'performance': float(row.score), 'compensation': float(row.base_salary)}
+            for row in sample.itertuples()
+        ]
+        return result
 
     def analyze_hiring_trends_by_role(self):
         """
         Analyze hiring patterns and trends by role.
         """
         six_months_ago = datetime.now() - timedelta(days=180)
-        recent_hires = self.session.query(Employee).filter(Employee.hire_date >= six_months_ago).all()
-        
-        hiring_by_role = {}
-        for hire in recent_hires:
-            hiring_by_role[hire.role] = hiring_by_role.get(hire.role, 0) + 1
-            
-        return hiring_by_role
+        return dict(self.session.query(
+            Employee.role,
+            func.count(Employee.employee_id)
+        ).filter(Employee.hire_date >= six_months_ago).group_by(Employee.role).all())
 
-    def run_all_analyses(self):
-        return {
-            'workforce_composition': self.analyze_workforce_composition(),
-            'tenure_distribution': self.analyze_tenure_distribution(),
-            'attendance_patterns': self.analyze_attendance_patterns(),
-            'payroll_compensation': self.analyze_payroll_compensation(),
-            'performance_reviews': self.analyze_performance_reviews(),
-            'turnover_metrics': self.analyze_turnover_metrics(),
-            'hiring_trends': self.analyze_hiring_trends(),
-            'turnover_by_department': self.analyze_turnover_by_department(),
-            'performance_vs_compensation': self.analyze_performance_vs_compensation(),
-            'hiring_trends_by_role': self.analyze_hiring_trends_by_role()
-        }
+    ANALYSES = [
+        'workforce_composition',
+        'tenure_distribution',
+        'attendance_patterns',
+        'payroll_compensation',
+        'performance_reviews',
+        'turnover_metrics',
+        'hiring_trends',
+        'turnover_by_department',
+        'performance_vs_compensation',
+        'hiring_trends_by_role'
+    ]
+
+    def run_analysis(self, name):
+        """
+        Run one analysis, returning (result, seconds taken)
+        """
+        started = time.perf_counter()
+        result = getattr(self, f'analyze_{name}')()
+        return result, round(time.perf_counter() - started, 4)
+
+    def run_all_analyses(self, parallel=False, session_factory=None, max_workers=None):
+        """
+        Run every analysis. With parallel=True each one runs on its own session from
+        session_factory (the read-only pool by default) in a thread pool.
+        Per-analysis timings are left in self.timings.
+        """
+        started = time.perf_counter()
+        if parallel:
+            outcomes = self._run_parallel(session_factory or ReadOnlySession, max_workers or len(self.ANALYSES))
+        else:
+            outcomes = {name: self.run_analysis(name) for name in self.ANALYSES}
+        self.timings = {name: seconds for name, (_, seconds) in outcomes.items()}
+        self.timings['total'] = round(time.perf_counter() - started, 4)
+        return {name: outcomes[name][0] for name in self.ANALYSES}
+
+    @staticmethod
+    def _run_isolated(session_factory, name, use_rollups=None):
+        session = session_factory()
+        try:
+            return HRAnalytics(session, use_rollups).run_analysis(name)
+        finally:
+            session.close()
 
-def get_analytics_summary():
+    def _run_parallel(self, session_factory, max_workers):
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                name: pool.submit(self._run_isolated, session_factory, name, self.use_rollups)
+                for name in self.ANALYSES
+            }
+            return {name: future.result() for name, future in futures.items()}
+
+def get_analytics_summary(parallel=False, timings=None):
+    """
+    All analyses in one dict; pass a dict as timings to get the seconds each one took
+    """
     session = Session()
     try:
         analytics = HRAnalytics(session)
-        summary = analytics.run_all_analyses()
+        summary = analytics.run_all_analyses(parallel=parallel)
+        if timings is not None:
+            timings.update(analytics.timings)
         return summary
     finally:
         session.close()
 
+
+# PRAGMA data_version only moves for commits made by *other* connections, so it is read from
+# one connection kept open for that purpose.
+_version_conn = None
+_version_lock = threading.Lock()
+
+def ensure_hr_rollups():
+    """
+    Build the dashboard rollups (rollups.py) the first time the app runs against a database without them,
+    and rebuild them if writes that bypassed rollups.record() left them out of date
+    """
+    conn = engine.raw_connection()
+    try:
+        built = rollups.ensure_rollups(conn.dbapi_connection)
+        conn.commit()
+        return built
+    finally:
+        conn.close()
+
+def get_data_version():
+    """
+    Cheap version of the HR data: changes on every commit to hr.sqlite and every logged sync
+    """
+    global _version_conn
+    with _version_lock:
+        if _version_conn is None:
+            _version_conn = sqlite3.connect(engine.url.database, check_same_thread=False)
+        data_version = _version_conn.execute("PRAGMA data_version").fetchall()[0][0]
+        # fetchall() finishes the statements so no read transaction stays open between calls.
+        last_sync = _version_conn.execute("SELECT MAX(ts_utc) FROM sync_log").fetchall()[0][0]
+    return f"{data_version}:{last_sync or ''}"
+
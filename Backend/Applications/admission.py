@@ -0,0 +1,123 @@
+"""
+Admission Control
+Bounded worker pool with a capped, per-job fair wait queue in front of crew execution
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+# Assumed crew run time until real ones have been observed, used for Retry-After.
+DEFAULT_SERVICE_SECONDS = 30.0
+
+
+class QueueFull(Exception):
+    """The wait queue is at its maximum depth; ``retry_after`` is a suggested wait in seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Scoring queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Runs submitted work on ``max_workers`` threads with at most ``max_queue`` items waiting.
+
+    Waiting work is queued per job and the workers take from the jobs in
+    round-robin order, so a large batch for one posting cannot starve
+    applications to the others.
+    """
+
+    def __init__(self, max_workers, max_queue, name="admission"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._queues = OrderedDict()
+        self._queued = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_seconds = deque(maxlen=1000)
+        self._service_seconds = deque(maxlen=200)
+        self._lock = threading.Lock()
+        self._work_available = threading.Condition(self._lock)
+        self._space_available = threading.Condition(self._lock)
+        for index in range(max_workers):
+            threading.Thread(target=self._worker, name=f"{name}-{index}", daemon=True).start()
+
+    def submit(self, job_id, fn, *args, block=False, timeout=None):
+        """Queue ``fn(*args)`` under ``job_id`` and return a Future for its result.
+
+        Raises QueueFull when the queue is at capacity, unless ``block`` is
+        set, in which case it waits up to ``timeout`` seconds for space.
+        """
+        future = Future()
+        with self._lock:
+            if self._queued >= self.max_queue:
+                if not block or not self._space_available.wait_for(
+                    lambda: self._queued < self.max_queue, timeout
+                ):
+                    self._rejected += 1
+                    raise QueueFull(self._retry_after())
+            self._queues.setdefault(job_id, deque()).append((future, fn, args, time.monotonic()))
+            self._queued += 1
+            self._work_available.notify()
+        return future
+
+    def _take(self):
+        job_id, queue = next(iter(self._queues.items()))
+        item = queue.popleft()
+        del self._queues[job_id]
+        if queue:
+            # Re-inserting moves the job to the back of the rotation.
+            self._queues[job_id] = queue
+        self._queued -= 1
+        self._space_available.notify()
+        return item
+
+    def _worker(self):
+        while True:
+            with self._lock:
+                self._work_available.wait_for(lambda: self._queued > 0)
+                future, fn, args, enqueued_at = self._take()
+                self._in_flight += 1
+                self._wait_seconds.append(time.monotonic() - enqueued_at)
+
+            started = time.monotonic()
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    self._completed += 1
+                    self._service_seconds.append(time.monotonic() - started)
+
+    def _retry_after(self):
+        service = (
+            sum(self._service_seconds) / len(self._service_seconds)
+            if self._service_seconds else DEFAULT_SERVICE_SECONDS
+        )
+        backlog = self._queued + self._in_flight
+        return max(1, math.ceil(backlog / self.max_workers * service))
+
+    def stats(self):
+        with self._lock:
+            waits = sorted(self._wait_seconds)
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queued": self._queued,
+                "queued_by_job": {job_id: len(queue) for job_id, queue in self._queues.items()},
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "queue_wait_seconds": {
+                    "avg": round(sum(waits) / len(waits), 3) if waits else 0,
+                    "p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else 0,
+                    "max": round(waits[-1], 3) if waits else 0
+                }
+            }
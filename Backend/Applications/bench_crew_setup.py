@@ -0,0 +1,60 @@
+"""
+Benchmark for per-request crew setup overhead.
+
+Compares building the LLM, agents and tasks from scratch on every request
+(the old behaviour) with binding a request's inputs through crew_factory.
+No LLM calls are made; only construction is timed.
+
+    python bench_crew_setup.py --iterations 200
+"""
+
+import argparse
+import json
+import time
+
+from crew_factory import SCORING_CREW, ASSESSMENT_CREW, bind_crew, build_crew_uncached
+
+RESUME_TEXT = "Jane Doe\nSenior Data Engineer\n" + "Built streaming pipelines in Python and Spark. " * 200
+JD_TEXT = "We are hiring a data engineer with Python, Spark and Kafka experience. " * 20
+
+
+def time_builds(build, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        build()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "mean_ms": round(sum(samples) / len(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    report = {}
+    for crew_spec, inputs in (
+        (SCORING_CREW, {
+            "resume_for_ai_detection": RESUME_TEXT,
+            "resume_for_ats": RESUME_TEXT,
+            "resume_for_scoring": RESUME_TEXT,
+            "jd_text": JD_TEXT
+        }),
+        (ASSESSMENT_CREW, {"resume_text": RESUME_TEXT, "job_description": JD_TEXT}),
+    ):
+        before = time_builds(lambda: build_crew_uncached(crew_spec, **inputs), args.iterations)
+        after = time_builds(lambda: bind_crew(crew_spec, **inputs), args.iterations)
+        report[crew_spec.name] = {
+            "before": before,
+            "after": after,
+            "speedup": round(before["mean_ms"] / after["mean_ms"], 2) if after["mean_ms"] else None
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
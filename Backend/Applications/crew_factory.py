@@ -0,0 +1,491 @@
+"""
+Crew Factory
+Agent, task and LLM templates built once per process and bound to per-request inputs
+"""
+
+import ast
+import os
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from crewai import Agent, Task, Crew, Process, LLM
+
+from resume_context import estimate_tokens
+
+GOOGLE_API_KEY = os.environ.get('GOOGLE_API_KEY', '')
+LLM_MODEL = "gemini/gemini-2.5-flash"
+LLM_TEMPERATURE = 0.5
+
+# Connections kept alive in the shared HTTP client used for LLM calls.
+LLM_MAX_CONNECTIONS = int(os.environ.get('LLM_MAX_CONNECTIONS', 20))
+LLM_KEEPALIVE_SECONDS = 300
+
+
+@dataclass(frozen=True)
+class AgentSpec:
+    role: str
+    goal: str
+    backstory: str
+    allow_delegation: bool = None
+
+
+@dataclass(frozen=True)
+class TaskSpec:
+    """A task template. ``description`` is a str.format template over the crew inputs."""
+    description: str
+    expected_output: str
+    agent: str
+    context: tuple = ()
+    callback: object = None
+
+
+@dataclass(frozen=True)
+class CrewSpec:
+    """Agents and task templates of one crew; ``inputs`` names the values every request must bind."""
+    name: str
+    agents: MappingProxyType
+    tasks: MappingProxyType
+    inputs: tuple
+    process: object = Process.sequential
+    crew_llm: bool = False
+
+
+def ats_filter_callback(output):
+    try:
+        result_dict = ast.literal_eval(output)
+        ats_score = result_dict.get('ats_score')
+        filter_result = result_dict.get('rule_based_filter_result')
+        if ats_score is None or filter_result is None:
+            print("Error: Required keys 'ats_score' or 'rule_based_filter_result' not found in the output.")
+            return
+        if ats_score < 70 or filter_result.lower() == 'failed':
+            print("The candidate is rejected.")
+        else:
+            print("The candidate has passed the initial screening.")
+    except (ValueError, SyntaxError) as e:
+        print(f"Failed to parse the dictionary from the agent's output. Error: {e}")
+
+def ai_detection(task_output):
+    try:
+        if hasattr(task_output, 'raw'):
+            result_str = task_output.raw
+        else:
+            result_str = str(task_output)
+        
+        if 'Result = ' in result_str:
+            dict_str = result_str.split('Result = ')[1].strip()
+            if '}' in dict_str:
+                dict_str = dict_str[:dict_str.rfind('}') + 1]
+            result = ast.literal_eval(dict_str)
+        else:
+            result = ast.literal_eval(result_str)
+        
+        ai_detected = result.get('AI detection', False)
+        
+        if ai_detected:
+            rejection_reasons = []
+            if ai_detected:
+                rejection_reasons.append("AI-generated content detected")
+            
+            rejection_message = {
+                'status': 'REJECTED',
+                'reason': f"Candidate rejected: {', '.join(rejection_reasons)}",
+                'ai_detection': ai_detected,
+                'action': 'STOP_EXECUTION'
+            }
+            
+            print(f"CANDIDATE REJECTED: {', '.join(rejection_reasons)}")
+            
+            raise StopIteration(rejection_message)
+                
+        else:
+            print("Candidate passed AI detection and information verification")
+            return {
+                'status': 'PASSED',
+                'continue_execution': True,
+                'ai_detection': ai_detected
+            }
+            
+    except Exception as e:
+        error_message = {
+            'status': 'ERROR',
+            'reason': f"Error parsing AI detection results: {str(e)}",
+            'action': 'STOP_EXECUTION'
+        }
+        print(f"Error in callback: {str(e)}")
+        raise StopIteration(error_message)
+
+
+SCORING_CREW = CrewSpec(
+    name='scoring',
+    agents=MappingProxyType({
+        'ai_detection_agent': AgentSpec(
+            role="AI detection",
+            goal="To find whether the document is created by AI or not.",
+            backstory=(
+                "You can understand whether the information given is AI generated or not. Use any internet tool to find out that."
+            ),
+            allow_delegation=False
+        ),
+        'ats_analyst_agent': AgentSpec(
+            role='ATS Analyst',
+            goal='Calculate the ATS score and perform rule-based filtering on a resume.',
+            backstory=(
+                "You are a meticulous Applicant Tracking System (ATS) expert. Your job is to screen resumes for essential keywords and hard requirements (e.g., years of experience, specific certifications) to determine a preliminary score and eligibility. You are highly detail-oriented and follow rules precisely. Be very strict ATS Score checker and scrutinize the candidate very hardly. Your duty is to perform the task given very strictly."
+            ),
+            allow_delegation=False
+        ),
+        'skills_evaluator_agent': AgentSpec(
+            role='Skills Evaluator',
+            goal='Score a resume on specific parameters: Education, Experience, Relevant Projects, and Technical Skills.',
+            backstory=(
+                "You are a seasoned technical recruiter with a keen eye for talent. You can read a resume "
+                "and objectively assign scores based on key sections, understanding the difference between "
+                "relevant and irrelevant experience. You have been hiring people since last 25 years and have seen ample amount of resumes. So you can scrutinize the resumes very good."
+            ),
+            allow_delegation=False
+        ),
+        'final_reviewer_agent': AgentSpec(
+            role='Final Reviewer',
+            goal='Synthesize a comprehensive profile summary and a final overall score.',
+            backstory=(
+                "You are a Senior Hiring Manager responsible for making the final decision on candidates. "
+                "You take all the data points—ATS score, individual parameter scores—and combine them into "
+                "a clear, concise summary and a single, definitive final score out of 100."
+            ),
+            allow_delegation=False
+        ),
+    }),
+    tasks=MappingProxyType({
+        'ai_detection_task': TaskSpec(
+            description="Analyze the document given:'{resume_for_ai_detection}', and find out whether the document was made using AI tools or not. Only mark it as True only if more than 70% of the content is generated by AI. Create a 3-4 line summary explaining the main concerns stating the reason about acceptance or rejection.",
+            expected_output="Create a python dictionary in the format : Result = {\n"
+                "    'AI detection': True/False,\n"
+                "    'AI_reasons': 'Specific reasons for AI detection with examples',\n"
+                "    'False_info_reasons': 'Specific reasons for false information with examples',\n"
+                "    'rejection_summary': '3-4 line summary of main issues found'\n"
+                "}",
+            agent='ai_detection_agent',
+            callback=ai_detection
+        ),
+        'ats_scoring_task': TaskSpec(
+            description="Analyze the provided resume text given : '{resume_for_ats}'and the job description given : '{jd_text}'. "
+                "First, calculate a preliminary ATS score (out of 100) based on different parameters like - Professional keywords, Format of the CV, Integrity and relevancy of the content with the job description. Consider one factor very high that the technical skills provided should also align with the skills shown in the projects, experience and publications."
+                "Second, apply rule-based filtering. Check if the education qualification fulfills the requirment of the job description provided or the experience or projects or publications is relevant to the job decsription provided. If either is not present, note that the candidate did not pass the filter. If the candidate doesn't pass the filter test, then the result of rule_based_filter_result will be failed."
+                "The output should be 'ats_score' and 'rule_based_filter_result'.",
+            expected_output="Create a python dictionary in the format :  Result = {'ats_score': 85, 'rule_based_filter_result': 'Passed'}. ",
+            agent='ats_analyst_agent',
+            callback=ats_filter_callback
+        ),
+        'parameter_scoring_task': TaskSpec(
+            description="Using the resume text : '{resume_for_scoring}', and job decsription :'{jd_text}'score the candidate on a scale of 0-100 which would be floating values. For each parameter, decide the factors in floating values as the number of application being too high, the CV should have scores upto 4 decimal pointss for the following four parameters: "
+                "1. Education: Score based on relevance and quality of degrees. The marking should on the basis of ranking of the college and it's reputation. The GPA also does play an important role in scoring the candidat's resume. "
+                "2. Experience: Score based on years and relevance of professional experience. The experience should be relevant to the job decsription provided. More importantly the job title in the experience should be matching with the job description also. Other job experiences do not add any points in the final scoring. "
+                "3. Relevant Projects: Score based on the number and impact of projects mentioned. The projects and publications shown in the resume text is one of the most iportant and should be scrutinized very hardly. The projects and publications should not only be relevant, but also shows that the candidate have adequate amount of pre-requisite knowledge that would be required in the job role according to the job description. If no live link or github link has been attached for the projects, give negative arking to that and reduce the overall score for this section. Also give additional points for candidates those who have mentioned about scholarships and publications. Publications are always prioritized over projects."
+                "4. Technical Skills: Score based on the depth and breadth of listed technical skills. The technical skills should match with the projects and publications, then only it would be considered. Find whether the candidate really have those techincal skills portrayed in the projects and experiences and publication. Only consider those skills and if find it's relevance with the job decsription. Give the scores accordingly."
+                "The output should be stored in a paragraph where each of the parameters and their scores are mentioned.",
+            expected_output="The output should be stored in a paragraph where each of the parameters and their scores are mentioned.",
+            agent='skills_evaluator_agent',
+            context=('ats_scoring_task',),
+        ),
+        'final_summary_task': TaskSpec(
+            description=(
+                "Analyze the output from the previous two tasks (the ATS score and the four parameter scores). "
+                "First, create a concise, professional profile summary (3-4 sentences) that highlights the candidate's strengths. Show how the candidate is fit for the job and show how much relevant candidate have relevant experience or projects or publications. "
+                "Second, calculate a final overall score out of 100. For each parameter, decide the factors in floating values as the number of application being too high, the CV should have scores upto 4 decimal pointss for the following four parameters. The final score should be a weighted average where: "
+                "- ATS Score: 30% "
+                "- Education: 10% "
+                "- Experience: 25% "
+                "- Relevant Projects: 20% "
+                "- Technical Skills: 15% "
+                "Present the final output as the summary and the final score in decimal points. in text format"
+            ),
+            expected_output="A dictionary containing 'profile_summary' (string) and 'final_score' (float).",
+            agent='final_reviewer_agent',
+            context=('ats_scoring_task', 'parameter_scoring_task')
+        ),
+    }),
+    inputs=('resume_for_ai_detection', 'resume_for_ats', 'resume_for_scoring', 'jd_text')
+)
+
+JD_PROFILE_CREW = CrewSpec(
+    name='jd_profile',
+    agents=MappingProxyType({
+        'jd_analyst_agent': AgentSpec(
+            role='Job Requirements Analyst',
+            goal='Distill a job description into the concrete requirements a resume is screened against.',
+            backstory=(
+                "You are an experienced technical recruiter who turns long job postings into precise hiring checklists. "
+                "You separate hard requirements from nice-to-haves and never invent requirements that are not in the posting."
+            ),
+            allow_delegation=False
+        ),
+    }),
+    tasks=MappingProxyType({
+        'jd_analysis_task': TaskSpec(
+            description="Analyze the job titled '{job_title}' with the job description given : '{jd_text}'. "
+                "Extract the required technical skills, the preferred skills, the minimum years of experience, "
+                "the required education, the key responsibilities and the important ATS keywords. "
+                "Keep it compact and do not add anything that is not stated or clearly implied in the job description. "
+                "If the minimum years of experience is not stated, use 0.",
+            expected_output="Create a python dictionary in the format : Result = {\n"
+                "    'required_skills': ['skill', ...],\n"
+                "    'preferred_skills': ['skill', ...],\n"
+                "    'min_years_experience': 3,\n"
+                "    'education': 'Minimum education requirement',\n"
+                "    'responsibilities': ['responsibility', ...],\n"
+                "    'keywords': ['keyword', ...]\n"
+                "}",
+            agent='jd_analyst_agent'
+        ),
+    }),
+    inputs=('job_title', 'jd_text')
+)
+
+ASSESSMENT_CREW = CrewSpec(
+    name='assessment',
+    agents=MappingProxyType({
+        'Resume_Analyzer': AgentSpec(
+            role='Senior Resume Analyst',
+            goal='Extract and analyze key information from candidate resumes including experience, projects, publications, and technical skills',
+            backstory="You're an expert HR analyst with 15+ years of experience in talent acquisition. You have a keen eye for identifying relevant experience, understanding project complexities, and evaluating technical proficiencies. You excel at understanding the depth and breadth of a candidate's background and can distinguish between entry-level and senior-level expertise."
+        ),
+        'Experience_Question_Generator': AgentSpec(
+            role='Experience Assessment Specialist',
+            goal='Create insightful, role-specific questions about candidate work experience',
+            backstory="You're a seasoned hiring manager who has interviewed thousands of candidates across various industries. You specialize in crafting questions that reveal true professional competency, decision-making skills, and real-world problem-solving abilities. Your questions go beyond surface-level queries to uncover how candidates have handled complex situations, led initiatives, and driven results."
+        ),
+        'Project_Question_Generator': AgentSpec(
+            role='Technical Project Evaluator',
+            goal='Develop challenging questions about candidate projects and research work',
+            backstory="You're a technical lead and research mentor with deep expertise in evaluating academic and professional projects. You know how to ask questions that assess a candidate's understanding of project architecture, implementation challenges, research methodologies, and the impact of their work. You focus on the 'why' and 'how' rather than just the 'what'."
+        ),
+        'Skills_Question_Generator': AgentSpec(
+            role='Technical Skills Interviewer',
+            goal='Create practical, hands-on questions to assess technical competencies',
+            backstory="You're a principal engineer and technical interviewer who specializes in evaluating real-world application of technical skills. You design questions that test practical knowledge, problem-solving with specific technologies, and the ability to apply skills in realistic scenarios. Your questions reveal whether candidates truly understand their tools or just list them on resumes."
+        ),
+        'Question_Curator': AgentSpec(
+            role='Interview Question Curator',
+            goal='Review, refine, and finalize the most impactful interview questions',
+            backstory="You're the VP of Talent Acquisition with expertise in creating interview processes that accurately predict candidate success. You ensure questions are fair, non-discriminatory, challenging yet reasonable, and aligned with the candidate's experience level. You polish questions for clarity and impact while maintaining professional standards."
+        ),
+    }),
+    tasks=MappingProxyType({
+        'analysis_task': TaskSpec(
+            description='''Thoroughly analyze the following resume and extract:
+            1. Educational background and level (Bachelor's, Master's, PhD, etc.)
+            2. Years and types of work experience with specific roles and responsibilities
+            3. Projects and publications with technical details and impact
+            4. Technical skills with proficiency indicators
+            5. Overall seniority level (entry, mid, senior, principal)
+            6. Which of the above matter most for the role described below
+            
+            Resume Content:
+            {resume_text}
+            
+            Job Description:
+            {job_description}
+            
+            Provide a structured analysis that will help other agents create appropriate interview questions.''',
+            agent='Resume_Analyzer',
+            expected_output='A comprehensive analysis document containing categorized information about education level, experience details, project/publication summaries, technical skills, and assessed seniority level of the candidate.'
+        ),
+        'experience_questions_task': TaskSpec(
+            description='''Based on the resume analysis, create 2 challenging questions about the candidate's work experience. These questions should:
+            - Focus on specific roles, responsibilities, or achievements mentioned in the resume
+            - Probe decision-making, leadership, or problem-solving in past roles
+            - Be appropriate for the candidate's seniority level
+            - Reveal depth of experience beyond what's written
+            - Avoid basic questions like "Tell me about yourself"
+            
+            Format: Provide exactly 2 questions, numbered.''',
+            agent='Experience_Question_Generator',
+            context=('analysis_task',),
+            expected_output='Exactly 2 well-crafted, role-specific questions about work experience that assess professional competency and real-world capabilities.'
+        ),
+        'project_questions_task': TaskSpec(
+            description='''Based on the resume analysis, create 2 in-depth questions about the candidate's projects or publications. These questions should:
+            - Reference specific projects or research work from the resume
+            - Explore technical challenges, architectural decisions, or research methodologies
+            - Assess understanding of impact, scalability, or contribution to the field
+            - Be suited to the candidate's academic and professional level
+            - Go beyond surface-level project descriptions
+            
+            Format: Provide exactly 2 questions, numbered.''',
+            agent='Project_Question_Generator',
+            context=('analysis_task',),
+            expected_output='Exactly 2 detailed questions about projects or publications that evaluate technical depth, problem-solving approach, and impact understanding.'
+        ),
+        'skills_question_task': TaskSpec(
+            description='''Based on the resume analysis, create 1 practical question about the candidate's technical skills. This question should:
+            - Focus on a key technical skill mentioned in the resume
+            - Present a realistic scenario or problem requiring that skill
+            - Test practical application rather than theoretical knowledge
+            - Match the candidate's expertise level
+            - Require demonstration of hands-on proficiency
+            
+            Format: Provide exactly 1 question.''',
+            agent='Skills_Question_Generator',
+            context=('analysis_task',),
+            expected_output='Exactly 1 practical, scenario-based question that assesses hands-on technical skill application.'
+        ),
+        'curation_task': TaskSpec(
+            description='''Review all generated questions and create the final set of 5 interview questions:
+            - Ensure 2 questions are about experience
+            - Ensure 2 questions are about projects/publications
+            - Ensure 1 question is about technical skills
+            - Refine wording for clarity and professionalism
+            - Verify questions are challenging yet fair
+            - Ensure questions are appropriate for the candidate's level
+            - Remove any redundancy or overlap
+            
+            Format the output as a clean, numbered list of exactly 5 questions ready to send to the candidate.''',
+            agent='Question_Curator',
+            context=('experience_questions_task', 'project_questions_task', 'skills_question_task'),
+            expected_output='A final, polished list of exactly 5 interview questions: 2 experience-based, 2 project/publication-based, and 1 technical skill-based, formatted professionally and ready for delivery to the hiring manager.'
+        ),
+    }),
+    process=None,
+    crew_llm=True,
+    inputs=('resume_text', 'job_description')
+)
+
+
+_llm = None
+_llm_lock = threading.Lock()
+_local = threading.local()
+_setup_stats = {}
+_setup_stats_lock = threading.Lock()
+
+
+def _keep_connections_warm():
+    """Give litellm one shared keep-alive HTTP client so LLM calls reuse open connections."""
+    try:
+        import httpx
+        import litellm
+    except ImportError:
+        return
+    if getattr(litellm, 'client_session', None) is None:
+        litellm.client_session = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_CONNECTIONS,
+                keepalive_expiry=LLM_KEEPALIVE_SECONDS
+            ),
+            timeout=httpx.Timeout(600.0, connect=10.0)
+        )
+
+
+def get_llm():
+    """The process-wide LLM configuration, created on first use."""
+    global _llm
+    with _llm_lock:
+        if _llm is None:
+            _keep_connections_warm()
+            _llm = LLM(api_key=GOOGLE_API_KEY, model=LLM_MODEL, temperature=LLM_TEMPERATURE)
+        return _llm
+
+
+def _build_agent(spec, llm):
+    kwargs = dict(role=spec.role, goal=spec.goal, backstory=spec.backstory, verbose=True, llm=llm)
+    if spec.allow_delegation is not None:
+        kwargs['allow_delegation'] = spec.allow_delegation
+    return Agent(**kwargs)
+
+
+def _thread_agents(crew_spec):
+    """Agents of ``crew_spec`` for the calling thread, built on its first request.
+
+    Agents carry execution state while a crew runs, so concurrent requests
+    must not share them; one set per worker thread is reused across that
+    thread's requests instead.
+    """
+    agents_by_crew = getattr(_local, 'agents', None)
+    if agents_by_crew is None:
+        agents_by_crew = _local.agents = {}
+    if crew_spec.name not in agents_by_crew:
+        llm = get_llm()
+        agents_by_crew[crew_spec.name] = {
+            name: _build_agent(spec, llm) for name, spec in crew_spec.agents.items()
+        }
+    return agents_by_crew[crew_spec.name]
+
+
+def _assemble(crew_spec, agents, llm, inputs):
+    missing = set(crew_spec.inputs) - set(inputs)
+    if missing:
+        raise ValueError(f"Missing inputs for the {crew_spec.name} crew: {', '.join(sorted(missing))}")
+
+    tasks = {}
+    for name, spec in crew_spec.tasks.items():
+        kwargs = dict(
+            description=spec.description.format(**inputs),
+            expected_output=spec.expected_output,
+            agent=agents[spec.agent]
+        )
+        if spec.context:
+            kwargs['context'] = [tasks[context_name] for context_name in spec.context]
+        if spec.callback:
+            kwargs['callback'] = spec.callback
+        tasks[name] = Task(**kwargs)
+
+    crew_kwargs = dict(agents=list(agents.values()), tasks=list(tasks.values()), verbose=True)
+    if crew_spec.process is not None:
+        crew_kwargs['process'] = crew_spec.process
+    if crew_spec.crew_llm:
+        crew_kwargs['llm'] = llm
+    return Crew(**crew_kwargs)
+
+
+def _record_setup(crew_spec, started):
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    with _setup_stats_lock:
+        stats = _setup_stats.setdefault(crew_spec.name, {"crews": 0, "total_ms": 0.0})
+        stats["crews"] += 1
+        stats["total_ms"] += elapsed_ms
+    return elapsed_ms
+
+
+def bind_crew(crew_spec, **inputs):
+    """A ready-to-kickoff crew for one request.
+
+    Only the tasks are created per request; the LLM is shared by the process
+    and the agents by the worker thread.
+    """
+    started = time.perf_counter()
+    crew = _assemble(crew_spec, _thread_agents(crew_spec), get_llm(), inputs)
+    _record_setup(crew_spec, started)
+    return crew
+
+
+def build_crew_uncached(crew_spec, **inputs):
+    """Build the LLM, agents and tasks from scratch, the way every request used to.
+
+    Only used to measure the setup overhead bind_crew saves.
+    """
+    llm = LLM(api_key=GOOGLE_API_KEY, model=LLM_MODEL, temperature=LLM_TEMPERATURE)
+    agents = {name: _build_agent(spec, llm) for name, spec in crew_spec.agents.items()}
+    return _assemble(crew_spec, agents, llm, inputs)
+
+
+def setup_stats():
+    """Crews built and average per-request setup time, per crew."""
+    with _setup_stats_lock:
+        return {
+            name: {
+                "crews": stats["crews"],
+                "avg_setup_ms": round(stats["total_ms"] / stats["crews"], 3)
+            }
+            for name, stats in _setup_stats.items()
+        }
+
+
+def estimate_prompt_tokens(crew_spec, **inputs):
+    """Estimated tokens of the task prompts a crew bound to ``inputs`` sends (excluding agent preambles)."""
+    return sum(
+        estimate_tokens(spec.description.format(**inputs)) + estimate_tokens(spec.expected_output)
+        for spec in crew_spec.tasks.values()
+    )
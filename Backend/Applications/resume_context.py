@@ -0,0 +1,218 @@
+"""
+Resume Context
+One normalized, size-capped representation of a resume shared by all scoring tasks
+"""
+
+import re
+from collections import Counter
+
+# Canonical section -> heading phrases that introduce it.
+SECTION_HEADINGS = {
+    'summary': ('summary', 'professional summary', 'profile', 'objective', 'career objective', 'about me'),
+    'education': ('education', 'academic background', 'academics', 'qualifications', 'academic qualifications'),
+    'experience': ('experience', 'work experience', 'professional experience', 'employment', 'employment history',
+                   'work history', 'internships', 'internship experience'),
+    'projects': ('projects', 'academic projects', 'personal projects', 'key projects', 'research projects'),
+    'publications': ('publications', 'research', 'papers', 'research publications'),
+    'skills': ('skills', 'technical skills', 'core competencies', 'technologies', 'tools and technologies',
+               'skills and tools'),
+    'certifications': ('certifications', 'certificates', 'licenses and certifications', 'courses'),
+    'awards': ('awards', 'achievements', 'honors', 'honours', 'scholarships', 'awards and achievements'),
+}
+
+# Character caps per section; anything beyond is cut at a line boundary.
+SECTION_CHAR_LIMITS = {
+    'header': 300,
+    'summary': 800,
+    'education': 1200,
+    'experience': 4000,
+    'projects': 3000,
+    'publications': 1500,
+    'skills': 1000,
+    'certifications': 600,
+    'awards': 600,
+    'other': 800,
+}
+
+# Which sections each scoring task actually reads.
+AI_DETECTION_SECTIONS = ('summary', 'experience', 'projects')
+ATS_SECTIONS = ('education', 'experience', 'projects', 'publications', 'skills', 'certifications')
+PARAMETER_SECTIONS = ('education', 'experience', 'projects', 'publications', 'skills', 'awards')
+
+_HEADING_LOOKUP = {
+    phrase: section for section, phrases in SECTION_HEADINGS.items() for phrase in phrases
+}
+_DEGREE_PATTERN = re.compile(
+    r"\b(ph\.?\s?d|doctorate|master'?s?|m\.?\s?s\.?|m\.?\s?sc|m\.?\s?tech|mba|m\.?\s?eng|bachelor'?s?|"
+    r"b\.?\s?s\.?|b\.?\s?sc|b\.?\s?tech|b\.?\s?e\.?|b\.?\s?eng|associate'?s?|diploma)\b",
+    re.IGNORECASE
+)
+_YEAR_RANGE = re.compile(
+    r"\b((?:19|20)\d{2})\s*(?:-|–|—|to)\s*((?:19|20)\d{2}|present|current|now)\b",
+    re.IGNORECASE
+)
+_YEARS_STATED = re.compile(r"\b(\d{1,2})\+?\s*(?:years|yrs)\b", re.IGNORECASE)
+_URL = re.compile(r"(https?://\S+|github\.com/\S+|www\.\S+)", re.IGNORECASE)
+_SKILL_SPLIT = re.compile(r"[,;|•·\n]| - |: ")
+_PAGE_NUMBER = re.compile(r"(?:page\s*)?\d+(?:\s*(?:of|/)\s*\d+)?", re.IGNORECASE)
+
+# Separator between the pages of extracted resume text.
+PAGE_BREAK = "\f"
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token for English prose)."""
+    return (len(text) + 3) // 4
+
+
+def _page_furniture_key(line):
+    # "Page 1 of 2" and "Page 2 of 2" are the same footer.
+    return re.sub(r"\d+", "#", line.lower())
+
+
+def normalize_resume_text(text):
+    """Collapse whitespace, drop blank lines and remove page headers and footers.
+
+    Pages are separated by form feeds (see extract_text_from_pdf). Only the
+    first and last line of a page can be furniture: it is dropped when the
+    same line (ignoring numbers) opens or closes another page too, or when it
+    is a bare page number. Repeated lines inside a page are content.
+    """
+    pages = []
+    for page in (text or "").split(PAGE_BREAK):
+        lines = [re.sub(r"\s+", " ", line).strip() for line in page.splitlines()]
+        lines = [line for line in lines if line]
+        if lines:
+            pages.append(lines)
+
+    boundary_counts = Counter(
+        key for lines in pages for key in {_page_furniture_key(lines[0]), _page_furniture_key(lines[-1])}
+    )
+
+    def is_furniture(line):
+        if len(line) >= 60:
+            return False
+        return _PAGE_NUMBER.fullmatch(line) is not None or boundary_counts[_page_furniture_key(line)] >= 2
+
+    kept = []
+    for lines in pages:
+        start, end = 0, len(lines)
+        # The resume's own first line (usually the name) also heads every page when it is the page header.
+        if is_furniture(lines[0]) and (kept or _PAGE_NUMBER.fullmatch(lines[0])):
+            start = 1
+        if end > start and is_furniture(lines[-1]):
+            end -= 1
+        kept.extend(lines[start:end])
+    return "\n".join(kept)
+
+
+def _heading(line):
+    candidate = line.strip().rstrip(':').strip().lower()
+    if len(candidate.split()) > 5:
+        return None
+    return _HEADING_LOOKUP.get(candidate)
+
+
+def segment_sections(normalized_text):
+    """Split normalized resume text into canonical sections.
+
+    Text before the first recognised heading goes to ``header`` (name and
+    contact details); unrecognised trailing sections are folded into the
+    section they follow.
+    """
+    sections = {}
+    current = 'header'
+    for line in normalized_text.split("\n"):
+        section = _heading(line)
+        if section:
+            current = section
+            continue
+        sections.setdefault(current, []).append(line)
+    return {name: "\n".join(lines) for name, lines in sections.items()}
+
+
+def cap_text(text, max_chars):
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n", 0, max_chars)
+    return text[:cut if cut > max_chars // 2 else max_chars].rstrip() + "\n[...]"
+
+
+def _experience_years(experience_text, current_year):
+    spans = []
+    for start, end in _YEAR_RANGE.findall(experience_text):
+        end_year = current_year if not end[:1].isdigit() else int(end)
+        if end_year >= int(start):
+            spans.append((int(start), end_year))
+    if spans:
+        covered = set()
+        for start, end in spans:
+            covered.update(range(start, max(end, start + 1)))
+        return len(covered)
+    stated = [int(n) for n in _YEARS_STATED.findall(experience_text)]
+    return max(stated) if stated else None
+
+
+def structured_extract(sections, current_year):
+    """Compact facts pulled out of the sections without an LLM."""
+    skills_text = sections.get('skills', '')
+    skills = []
+    for token in _SKILL_SPLIT.split(skills_text):
+        token = token.strip(" .-")
+        if token and len(token) <= 40 and token.lower() not in (s.lower() for s in skills):
+            skills.append(token)
+
+    education = sections.get('education', '')
+    degrees = [line for line in education.split("\n") if _DEGREE_PATTERN.search(line)]
+    projects = sections.get('projects', '')
+    publications = sections.get('publications', '')
+
+    return {
+        'skills': skills[:40],
+        'degrees': degrees[:4],
+        'experience_years': _experience_years(sections.get('experience', ''), current_year),
+        'project_links': len(_URL.findall(projects)),
+        'publication_entries': len([line for line in publications.split("\n") if line.strip()]),
+        'sections_found': sorted(name for name in sections if name != 'header'),
+    }
+
+
+def build_resume_context(resume_text, current_year):
+    """Normalize, segment, cap and summarize a resume once for every scoring task."""
+    normalized = normalize_resume_text(resume_text)
+    sections = segment_sections(normalized)
+
+    # Resumes without recognisable headings are kept whole (capped) under 'other'.
+    if set(sections) <= {'header'}:
+        sections = {'other': sections.get('header', '')}
+
+    capped = {
+        name: cap_text(text, SECTION_CHAR_LIMITS.get(name, SECTION_CHAR_LIMITS['other']))
+        for name, text in sections.items()
+    }
+    return {
+        'sections': capped,
+        'extract': structured_extract(sections, current_year),
+        'original_tokens': estimate_tokens(resume_text or ''),
+    }
+
+
+def render_sections(context, section_names, include_extract=False):
+    """Prompt text holding only the requested sections (plus 'other' if headings were not found)."""
+    sections = context['sections']
+    names = [name for name in section_names if sections.get(name)]
+    if 'other' in sections:
+        names.append('other')
+
+    parts = [f"[{name.upper()}]\n{sections[name]}" for name in names]
+    if include_extract:
+        extract = context['extract']
+        parts.append(
+            "[EXTRACTED FACTS]\n"
+            f"Skills: {', '.join(extract['skills']) or 'none listed'}\n"
+            f"Degrees: {'; '.join(extract['degrees']) or 'none found'}\n"
+            f"Experience (years, from dates): {extract['experience_years'] if extract['experience_years'] is not None else 'unknown'}\n"
+            f"Project links (GitHub/live): {extract['project_links']}\n"
+            f"Publication entries: {extract['publication_entries']}"
+        )
+    return "\n\n".join(parts)
@@ -0,0 +1,108 @@
+"""
+Analytics Snapshot
+Materialized result of an expensive computation, keyed on a data version and refreshed in the
+background when the version moves (stale-while-revalidate)
+"""
+
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+Snapshot = namedtuple("Snapshot", ["value", "version", "computed_at", "stale"])
+
+# A failed refresh is not retried for this long; the last good snapshot keeps being served.
+RETRY_AFTER_SECONDS = 30
+
+
+class MaterializedSnapshot:
+    """Serves the last computed ``compute()`` result without waiting on it.
+
+    ``version()`` must be cheap: it is checked at most every
+    ``check_interval`` seconds, and when it differs from the version the
+    snapshot was computed at, the stale snapshot is still returned while a
+    single background refresh runs. Only the very first request (when
+    ``warm()`` has not finished) waits for a computation.
+    """
+
+    def __init__(self, compute, version, check_interval=1.0):
+        self.compute = compute
+        self.version = version
+        self.check_interval = check_interval
+        self._snapshot = None
+        self._checked = (None, 0.0)  # (version, monotonic time it was read)
+        self._compute_lock = threading.Lock()
+        self._refreshing = threading.Event()
+        self._retry_at = 0.0
+        self.refreshes = 0
+        self.last_duration = None
+        self.last_error = None
+
+    def _current_version(self):
+        version, checked_at = self._checked
+        now = time.monotonic()
+        if checked_at and now - checked_at < self.check_interval:
+            return version
+        version = self.version()
+        self._checked = (version, now)
+        return version
+
+    def _refresh(self):
+        with self._compute_lock:
+            # Read the version first: a change made while computing then still shows up as a newer version.
+            version = self.version()
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.version == version:
+                return snapshot
+            started = time.perf_counter()
+            try:
+                value = self.compute()
+            except Exception as e:
+                self.last_error = str(e)
+                self._retry_at = time.monotonic() + RETRY_AFTER_SECONDS
+                raise
+            self.last_duration = round(time.perf_counter() - started, 3)
+            self.last_error = None
+            self.refreshes += 1
+            self._snapshot = Snapshot(value, version, datetime.utcnow(), False)
+            self._checked = (version, time.monotonic())
+            return self._snapshot
+
+    def _refresh_in_background(self):
+        if self._refreshing.is_set() or time.monotonic() < self._retry_at:
+            return
+        self._refreshing.set()
+
+        def run():
+            try:
+                self._refresh()
+            except Exception as e:
+                print(f"Snapshot refresh failed: {e}")
+            finally:
+                self._refreshing.clear()
+
+        threading.Thread(target=run, name="snapshot-refresh", daemon=True).start()
+
+    def warm(self):
+        """Compute the first snapshot now (call at startup)."""
+        return self._refresh()
+
+    def get(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self._refresh()
+        if self._current_version() != snapshot.version:
+            self._refresh_in_background()
+            return snapshot._replace(stale=True)
+        return snapshot
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version if snapshot else None,
+            "computed_at": snapshot.computed_at.isoformat() + "Z" if snapshot else None,
+            "refreshing": self._refreshing.is_set(),
+            "refreshes": self.refreshes,
+            "last_duration_seconds": self.last_duration,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,75 @@
+"""
+Application Records
+One document per application in the ``applications`` collection, with its status history embedded
+"""
+
+from datetime import datetime
+
+# Fields the old application_status collection named differently.
+LEGACY_FIELD_NAMES = {"user_name": "name", "user_email": "email", "file_link": "resume_link"}
+
+
+def history_entry(status, at, fields=None):
+    entry = {"status": status, "at": at}
+    if fields and fields.get("error"):
+        entry["error"] = fields["error"]
+    return entry
+
+
+def new_application(application_id, job_id, name, email, status="pending", now=None, **fields):
+    """Initial document for a submitted application."""
+    now = now or datetime.utcnow()
+    return {
+        "application_id": application_id,
+        "job_id": job_id,
+        "name": name,
+        "email": email,
+        **fields,
+        "status": status,
+        "status_history": [history_entry(status, now, fields)],
+        "submitted_at": now,
+        "updated_at": now
+    }
+
+
+def status_update(status, fields=None, now=None):
+    """Update that moves an application to ``status`` and appends it to the history in one write."""
+    now = now or datetime.utcnow()
+    fields = fields or {}
+    return {
+        "$set": {**fields, "status": status, "updated_at": now},
+        "$push": {"status_history": history_entry(status, now, fields)}
+    }
+
+
+def merge_legacy(status_doc, application_doc):
+    """Consolidated document for an application stored the old way.
+
+    Either part may be None: an application_status entry for a submission
+    that never completed, or an applications entry written before status
+    tracking existed (those were only ever written once scored).
+    """
+    merged = {}
+    for key, value in (status_doc or {}).items():
+        if key != "_id":
+            merged[LEGACY_FIELD_NAMES.get(key, key)] = value
+    for key, value in (application_doc or {}).items():
+        if key != "_id":
+            merged[key] = value
+
+    if not status_doc:
+        merged["status"] = "completed"
+    submitted_at = merged.get("submitted_at") or merged.get("created_at")
+    if status_doc and status_doc.get("created_at"):
+        # applications.submitted_at used to be the time scoring finished.
+        submitted_at = status_doc["created_at"]
+    merged["submitted_at"] = submitted_at
+    merged.pop("created_at", None)
+
+    history = [history_entry("pending", submitted_at)] if status_doc else []
+    finished_at = merged.get("completed_at") or merged.get("updated_at")
+    if merged["status"] != "pending":
+        history.append(history_entry(merged["status"], finished_at or submitted_at, merged))
+    merged["status_history"] = history
+    merged.setdefault("updated_at", finished_at or submitted_at)
+    return merged
@@ -0,0 +1,163 @@
+"""
+Scaling benchmark for HRAnalytics.
+
+Generates a synthetic database per size (generate_synthetic_hr.py; kept in
+--workdir and reused on the next run), then times every analysis and the
+full summary, sequential and parallel, once reading the rollups and once
+reading the fact tables. The JSON report also has a scaling exponent per
+analysis between consecutive sizes (1.0 = linear; well above that is a
+scaling cliff), and with --baseline every time is compared to an earlier
+report: anything slower than --tolerance times its baseline is listed and
+the run exits with status 1.
+
+    python bench_analytics.py --sizes 10000,100000 --years 2 --output bench_analytics.json
+    python bench_analytics.py --sizes 10000 --baseline bench_analytics.json
+"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from Analytics import HRAnalytics
+from generate_synthetic_hr import generate
+from orm import install_pragmas
+
+MODES = {"rollups": True, "facts": False}
+
+
+def _best(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return {"seconds": round(min(timings), 4), "median": round(statistics.median(timings), 4)}
+
+
+def bench_database(path, repeat=3, modes=MODES):
+    """Timings of every analysis and of the whole summary on one database, per mode."""
+    engine = install_pragmas(create_engine(
+        f"sqlite:///{path}", pool_size=len(HRAnalytics.ANALYSES), connect_args={'check_same_thread': False}
+    ))
+    Session = sessionmaker(bind=engine)
+    report = {}
+    try:
+        for mode in modes:
+            use_rollups = MODES[mode]
+            session = Session()
+            try:
+                analytics = HRAnalytics(session, use_rollups)
+                analyses = {
+                    name: _best(lambda: analytics.run_analysis(name), repeat) for name in HRAnalytics.ANALYSES
+                }
+                summary = {
+                    "sequential": _best(lambda: analytics.run_all_analyses(), repeat),
+                    "parallel": _best(lambda: analytics.run_all_analyses(parallel=True, session_factory=Session), repeat),
+                }
+            finally:
+                session.close()
+            report[mode] = {"analyses": analyses, "summary": summary}
+    finally:
+        engine.dispose()
+    return report
+
+
+def _timings(mode_report):
+    timings = {name: t["seconds"] for name, t in mode_report["analyses"].items()}
+    timings.update({f"summary_{kind}": t["seconds"] for kind, t in mode_report["summary"].items()})
+    return timings
+
+
+def scaling(sizes_report):
+    """log(time ratio) / log(size ratio) for each timing between consecutive sizes."""
+    sizes = sorted(sizes_report, key=int)
+    result = {}
+    for smaller, larger in zip(sizes, sizes[1:]):
+        size_ratio = math.log(int(larger) / int(smaller))
+        for mode in sizes_report[larger]["modes"]:
+            before = _timings(sizes_report[smaller]["modes"][mode])
+            after = _timings(sizes_report[larger]["modes"][mode])
+            result.setdefault(f"{smaller}->{larger}", {})[mode] = {
+                name: round(math.log(max(after[name], 1e-6) / max(before[name], 1e-6)) / size_ratio, 2)
+                for name in after if name in before
+            }
+    return result
+
+
+def regressions(report, baseline, tolerance):
+    """Timings more than ``tolerance`` times slower than the same size and mode in ``baseline``."""
+    found = []
+    for size, entry in report["sizes"].items():
+        for mode, mode_report in entry["modes"].items():
+            previous = baseline.get("sizes", {}).get(size, {}).get("modes", {}).get(mode)
+            if previous is None:
+                continue
+            before = _timings(previous)
+            for name, seconds in _timings(mode_report).items():
+                # Millisecond timings are mostly noise.
+                if name in before and seconds > 0.005 and seconds > before[name] * tolerance:
+                    found.append({"size": size, "mode": mode, "name": name,
+                                  "seconds": seconds, "baseline": before[name]})
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10000,100000', help="comma separated employee counts")
+    parser.add_argument('--years', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--modes', default=','.join(MODES), help="rollups and/or facts")
+    parser.add_argument('--workdir', default='bench_data', help="generated databases are kept here")
+    parser.add_argument('--output', default='bench_analytics.json')
+    parser.add_argument('--baseline', help="earlier report to compare against")
+    parser.add_argument('--tolerance', type=float, default=1.25)
+    args = parser.parse_args()
+
+    modes = [mode for mode in args.modes.split(',') if mode]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+    os.makedirs(args.workdir, exist_ok=True)
+
+    report = {"generated_at": datetime.utcnow().isoformat() + "Z", "years": args.years, "seed": args.seed,
+              "repeat": args.repeat, "sizes": {}}
+    for size in (int(s) for s in args.sizes.split(',')):
+        path = os.path.join(args.workdir, f"hr_{size}_{args.years}y_s{args.seed}.sqlite")
+        entry = {"db": path}
+        if not os.path.exists(path):
+            print(f"Generating {size} employees into {path}")
+            entry["generated"] = generate(path, size, years=args.years, seed=args.seed)
+        print(f"Benchmarking {size} employees")
+        entry["size_mb"] = round(os.path.getsize(path) / 2 ** 20, 1)
+        entry["modes"] = bench_database(path, repeat=args.repeat, modes=modes)
+        for mode in modes:
+            print(f"  {mode}: summary {entry['modes'][mode]['summary']['sequential']['seconds']}s sequential, "
+                  f"{entry['modes'][mode]['summary']['parallel']['seconds']}s parallel")
+        report["sizes"][str(size)] = entry
+    report["scaling"] = scaling(report["sizes"])
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = regressions(report, json.load(f), args.tolerance)
+        for r in report["regressions"]:
+            print(f"REGRESSION {r['size']} {r['mode']} {r['name']}: {r['seconds']}s (baseline {r['baseline']}s)")
+        exit_code = 1 if report["regressions"] else 0
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark for the candidate vector index.
+
+Builds a throwaway index of synthetic resume embeddings and reports build
+time and query latency for the matching queries the portal serves.
+
+    python bench_candidate_index.py --size 100000
+"""
+
+import argparse
+import json
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import candidate_index
+
+
+def synthetic_records(size, dim, seed=7):
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow()
+    for i in range(size):
+        vector = rng.standard_normal(dim).astype(np.float32)
+        vector /= np.linalg.norm(vector)
+        yield {
+            "application_id": f"app-{i}",
+            "embedding": vector.tolist(),
+            "document": "",
+            "job_id": f"JOB{i % 500:08d}",
+            "score": float(rng.uniform(0, 100)),
+            "submitted_at": now - timedelta(days=int(rng.integers(0, 730)))
+        }
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def time_queries(fn, queries):
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "max_ms": round(max(latencies), 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=100000)
+    parser.add_argument('--dim', type=int, default=1024, help="embedding size (jina-embeddings-v3 is 1024)")
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    index_dir = tempfile.mkdtemp(prefix='candidate_index_bench_')
+    try:
+        collection = candidate_index.get_collection(index_dir)
+
+        started = time.perf_counter()
+        indexed = candidate_index.index_applications(synthetic_records(args.size, args.dim), collection=collection)
+        build_seconds = time.perf_counter() - started
+
+        rng = np.random.default_rng(11)
+        query_vectors = [rng.standard_normal(args.dim).astype(np.float32).tolist() for _ in range(args.queries)]
+        application_ids = [f"app-{random.randrange(args.size)}" for _ in range(args.queries)]
+        since = datetime.utcnow() - timedelta(days=180)
+
+        report = {
+            "size": indexed,
+            "dim": args.dim,
+            "build_seconds": round(build_seconds, 2),
+            "build_rate_per_second": round(indexed / build_seconds, 1),
+            "top_candidates": time_queries(
+                lambda q: candidate_index.top_candidates(q, 20, collection=collection), query_vectors),
+            "top_candidates_filtered": time_queries(
+                lambda q: candidate_index.top_candidates(q, 20, min_score=70, since=since, collection=collection),
+                query_vectors),
+            "similar_candidates": time_queries(
+                lambda a: candidate_index.similar_candidates(a, 20, collection=collection), application_ids)
+        }
+        print(json.dumps(report, indent=2))
+    finally:
+        shutil.rmtree(index_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark for the job search index.
+
+Builds an index of synthetic job postings and reports build time, the cost
+of the incremental updates create/delete make, and query latency for the
+searches the career page sends.
+
+    python bench_job_search.py --size 50000
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+
+from job_search import JobSearchIndex
+
+ROLES = ["Software Engineer", "Data Scientist", "Data Engineer", "Product Manager", "DevOps Engineer",
+         "Frontend Developer", "Backend Developer", "QA Analyst", "HR Generalist", "Sales Executive",
+         "Machine Learning Engineer", "Business Analyst", "Cloud Architect", "Support Specialist"]
+LEVELS = ["Junior", "Senior", "Lead", "Principal", "Staff", ""]
+SKILLS = ["python", "java", "javascript", "typescript", "react", "vue", "flask", "django", "kubernetes",
+          "docker", "aws", "azure", "gcp", "sql", "mongodb", "postgresql", "spark", "kafka", "terraform",
+          "pandas", "pytorch", "tensorflow", "excel", "salesforce", "communication", "leadership", "c++", "c#",
+          "golang", "rust", "airflow", "tableau", "linux", "networking", "security", "agile", "scrum"]
+FILLER = ["team", "build", "design", "deliver", "customers", "platform", "experience", "years", "with",
+          "strong", "work", "across", "product", "ownership", "systems", "scale", "reliable", "services"]
+
+
+def synthetic_jobs(size, seed=7):
+    rng = random.Random(seed)
+    today = date.today()
+    for i in range(size):
+        words = rng.sample(SKILLS, 6) + [rng.choice(FILLER) for _ in range(rng.randint(60, 200))]
+        rng.shuffle(words)
+        yield {
+            "job_id": f"JOB{i:08d}",
+            "job_title": f"{rng.choice(LEVELS)} {rng.choice(ROLES)}".strip(),
+            "job_description": " ".join(words),
+            "date_posted": (today - timedelta(days=rng.randint(0, 365))).strftime('%Y-%m-%d')
+        }
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def time_queries(fn, queries):
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "max_ms": round(max(latencies), 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=50000)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    jobs = list(synthetic_jobs(args.size))
+    index = JobSearchIndex()
+    started = time.perf_counter()
+    index.sync(jobs)
+    build_seconds = time.perf_counter() - started
+
+    rng = random.Random(11)
+    keyword = [f"{rng.choice(SKILLS)} {rng.choice(ROLES).split()[0].lower()}" for _ in range(args.queries)]
+    typing = [rng.choice(SKILLS)[:3] for _ in range(args.queries)]
+    title = [rng.choice(ROLES).lower() for _ in range(args.queries)]
+
+    extra = list(synthetic_jobs(args.queries, seed=99))
+    for job in extra:
+        job["job_id"] = "NEW" + job["job_id"]
+    started = time.perf_counter()
+    for job in extra:
+        index.add(job)
+    add_ms = (time.perf_counter() - started) * 1000 / len(extra)
+    started = time.perf_counter()
+    for job in extra:
+        index.remove(job["job_id"])
+    remove_ms = (time.perf_counter() - started) * 1000 / len(extra)
+
+    report = {
+        "size": len(index),
+        "build_seconds": round(build_seconds, 2),
+        "add_ms": round(add_ms, 3),
+        "remove_ms": round(remove_ms, 3),
+        "resync_unchanged_ms": round(time_queries(index.sync, [jobs])["max_ms"], 2),
+        "keyword_search": time_queries(lambda q: index.search(q), keyword),
+        "prefix_search": time_queries(lambda q: index.search(q), typing),
+        "title_search_past_week": time_queries(lambda q: index.search(q, posted_within="week"), title),
+        "browse_past_month": time_queries(lambda q: index.search("", posted_within="month", offset=q),
+                                          [rng.randrange(0, 200) for _ in range(args.queries)])
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark for the tenure and hiring-trend analyses.
+
+Fills a throwaway SQLite database with synthetic employees and compares the
+columnar / SQL-count implementations in HRAnalytics with the previous
+ORM-hydrating ones, reporting time and peak Python memory for each.
+
+    python bench_tenure_analysis.py --employees 1000000
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from Analytics import HRAnalytics
+from orm import Base, Employee
+
+DEPTS = ["Engineering", "Finance", "HR", "IT", "Marketing", "Operations", "Product", "Sales", "Support"]
+ROLES = ["Engineer", "Analyst", "Manager", "Specialist", "Director", "Associate"]
+
+
+def fill(path, employees, seed=7):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    rng = random.Random(seed)
+    now = datetime.now()
+    conn = sqlite3.connect(path)
+    rows = (
+        (f"E{i:07d}", f"First{i}", f"Last{i}", f"e{i}@example.com", rng.choice(DEPTS), rng.choice(ROLES),
+         "Pune", (now - timedelta(days=rng.randint(0, 15 * 365))).strftime('%Y-%m-%d %H:%M:%S.%f'))
+        for i in range(employees)
+    )
+    conn.executemany("INSERT INTO employees VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+# The implementations these analyses had before, kept here as the baseline.
+def legacy_tenure(session):
+    tenure_data = []
+    for emp in session.query(Employee).all():
+        if emp.hire_date:
+            tenure_data.append({
+                'employee_id': emp.employee_id,
+                'name': f"{emp.first_name} {emp.last_name}",
+                'dept': emp.dept,
+                'tenure_years': round((datetime.now() - emp.hire_date).days / 365.25, 2)
+            })
+    df_tenure = pd.DataFrame(tenure_data)
+    df_tenure['tenure_bracket'] = pd.cut(df_tenure['tenure_years'], bins=[0, 1, 3, 5, 10, 100])
+    return df_tenure['tenure_bracket'].value_counts(), df_tenure.groupby('dept')['tenure_years'].mean()
+
+
+def legacy_hiring(session, column):
+    six_months_ago = datetime.now() - timedelta(days=180)
+    counts = {}
+    for hire in session.query(Employee).filter(Employee.hire_date >= six_months_ago).all():
+        key = getattr(hire, column)
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def measure(Session, fn):
+    session = Session()
+    started = time.perf_counter()
+    fn(session)
+    seconds = time.perf_counter() - started
+    session.close()
+
+    session = Session()
+    tracemalloc.start()
+    fn(session)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    session.close()
+    return {"seconds": round(seconds, 3), "peak_mb": round(peak / 2 ** 20, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--employees', type=int, default=1000000)
+    parser.add_argument('--skip-legacy', action='store_true', help="only time the current implementations")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='tenure_bench_')
+    try:
+        path = os.path.join(workdir, 'hr.sqlite')
+        started = time.perf_counter()
+        fill(path, args.employees)
+        Session = sessionmaker(bind=create_engine(f"sqlite:///{path}"))
+
+        cases = {
+            "tenure_distribution": lambda s: HRAnalytics(s).analyze_tenure_distribution(),
+            "hiring_trends": lambda s: HRAnalytics(s).analyze_hiring_trends(),
+            "hiring_trends_by_role": lambda s: HRAnalytics(s).analyze_hiring_trends_by_role(),
+        }
+        legacy = {
+            "tenure_distribution": legacy_tenure,
+            "hiring_trends": lambda s: legacy_hiring(s, 'dept'),
+            "hiring_trends_by_role": lambda s: legacy_hiring(s, 'role'),
+        }
+        report = {"employees": args.employees, "fill_seconds": round(time.perf_counter() - started, 2)}
+        for name, fn in cases.items():
+            report[name] = {"current": measure(Session, fn)}
+            if not args.skip_legacy:
+                report[name]["legacy"] = measure(Session, legacy[name])
+        print(json.dumps(report, indent=2))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
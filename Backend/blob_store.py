@@ -0,0 +1,133 @@
+"""
+Blob Store
+Content-addressed (SHA-256) local spool of uploaded resumes shared by the portal and the scoring service
+"""
+
+import hashlib
+import io
+import os
+import re
+import tempfile
+import time
+
+script_dir = os.path.abspath(os.path.dirname(__file__))
+# Both services must see the same directory; the in-tree default is git-ignored.
+DEFAULT_SPOOL_DIR = os.environ.get('BLOB_SPOOL_DIR', os.path.join(script_dir, 'blob_spool'))
+
+_REF_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+_CHUNK_SIZE = 1 << 20
+
+
+class BlobNotFound(Exception):
+    pass
+
+
+class BlobStore:
+    """Files stored once under the SHA-256 of their bytes.
+
+    A blob reference is the hex digest. Writing the same bytes again only
+    refreshes the blob's modification time, which is what retention-based
+    cleanup goes by.
+    """
+
+    def __init__(self, root=DEFAULT_SPOOL_DIR):
+        # Created by the first write, so importing a service doesn't leave an empty spool behind.
+        self.root = root
+
+    def path(self, ref):
+        if not _REF_PATTERN.match(ref or ""):
+            raise ValueError(f"Invalid blob reference: {ref!r}")
+        return os.path.join(self.root, ref[:2], ref)
+
+    def exists(self, ref):
+        return os.path.exists(self.path(ref))
+
+    def put_stream(self, stream):
+        """Store everything read from ``stream`` and return its reference."""
+        digest = hashlib.sha256()
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.incoming-')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in iter(lambda: stream.read(_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            ref = digest.hexdigest()
+            target = self.path(ref)
+            if os.path.exists(target):
+                os.utime(target)
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(tmp_path, target)
+            return ref
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def put_bytes(self, data):
+        return self.put_stream(io.BytesIO(data))
+
+    def open(self, ref):
+        try:
+            return open(self.path(ref), 'rb')
+        except FileNotFoundError:
+            raise BlobNotFound(ref)
+
+    def touch(self, ref):
+        """Mark a blob as still in use so cleanup keeps it."""
+        try:
+            os.utime(self.path(ref))
+        except FileNotFoundError:
+            raise BlobNotFound(ref)
+
+    def usage(self):
+        count = total = 0
+        for entry in self._blobs():
+            count += 1
+            total += entry.stat().st_size
+        return {"blobs": count, "bytes": total}
+
+    def _blobs(self):
+        if not os.path.isdir(self.root):
+            return
+        for shard in os.scandir(self.root):
+            if shard.is_dir():
+                for entry in os.scandir(shard.path):
+                    if entry.is_file() and _REF_PATTERN.match(entry.name):
+                        yield entry
+
+    def cleanup(self, max_age_seconds, max_bytes=None):
+        """Delete blobs unused for ``max_age_seconds``, then the oldest ones until under ``max_bytes``.
+
+        Returns the number of blobs and bytes removed.
+        """
+        now = time.time()
+        kept = []
+        removed = removed_bytes = 0
+        for entry in self._blobs():
+            stat = entry.stat()
+            if now - stat.st_mtime > max_age_seconds:
+                removed += 1
+                removed_bytes += stat.st_size
+                os.remove(entry.path)
+            else:
+                kept.append((stat.st_mtime, stat.st_size, entry.path))
+
+        if max_bytes is not None:
+            total = sum(size for _, size, _ in kept)
+            for _, size, path in sorted(kept):
+                if total <= max_bytes:
+                    break
+                os.remove(path)
+                total -= size
+                removed += 1
+                removed_bytes += size
+
+        # Leftovers of writes interrupted by a crash.
+        for entry in os.scandir(self.root) if os.path.isdir(self.root) else ():
+            if entry.name.startswith('.incoming-') and now - entry.stat().st_mtime > 3600:
+                os.remove(entry.path)
+
+        return {"removed_blobs": removed, "removed_bytes": removed_bytes}
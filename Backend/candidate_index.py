@@ -0,0 +1,148 @@
+"""
+Candidate Vector Index
+Local ChromaDB index of scored resumes for candidate-to-job matching
+"""
+
+import os
+import threading
+from datetime import datetime, timezone
+
+import chromadb
+
+script_dir = os.path.abspath(os.path.dirname(__file__))
+CHROMA_PATH = os.path.join(script_dir, 'chroma_db')
+COLLECTION_NAME = "applications_collection"
+
+# Chroma rejects add/upsert calls above its max batch size, so bulk loads are chunked.
+INDEX_BATCH_SIZE = 5000
+
+_collections = {}
+_collections_lock = threading.Lock()
+
+
+def get_collection(path=CHROMA_PATH):
+    """Return the (process-wide, cached) applications collection stored at ``path``."""
+    with _collections_lock:
+        if path not in _collections:
+            client = chromadb.PersistentClient(path=path)
+            _collections[path] = client.get_or_create_collection(
+                name=COLLECTION_NAME,
+                metadata={"hnsw:space": "cosine"}
+            )
+        return _collections[path]
+
+
+def _epoch(value):
+    """Seconds since the epoch; naive datetimes (utcnow(), Mongo) are UTC, not local time."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return float(value or 0)
+
+
+def _metadata(job_id, score, submitted_at):
+    return {
+        "job_id": job_id,
+        "score": float(score or 0),
+        "submitted_at": _epoch(submitted_at)
+    }
+
+
+def index_application(application_id, embedding, document, job_id, score, submitted_at, collection=None):
+    """Add or replace one scored resume in the index."""
+    collection = collection or get_collection()
+    collection.upsert(
+        ids=[application_id],
+        embeddings=[embedding],
+        documents=[document],
+        metadatas=[_metadata(job_id, score, submitted_at)]
+    )
+
+
+def index_applications(records, collection=None):
+    """Bulk version of index_application for backfills.
+
+    ``records`` is an iterable of dicts with the same keys as
+    index_application's arguments.
+    """
+    collection = collection or get_collection()
+    batch = []
+    total = 0
+    for record in records:
+        batch.append(record)
+        if len(batch) >= INDEX_BATCH_SIZE:
+            total += _upsert_batch(collection, batch)
+            batch = []
+    if batch:
+        total += _upsert_batch(collection, batch)
+    return total
+
+
+def _upsert_batch(collection, batch):
+    collection.upsert(
+        ids=[r["application_id"] for r in batch],
+        embeddings=[r["embedding"] for r in batch],
+        documents=[r.get("document", "") for r in batch],
+        metadatas=[_metadata(r.get("job_id"), r.get("score"), r.get("submitted_at")) for r in batch]
+    )
+    return len(batch)
+
+
+def _where(min_score=None, since=None, job_id=None):
+    clauses = []
+    if min_score is not None:
+        clauses.append({"score": {"$gte": float(min_score)}})
+    if since is not None:
+        clauses.append({"submitted_at": {"$gte": _epoch(since)}})
+    if job_id is not None:
+        clauses.append({"job_id": job_id})
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": clauses}
+
+
+def _matches(results):
+    matches = []
+    for application_id, metadata, distance in zip(
+        results['ids'][0], results['metadatas'][0], results['distances'][0]
+    ):
+        matches.append({
+            "application_id": application_id,
+            "job_id": metadata.get("job_id"),
+            "score": metadata.get("score"),
+            "submitted_at": datetime.fromtimestamp(metadata.get("submitted_at", 0), timezone.utc).isoformat(),
+            "similarity": round(1 - distance, 4)
+        })
+    return matches
+
+
+def top_candidates(embedding, n_results=10, min_score=None, since=None, job_id=None, collection=None):
+    """Past applicants whose resumes are closest to ``embedding`` (usually a job description embedding)."""
+    collection = collection or get_collection()
+    results = collection.query(
+        query_embeddings=[embedding],
+        n_results=n_results,
+        where=_where(min_score, since, job_id),
+        include=["metadatas", "distances"]
+    )
+    return _matches(results)
+
+
+def similar_candidates(application_id, n_results=10, min_score=None, since=None, collection=None):
+    """Applicants whose resumes are closest to an already indexed application."""
+    collection = collection or get_collection()
+    stored = collection.get(ids=[application_id], include=["embeddings"])
+    if not stored['ids']:
+        return None
+
+    results = collection.query(
+        query_embeddings=[stored['embeddings'][0]],
+        n_results=n_results + 1,
+        where=_where(min_score, since),
+        include=["metadatas", "distances"]
+    )
+    matches = [m for m in _matches(results) if m["application_id"] != application_id]
+    return matches[:n_results]
@@ -0,0 +1,226 @@
+"""
+Drive Client
+Process-wide Google Drive access: one credential refresh under a lock, one API client per thread,
+chunked resumable uploads and batched metadata requests
+"""
+
+import io
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, urlunparse
+
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from google_auth_oauthlib.flow import InstalledAppFlow
+from googleapiclient.discovery import build
+from googleapiclient.http import BatchHttpRequest, MediaFileUpload, MediaIoBaseDownload
+
+DRIVE_SCOPES = ['https://www.googleapis.com/auth/drive']
+
+script_dir = os.path.abspath(os.path.dirname(__file__))
+DEFAULT_CREDENTIALS_PATH = os.path.join(script_dir, 'Applications', 'google_drive', 'credentials.json')
+DEFAULT_TOKEN_PATH = os.path.join(script_dir, 'Applications', 'google_drive', 'token.json')
+
+# Resumable upload chunk size; Drive requires a multiple of 256 KiB.
+UPLOAD_CHUNK_SIZE = int(os.environ.get('DRIVE_UPLOAD_CHUNK_SIZE', 5 * 1024 * 1024))
+UPLOAD_WORKERS = int(os.environ.get('DRIVE_UPLOAD_WORKERS', 6))
+UPLOAD_RETRIES = 5
+# Drive accepts at most 100 calls in one batch request.
+BATCH_LIMIT = 100
+
+
+class DriveClientManager:
+    """Shares one set of credentials across threads and hands each thread its own Drive client.
+
+    The underlying httplib2 connection is not thread-safe, so clients are
+    never shared; building one per thread also keeps its connection open
+    for the next upload instead of paying discovery and TLS setup each
+    time. Credentials are refreshed (and the token file rewritten) by one
+    thread at a time.
+    """
+
+    def __init__(self, credentials_path=DEFAULT_CREDENTIALS_PATH, token_path=DEFAULT_TOKEN_PATH,
+                 scopes=DRIVE_SCOPES, api_root=None, token_uri=None, chunk_size=UPLOAD_CHUNK_SIZE,
+                 upload_workers=UPLOAD_WORKERS):
+        self.credentials_path = credentials_path
+        self.token_path = token_path
+        self.scopes = scopes
+        # Only set to point the client at something other than Google's endpoints (e.g. a test server).
+        self.api_root = api_root.rstrip('/') + '/' if api_root else None
+        self.token_uri = token_uri
+        self.chunk_size = chunk_size
+        self.upload_workers = upload_workers
+        self._creds = None
+        self._creds_lock = threading.Lock()
+        self._local = threading.local()
+        self._upload_pool = None
+        self._upload_pool_lock = threading.Lock()
+        self.refresh_count = 0
+
+    def _write_token(self, creds):
+        # Written to a temporary file and renamed so the other service never reads a half-written token.
+        directory = os.path.dirname(self.token_path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.token-')
+        try:
+            with os.fdopen(fd, 'w') as tmp:
+                tmp.write(creds.to_json())
+            os.replace(tmp_path, self.token_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _load_token(self):
+        if not os.path.exists(self.token_path):
+            return None
+        try:
+            creds = Credentials.from_authorized_user_file(self.token_path, self.scopes)
+            if self.token_uri:
+                # with_token_uri() drops the expiry, which would make a stale token look valid.
+                expiry = creds.expiry
+                creds = creds.with_token_uri(self.token_uri)
+                creds.expiry = expiry
+            return creds
+        except Exception as e:
+            print(f"Error loading token: {e}")
+            return None
+
+    def credentials(self):
+        """Valid credentials, refreshed or re-authorized at most once however many threads ask."""
+        creds = self._creds
+        if creds and creds.valid:
+            return creds
+
+        with self._creds_lock:
+            if self._creds and self._creds.valid:
+                return self._creds
+
+            creds = self._creds or self._load_token()
+            if creds and creds.valid:
+                # Another process may already have refreshed the token on disk.
+                self._creds = creds
+                return creds
+
+            if creds and creds.expired and creds.refresh_token:
+                try:
+                    creds.refresh(Request())
+                    self.refresh_count += 1
+                except Exception as e:
+                    print(f"Error refreshing token: {e}")
+                    creds = None
+            else:
+                creds = None
+
+            if not creds:
+                if not os.path.exists(self.credentials_path):
+                    raise FileNotFoundError(
+                        f"Credentials file not found at {self.credentials_path}. "
+                        "Please download it from Google Cloud Console."
+                    )
+                flow = InstalledAppFlow.from_client_secrets_file(self.credentials_path, self.scopes)
+                creds = flow.run_local_server(port=0)
+
+            self._write_token(creds)
+            self._creds = creds
+            return creds
+
+    def service(self):
+        """This thread's Drive client, rebuilt only when the credentials object changes."""
+        creds = self.credentials()
+        cached = getattr(self._local, 'service', None)
+        if cached is not None and self._local.creds is creds:
+            return cached
+
+        options = {'api_endpoint': f"{self.api_root}drive/v3/"} if self.api_root else None
+        service = build('drive', 'v3', credentials=creds, cache_discovery=False, client_options=options)
+        self._local.service = service
+        self._local.creds = creds
+        return service
+
+    def upload_file(self, filepath, name, folder_id, mimetype='application/pdf', fields='id, name, size'):
+        """Upload ``filepath`` into ``folder_id`` in resumable chunks and return the created file's metadata."""
+        media = MediaFileUpload(filepath, mimetype=mimetype, chunksize=self.chunk_size, resumable=True)
+        request = self.service().files().create(
+            body={'name': name, 'parents': [folder_id]},
+            media_body=media,
+            fields=fields
+        )
+        if self.api_root:
+            # The client library keeps the https scheme for media URLs even when api_endpoint overrides it.
+            scheme = urlparse(self.api_root).scheme
+            request.uri = urlunparse(urlparse(request.uri)._replace(scheme=scheme))
+        response = None
+        while response is None:
+            # Each chunk is retried with backoff on 5xx / rate limits; completed chunks are not resent.
+            _, response = request.next_chunk(num_retries=UPLOAD_RETRIES)
+        return response
+
+    def submit_upload(self, filepath, name, folder_id, mimetype='application/pdf'):
+        """Start ``upload_file`` on the shared upload pool and return its Future."""
+        with self._upload_pool_lock:
+            if self._upload_pool is None:
+                self._upload_pool = ThreadPoolExecutor(max_workers=self.upload_workers, thread_name_prefix='drive-upload')
+        return self._upload_pool.submit(self.upload_file, filepath, name, folder_id, mimetype)
+
+    def download(self, file_id):
+        """File content as a BytesIO positioned at the start."""
+        request = self.service().files().get_media(fileId=file_id)
+        fh = io.BytesIO()
+        downloader = MediaIoBaseDownload(fh, request, chunksize=self.chunk_size)
+        done = False
+        while not done:
+            _, done = downloader.next_chunk(num_retries=UPLOAD_RETRIES)
+        fh.seek(0)
+        return fh
+
+    def _new_batch(self, callback):
+        if self.api_root:
+            return BatchHttpRequest(callback=callback, batch_uri=f"{self.api_root}batch/drive/v3")
+        return self.service().new_batch_http_request(callback=callback)
+
+    def _run_batches(self, requests_by_key):
+        results, errors = {}, {}
+
+        def collect(request_id, response, exception):
+            if exception is not None:
+                errors[request_id] = exception
+            else:
+                results[request_id] = response
+
+        keys = list(requests_by_key)
+        for start in range(0, len(keys), BATCH_LIMIT):
+            batch = self._new_batch(collect)
+            for key in keys[start:start + BATCH_LIMIT]:
+                batch.add(requests_by_key[key], request_id=key)
+            batch.execute()
+        return results, errors
+
+    def get_metadata(self, file_ids, fields='id, name, size, md5Checksum'):
+        """Metadata for many files in batches of up to 100 calls per HTTP request.
+
+        Returns ``(metadata_by_id, errors_by_id)``.
+        """
+        files = self.service().files()
+        return self._run_batches({
+            file_id: files.get(fileId=file_id, fields=fields) for file_id in file_ids
+        })
+
+    def update_metadata(self, updates, fields='id'):
+        """Apply ``{file_id: body}`` metadata updates (renames, moves, properties) in batches."""
+        files = self.service().files()
+        return self._run_batches({
+            file_id: files.update(fileId=file_id, body=body, fields=fields) for file_id, body in updates.items()
+        })
+
+    def shutdown(self):
+        with self._upload_pool_lock:
+            if self._upload_pool is not None:
+                self._upload_pool.shutdown(wait=True)
+                self._upload_pool = None
+
+
+def file_link(file_id):
+    return f"https://drive.google.com/file/d/{file_id}/view"
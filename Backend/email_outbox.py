@@ -0,0 +1,239 @@
+"""
+Email Outbox
+Mongo-backed outbox drained by background senders over pooled SMTP connections,
+with a per-minute send limit and retries for transient failures
+"""
+
+import queue
+import smtplib
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from pymongo import ReturnDocument
+
+# Claimed messages not finished within this long (the sender died) are handed out again.
+STALE_CLAIM_SECONDS = 600
+
+TRANSIENT_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+
+class SMTPPool:
+    """Reuses logged-in SMTP sessions instead of connecting and authenticating per message."""
+
+    def __init__(self, host, port, username='', password='', starttls=True, size=2, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        self.connections_opened = 0
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        self.connections_opened += 1
+        return server
+
+    @contextmanager
+    def connection(self):
+        try:
+            server = self._idle.get_nowait()
+            try:
+                server.noop()
+            except (smtplib.SMTPException, OSError):
+                self._close(server)
+                server = self._connect()
+        except queue.Empty:
+            server = self._connect()
+
+        try:
+            yield server
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            # The message was rejected but the session is still good.
+            self._release(server)
+            raise
+        except BaseException:
+            self._close(server)
+            raise
+        else:
+            self._release(server)
+
+    def _release(self, server):
+        try:
+            self._idle.put_nowait(server)
+        except queue.Full:
+            self._close(server)
+
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def close(self):
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+class RateLimiter:
+    """Allows at most ``per_minute`` sends in any sliding 60 second window."""
+
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self._sent = deque()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._sent and now - self._sent[0] >= 60:
+                    self._sent.popleft()
+                if len(self._sent) < self.per_minute:
+                    self._sent.append(now)
+                    return
+                delay = 60 - (now - self._sent[0])
+            time.sleep(delay)
+
+
+def is_transient(error):
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    # 4xx replies (mailbox busy, rate limited, try again later) are worth retrying; 5xx are not.
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    return False
+
+
+class EmailOutbox:
+    """Queues messages as documents in ``collection`` and sends them from worker threads.
+
+    Each document moves queued -> sending -> sent, or back to retrying with
+    a backoff after a transient failure, or to failed once ``max_attempts``
+    is used up or the server rejects it permanently.
+    """
+
+    def __init__(self, collection, pool, sender, workers=2, per_minute=20, max_attempts=5,
+                 backoff_seconds=60, poll_seconds=5):
+        self.collection = collection
+        self.pool = pool
+        self.sender = sender
+        self.workers = workers
+        self.rate_limiter = RateLimiter(per_minute)
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.poll_seconds = poll_seconds
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def enqueue(self, to, subject, body, **metadata):
+        return self.enqueue_many([dict(to=to, subject=subject, body=body, **metadata)])[0]
+
+    def enqueue_many(self, messages):
+        """Store ``messages`` (dicts with to, subject, body and any extra fields) and return their ids."""
+        if not messages:
+            return []
+        now = datetime.utcnow()
+        result = self.collection.insert_many([{
+            **message,
+            "status": "queued",
+            "attempts": 0,
+            "created_at": now,
+            "next_attempt_at": now
+        } for message in messages])
+        self._wakeup.set()
+        return result.inserted_ids
+
+    def _claim(self):
+        now = datetime.utcnow()
+        return self.collection.find_one_and_update(
+            {
+                "$or": [
+                    {"status": {"$in": ["queued", "retrying"]}, "next_attempt_at": {"$lte": now}},
+                    {"status": "sending", "claimed_at": {"$lte": now - timedelta(seconds=STALE_CLAIM_SECONDS)}}
+                ]
+            },
+            {"$set": {"status": "sending", "claimed_at": now}, "$inc": {"attempts": 1}},
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _build_message(self, doc):
+        msg = MIMEMultipart()
+        msg['From'] = self.sender
+        msg['To'] = doc["to"]
+        msg['Subject'] = doc["subject"]
+        msg.attach(MIMEText(doc["body"], 'plain'))
+        return msg.as_string()
+
+    def _deliver(self, doc):
+        self.rate_limiter.wait()
+        try:
+            with self.pool.connection() as server:
+                server.sendmail(self.sender, doc["to"], self._build_message(doc))
+        except Exception as e:
+            retry = is_transient(e) and doc["attempts"] < self.max_attempts
+            update = {"status": "retrying" if retry else "failed", "last_error": str(e), "updated_at": datetime.utcnow()}
+            if retry:
+                delay = self.backoff_seconds * 2 ** (doc["attempts"] - 1)
+                update["next_attempt_at"] = datetime.utcnow() + timedelta(seconds=delay)
+            print(f"Failed to send email to {doc['to']} (attempt {doc['attempts']}): {e}")
+            self.collection.update_one({"_id": doc["_id"]}, {"$set": update})
+            return False
+
+        self.collection.update_one(
+            {"_id": doc["_id"]},
+            {"$set": {"status": "sent", "sent_at": datetime.utcnow(), "updated_at": datetime.utcnow()}}
+        )
+        return True
+
+    def process_pending(self):
+        """Send everything currently due on the calling thread; returns the number of messages handled."""
+        handled = 0
+        while not self._stopping.is_set():
+            doc = self._claim()
+            if doc is None:
+                return handled
+            self._deliver(doc)
+            handled += 1
+        return handled
+
+    def _worker(self):
+        while not self._stopping.is_set():
+            self._wakeup.clear()
+            try:
+                self.process_pending()
+            except Exception as e:
+                print(f"Email outbox worker error: {e}")
+            self._wakeup.wait(self.poll_seconds)
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"email-outbox-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.pool.close()
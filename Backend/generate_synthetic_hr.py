@@ -0,0 +1,243 @@
+"""
+Synthetic HR dataset generator.
+
+Fills a new SQLite database with the orm.py schema and realistic synthetic
+data: employees hired over the last ``--hire-years`` years, a working-day
+attendance record for every active employee over the last ``--years``
+years, monthly payroll, half-yearly reviews, promotions and terminations,
+plus the kpi_overview row. The value vocabularies (departments, roles,
+locations, event types, date format) follow the hr.sqlite sample.
+
+Rows are streamed into executemany() one employee chunk at a time with
+journaling off, and the secondary indexes, WAL mode, ANALYZE and the
+dashboard rollups are added once at the end. Attendance dominates the
+size: about 260 rows per employee per year (1M employees x 2 years is
+roughly 500M rows and tens of GB).
+
+    python generate_synthetic_hr.py --db /tmp/hr_100k.sqlite --employees 100000 --years 2
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine
+
+import rollups
+from orm import Base, install_pragmas
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+DEPT_ROLES = {
+    "Engineering": ["SWE", "SRE", "DataEng", "EngMgr"],
+    "Finance": ["Accountant", "Analyst", "FinanceMgr"],
+    "HR": ["HRBP", "Recruiter", "HRMgr"],
+    "IT": ["ITAdmin", "NetEng", "SysEng"],
+    "Marketing": ["Content", "SEO", "Growth", "MktMgr"],
+    "Operations": ["OpsAssoc", "OpsLead"],
+    "Product": ["PM", "Designer", "UXR", "ProdMgr"],
+    "Sales": ["AE", "SDR", "SalesMgr"],
+    "Support": ["CSR", "SupportLead"],
+}
+DEPTS = list(DEPT_ROLES)
+# Median base salary per department; individual salaries spread around it.
+DEPT_SALARY = {
+    "Engineering": 150000, "Finance": 110000, "HR": 100000, "IT": 110000, "Marketing": 100000,
+    "Operations": 90000, "Product": 130000, "Sales": 100000, "Support": 85000,
+}
+LOCATIONS = ["Atlanta", "Austin", "Boston", "Chicago", "Denver", "LA", "NYC", "Remote", "SF", "Seattle"]
+FIRST_NAMES = ["Amelia", "Leo", "Avery", "Gabriel", "Joseph", "James", "Henry", "Wyatt", "Sophia", "David",
+               "Zoe", "Penelope", "Zoey", "Levi", "Luna", "Olivia", "Noah", "Emma", "Liam", "Mia"]
+LAST_NAMES = ["Miller", "Brown", "Hall", "Walker", "Thompson", "Lopez", "Green", "Hill", "Harris", "Moore",
+              "Thomas", "Lewis", "Anderson", "Martinez", "White", "Smith", "Johnson", "Garcia", "Clark", "Young"]
+# Review score distribution of the sample (scores 1-5).
+SCORE_WEIGHTS = [1, 11, 42, 37, 10]
+MEAN_ABSENCE_RATE = 0.04
+ANNUAL_TERMINATION_RATE = 0.09
+ANNUAL_PROMOTION_RATE = 0.15
+
+CHUNK_EMPLOYEES = 2000
+
+# Loading settings; the database is thrown away if the load fails, so nothing needs to survive a crash.
+LOAD_PRAGMAS = {'journal_mode': 'OFF', 'synchronous': 'OFF', 'cache_size': -262144, 'temp_store': 'MEMORY'}
+
+
+def _fmt(day):
+    return datetime(day.year, day.month, day.day).strftime(DATE_FORMAT)
+
+
+def _employee(rng, index, today, hire_years, window_start):
+    """One employee: the employees row plus everything needed to generate their facts."""
+    dept = rng.choice(DEPTS)
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    employee_id = f"E{index:07d}"
+    hired = today - timedelta(days=rng.randint(0, hire_years * 365))
+    terminated = None
+    if rng.random() < ANNUAL_TERMINATION_RATE * (today - max(hired, window_start)).days / 365:
+        terminated = hired + timedelta(days=rng.randint(1, max((today - hired).days, 1)))
+        terminated = min(max(terminated, window_start), today)
+    return {
+        "row": (employee_id, first, last, f"{first.lower()}.{last.lower()}{index:07d}@example.com", dept,
+                rng.choice(DEPT_ROLES[dept]), rng.choice(LOCATIONS), _fmt(hired)),
+        "employee_id": employee_id,
+        "email": f"{first.lower()}.{last.lower()}{index:07d}@example.com",
+        "dept": dept,
+        "hired": hired,
+        "terminated": terminated,
+        "salary": round(DEPT_SALARY[dept] * rng.lognormvariate(0, 0.25), 2),
+        "absence_rate": MEAN_ABSENCE_RATE * rng.expovariate(1.0),
+    }
+
+
+def _working_days(start, end):
+    day, days = start, []
+    while day <= end:
+        if day.weekday() < 5:
+            days.append((day, _fmt(day)))
+        day += timedelta(days=1)
+    return days
+
+
+def _month_starts(start, end):
+    months, month = [], date(start.year, start.month, 1)
+    while month <= end:
+        months.append(month)
+        month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+    return months
+
+
+def _facts(rng, employees, days, months, review_dates, window_start):
+    """Attendance, payroll, review and event rows of one chunk of employees."""
+    attendance, payroll, reviews, events = [], [], [], []
+    for emp in employees:
+        first_day = max(emp["hired"], window_start)
+        last_day = emp["terminated"] or days[-1][0]
+        rate = emp["absence_rate"]
+        random_ = rng.random
+        attendance.extend(
+            (emp["employee_id"], label, int(random_() < rate))
+            for day, label in days if first_day <= day <= last_day
+        )
+
+        salary = emp["salary"]
+        for month in months:
+            if first_day.replace(day=1) <= month <= last_day:
+                # Yearly raise every January.
+                if month.month == 1:
+                    salary = round(salary * rng.uniform(1.0, 1.06), 2)
+                payroll.append((emp["employee_id"], emp["email"], salary, "USD", month.strftime('%Y-%m')))
+
+        for review_date in review_dates:
+            if first_day <= review_date <= last_day:
+                score = rng.choices(range(1, 6), SCORE_WEIGHTS)[0]
+                reviews.append((emp["employee_id"], _fmt(review_date), score))
+
+        tenure_years = (last_day - first_day).days / 365
+        if rng.random() < ANNUAL_PROMOTION_RATE * tenure_years:
+            promoted = first_day + timedelta(days=rng.randint(0, max((last_day - first_day).days, 0)))
+            events.append((emp["employee_id"], "promotion", _fmt(promoted), "Band increase"))
+        if emp["terminated"]:
+            events.append((emp["employee_id"], "termination", _fmt(emp["terminated"]),
+                           rng.choice(["Voluntary", "Voluntary", "Involuntary"])))
+    return attendance, payroll, reviews, events
+
+
+def generate(path, employees, years=2, hire_years=7, seed=7, build_rollups=True, today=None):
+    """Create ``path`` filled with ``employees`` synthetic employees; returns row counts and timings."""
+    if os.path.exists(path):
+        raise FileExistsError(f"{path} already exists")
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    today = today or date.today()
+    window_start = today - timedelta(days=365 * years)
+    days = _working_days(window_start, today)
+    months = _month_starts(window_start, today)
+    review_dates = [d for year in range(window_start.year, today.year + 1)
+                    for d in (date(year, 6, 30), date(year, 12, 31)) if window_start <= d <= today]
+
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(path)
+    counts = dict.fromkeys(["employees", "attendance", "payroll", "reviews", "events"], 0)
+    terminations = 0
+    try:
+        for name, value in LOAD_PRAGMAS.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        # Secondary indexes are cheaper to build once at the end than to maintain row by row.
+        secondary = [index.name for table in Base.metadata.sorted_tables for index in table.indexes]
+        for name in secondary:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+        for chunk_start in range(0, employees, CHUNK_EMPLOYEES):
+            chunk = [_employee(rng, i + 1, today, hire_years, window_start)
+                     for i in range(chunk_start, min(chunk_start + CHUNK_EMPLOYEES, employees))]
+            attendance, payroll, reviews, events = _facts(rng, chunk, days, months, review_dates, window_start)
+            conn.executemany("INSERT INTO employees VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (e["row"] for e in chunk))
+            conn.executemany("INSERT INTO attendance VALUES (?, ?, ?)", attendance)
+            conn.executemany("INSERT INTO payroll VALUES (?, ?, ?, ?, ?)", payroll)
+            conn.executemany("INSERT INTO reviews VALUES (?, ?, ?)", reviews)
+            conn.executemany("INSERT INTO events VALUES (?, ?, ?, ?)", events)
+            conn.commit()
+            counts["employees"] += len(chunk)
+            counts["attendance"] += len(attendance)
+            counts["payroll"] += len(payroll)
+            counts["reviews"] += len(reviews)
+            counts["events"] += len(events)
+            terminations += sum(1 for e in chunk if e["terminated"])
+
+        conn.execute(
+            "INSERT INTO kpi_overview VALUES (?, ?, ?)",
+            (employees, terminations, round(terminations / employees, 4) if employees else 0)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    load_seconds = time.perf_counter() - started
+
+    # Imported here: tune_db pulls in Analytics and with it pandas, which the load itself doesn't need.
+    from tune_db import migrate
+    engine = install_pragmas(create_engine(f"sqlite:///{path}"))
+    migration = migrate(engine)
+    engine.dispose()
+
+    if build_rollups:
+        conn = sqlite3.connect(path)
+        try:
+            rollups.rebuild(conn)
+            conn.commit()
+        finally:
+            conn.close()
+
+    return {
+        "rows": counts,
+        "load_seconds": round(load_seconds, 2),
+        "total_seconds": round(time.perf_counter() - started, 2),
+        "indexes_created": len(migration["indexes_created"]),
+        "rollups": build_rollups,
+        "size_mb": round(os.path.getsize(path) / 2 ** 20, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', required=True, help="path of the database to create")
+    parser.add_argument('--employees', type=int, default=10000)
+    parser.add_argument('--years', type=int, default=2, help="years of attendance, payroll and review history")
+    parser.add_argument('--hire-years', type=int, default=7, help="hire dates spread over this many years")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--no-rollups', action='store_true', help="leave the dashboard rollups unbuilt")
+    args = parser.parse_args()
+
+    result = generate(args.db, args.employees, years=args.years, hire_years=args.hire_years, seed=args.seed,
+                      build_rollups=not args.no_rollups)
+    rows = sum(result["rows"].values())
+    print(f"Generated {rows} rows ({result['size_mb']} MB) in {result['total_seconds']}s: {result['rows']}")
+
+
+if __name__ == "__main__":
+    main()
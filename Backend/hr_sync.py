@@ -0,0 +1,467 @@
+"""
+HRIS export sync.
+
+Streams a CSV or JSONL export (optionally gzipped) into one of the HR
+tables. Source fields are mapped to the table's columns, either given with
+--map or suggested from the field names. Every row is validated and
+normalised (dates to the stored DATETIME format, flags to 0/1, salaries to
+floats), and valid rows are upserted on the table's key with executemany,
+one bounded transaction per --chunk-size rows. Memory use stays flat
+whatever the export size.
+
+Each run adds a sync_log row (rows_in / rows_valid / rows_invalid) and one
+mappings_log row per source field. When the dashboard rollups are built,
+they are updated in the same transactions (replaced rows are taken out
+first).
+
+    python hr_sync.py --db hr.sqlite --table attendance --provider workday_csv attendance.csv
+    python hr_sync.py --table payroll --provider adp --map emp=employee_id --map gross=base_salary payroll.jsonl
+"""
+
+import argparse
+import csv
+import difflib
+import gzip
+import itertools
+import json
+import re
+import sqlite3
+import time
+from datetime import date, datetime
+
+import rollups
+from orm import CONNECTION_PRAGMAS, migrate_mappings_log
+
+CHUNK_SIZE = 200000
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+# Invalid rows reported back (all of them go to --rejects).
+MAX_ERROR_SAMPLES = 20
+# A suggested mapping is applied without --map at or above this score.
+AUTO_APPROVE_SCORE = 0.85
+# Fields of a JSONL export are collected from this many leading records.
+JSONL_HEADER_ROWS = 1000
+
+
+def _text(value):
+    value = str(value).strip()
+    return value or None
+
+
+def _datetime(value):
+    if isinstance(value, (int, float)):
+        raise ValueError("expected a date")
+    value = str(value).strip()
+    if not value:
+        return None
+    if len(value) == 10 and value[4] == '-':
+        # Plain dates are the common case; fromisoformat validates them at C speed.
+        date.fromisoformat(value)
+        return value + " 00:00:00.000000"
+    for layout in ('%m/%d/%Y', '%d.%m.%Y'):
+        try:
+            return datetime.strptime(value, layout).strftime(DATE_FORMAT)
+        except ValueError:
+            pass
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None).strftime(DATE_FORMAT)
+
+
+FLAGS = {'1': 1, '0': 0, 'true': 1, 'false': 0, 'yes': 1, 'no': 0, 'y': 1, 'n': 0,
+         'absent': 1, 'present': 0}
+
+
+def _flag(value):
+    if isinstance(value, bool):
+        return int(value)
+    value = str(value).strip().lower()
+    if not value:
+        return None
+    if value not in FLAGS:
+        raise ValueError(f"expected a yes/no value, got {value!r}")
+    return FLAGS[value]
+
+
+def _amount(value):
+    if isinstance(value, (int, float)):
+        amount = float(value)
+    else:
+        value = str(value).strip().replace(',', '').lstrip('$€£₹')
+        if not value:
+            return None
+        amount = float(value)
+    if amount < 0 or amount != amount:
+        raise ValueError("must be a non-negative number")
+    return amount
+
+
+def _score(value):
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            return None
+    score = float(value)
+    if not 1 <= score <= 5 or score != int(score):
+        raise ValueError("must be a whole number from 1 to 5")
+    return int(score)
+
+
+def _email(value):
+    value = _text(value)
+    if value is not None and '@' not in value:
+        raise ValueError("not an email address")
+    return value
+
+
+def _currency(value):
+    value = _text(value)
+    if value is not None and not re.fullmatch(r"[A-Za-z]{3}", value):
+        raise ValueError("expected a 3 letter currency code")
+    return value.upper() if value else None
+
+
+# Per table: columns with their parser, the upsert key and the other required columns.
+TABLES = {
+    "employees": {
+        "columns": {"employee_id": _text, "first_name": _text, "last_name": _text, "email": _email,
+                    "dept": _text, "role": _text, "location": _text, "hire_date": _datetime},
+        "key": ["employee_id"],
+        "required": [],
+    },
+    "attendance": {
+        "columns": {"employee_id": _text, "date": _datetime, "absent": _flag},
+        "key": ["employee_id", "date"],
+        "required": ["absent"],
+    },
+    "payroll": {
+        "columns": {"employee_id": _text, "email": _email, "base_salary": _amount, "currency": _currency,
+                    "pay_period": _text},
+        "key": ["employee_id", "pay_period"],
+        "required": ["base_salary"],
+    },
+    "reviews": {
+        "columns": {"employee_id": _text, "review_date": _datetime, "score": _score},
+        "key": ["employee_id", "review_date"],
+        "required": ["score"],
+    },
+    "events": {
+        "columns": {"employee_id": _text, "event_type": _text, "event_date": _datetime, "details": _text},
+        "key": ["employee_id", "event_type", "event_date"],
+        "required": [],
+    },
+}
+
+# Columns read back for rollups.record(), in its row order.
+ROLLUP_COLUMNS = {
+    "attendance": ["employee_id", "date", "absent"],
+    "payroll": ["employee_id", "pay_period", "base_salary"],
+    "reviews": ["employee_id", "review_date", "score"],
+}
+
+# Source field names HRIS exports commonly use for each column.
+SYNONYMS = {
+    "employee_id": ["emp_id", "empid", "employee", "employee_number", "emp_no", "worker_id", "person_id"],
+    "email": ["email_address", "work_email", "mail"],
+    "dept": ["department", "department_name", "org_unit"],
+    "role": ["job_title", "title", "position", "job"],
+    "location": ["office", "site", "work_location", "city"],
+    "hire_date": ["start_date", "date_hired", "hired_on", "date_of_joining"],
+    "first_name": ["firstname", "given_name"],
+    "last_name": ["lastname", "surname", "family_name"],
+    "date": ["attendance_date", "work_date", "day"],
+    "absent": ["is_absent", "absence", "attendance_status", "status"],
+    "base_salary": ["salary", "base_pay", "annual_salary", "gross"],
+    "currency": ["currency_code", "ccy"],
+    "pay_period": ["period", "payroll_period", "pay_frequency"],
+    "review_date": ["reviewed_on", "review_period_end", "date"],
+    "score": ["rating", "review_score", "performance_rating"],
+    "event_type": ["type", "event", "action"],
+    "event_date": ["effective_date", "date"],
+    "details": ["reason", "description", "notes"],
+}
+
+
+def _normalize(name):
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def _match_score(field, column):
+    field = _normalize(field)
+    if field == column:
+        return 1.0
+    if field in SYNONYMS.get(column, []):
+        return 0.9
+    return round(difflib.SequenceMatcher(None, field, column).ratio() * 0.8, 3)
+
+
+def suggest_mapping(fields, table, explicit=None):
+    """{source field: (approved column or None, suggested columns best first)}.
+
+    Fields in ``explicit`` map where they say; the others take their best
+    match if it scores at least AUTO_APPROVE_SCORE and no other field claimed
+    that column.
+    """
+    columns = list(TABLES[table]["columns"])
+    explicit = explicit or {}
+    unknown = set(explicit.values()) - set(columns)
+    if unknown:
+        raise ValueError(f"{table} has no column {', '.join(sorted(unknown))}")
+    if len(set(explicit.values())) < len(explicit):
+        raise ValueError("several fields map to the same column")
+    suggestions = {
+        field: sorted(columns, key=lambda column: -_match_score(field, column)) for field in fields
+    }
+    mapping = {field: (explicit.get(field), suggestions[field][:3]) for field in fields}
+    taken = set(explicit.values())
+    candidates = sorted(
+        ((_match_score(field, suggestions[field][0]), field) for field in fields if field not in explicit),
+        reverse=True
+    )
+    for score, field in candidates:
+        column = suggestions[field][0]
+        if score >= AUTO_APPROVE_SCORE and column not in taken:
+            mapping[field] = (column, suggestions[field][:3])
+            taken.add(column)
+    return mapping
+
+
+def _open(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, encoding='utf-8', newline='')
+
+
+def read_rows(path, fmt=None):
+    """(fields, rows) of a CSV or JSONL export, read lazily.
+
+    CSV rows are lists in ``fields`` order, JSONL rows are dicts.
+    """
+    fmt = fmt or ('jsonl' if '.jsonl' in path or '.ndjson' in path else 'csv')
+    f = _open(path)
+    if fmt == 'csv':
+        reader = csv.reader(f)
+        fields = next(reader, [])
+        return fields, _closing(f, reader)
+
+    rows = (json.loads(line) for line in f if line.strip())
+    # JSONL has no header; the keys of the first records stand in for it.
+    head = list(itertools.islice(rows, JSONL_HEADER_ROWS))
+    fields = list(dict.fromkeys(field for row in head for field in row))
+    return fields, _closing(f, itertools.chain(head, rows))
+
+
+def _closing(f, rows):
+    with f:
+        yield from rows
+
+
+def _validator(table, mapping, fields, columns):
+    """validate(raw) -> (values in ``columns`` order, errors) for rows from read_rows."""
+    spec = TABLES[table]
+    source = {column: field for field, (column, _) in mapping.items() if column}
+    parsers = [(source[column], spec["columns"][column]) for column in columns]
+    required = [(position, column) for position, column in enumerate(columns)
+                if column in spec["key"] or column in spec["required"]]
+    positions = {field: position for position, field in enumerate(fields)}
+
+    def validate(raw):
+        if isinstance(raw, dict):
+            items = [raw.get(field) for field, _ in parsers]
+        else:
+            items = [raw[positions[field]] if positions[field] < len(raw) else None for field, _ in parsers]
+        values, errors = [], None
+        for value, (field, parse) in zip(items, parsers):
+            if value is not None:
+                try:
+                    value = parse(value)
+                except (TypeError, ValueError) as e:
+                    errors = (errors or []) + [f"{field}: {e}"]
+                    value = False  # not None: a bad required value is reported once
+            values.append(value)
+        for position, column in required:
+            if values[position] is None:
+                errors = (errors or []) + [f"{column} is required"]
+        return tuple(values), errors
+
+    return validate
+
+
+def _ensure_unique_key(conn, table):
+    """ON CONFLICT needs a unique index on the key; tables created outside orm.py may not have one."""
+    key = TABLES[table]["key"]
+    for _, name, unique, *_ in conn.execute(f"PRAGMA index_list('{table}')").fetchall():
+        if unique and [row[2] for row in conn.execute(f"PRAGMA index_info('{name}')").fetchall()] == key:
+            return
+    try:
+        conn.execute(f"CREATE UNIQUE INDEX ux_{table}_key ON {table} ({', '.join(key)})")
+    except sqlite3.IntegrityError:
+        raise ValueError(f"{table} has duplicate ({', '.join(key)}) rows; remove them before syncing")
+
+
+def _select_by_keys(conn, table, key, columns):
+    return conn.execute(
+        f"SELECT {', '.join('t.' + c for c in columns)} FROM {table} t JOIN temp._sync_keys k "
+        f"ON {' AND '.join(f't.{c} = k.{c}' for c in key)}"
+    ).fetchall()
+
+
+def sync(conn, path, table, provider, mapping=None, chunk_size=CHUNK_SIZE, fmt=None, rejects=None):
+    """Upsert the rows of the export at ``path`` into ``table``; returns the counts and mapping used.
+
+    ``mapping`` is {source field: column} for fields that aren't matched
+    by name. ``rejects`` is an open text file that gets every invalid row
+    as JSON.
+    """
+    if table not in TABLES:
+        raise ValueError(f"table must be one of {', '.join(TABLES)}")
+    spec = TABLES[table]
+    started = time.perf_counter()
+    ts_utc = datetime.utcnow().isoformat()
+    fields, rows = read_rows(path, fmt)
+    field_mapping = suggest_mapping(fields, table, mapping)
+    mapped = [column for column, _ in field_mapping.values() if column]
+    missing = [column for column in spec["key"] + spec["required"] if column not in mapped]
+    if missing:
+        rows.close()
+        raise ValueError(f"no source field maps to {', '.join(missing)}; pass --map FIELD={missing[0]}")
+
+    columns = list(dict.fromkeys(mapped))
+    key = spec["key"]
+    # An empty or missing field leaves the stored value alone; exports leave out what they don't know.
+    updates = [f"{c} = COALESCE(excluded.{c}, {c})" for c in columns if c not in key]
+    upsert = (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+        f"ON CONFLICT ({', '.join(key)}) DO " + (f"UPDATE SET {', '.join(updates)}" if updates else "NOTHING")
+    )
+    key_positions = [columns.index(c) for c in key]
+    validate = _validator(table, field_mapping, fields, columns)
+
+    _ensure_unique_key(conn, table)
+    migrate_mappings_log(conn)
+    built = rollups.is_built(conn)
+    track_rollups = built and table in ROLLUP_COLUMNS
+    # Rollups group facts by the employee's department and role; moving employees invalidates them.
+    watch_departments = built and table == "employees"
+    rebuild_rollups = False
+    # Rollup columns are all key or required columns, so every valid row has their new values.
+    rollup_positions = [columns.index(c) for c in ROLLUP_COLUMNS.get(table, [])]
+    if track_rollups or watch_departments:
+        conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS _sync_keys ({', '.join(key)})")
+    conn.commit()
+
+    counts = {"rows_in": 0, "rows_valid": 0, "rows_invalid": 0}
+    errors = []
+    try:
+        while True:
+            # Last row wins for a key repeated within the chunk, as it would in sequential upserts.
+            batch = {}
+            rows_before = counts["rows_in"]
+            for raw in itertools.islice(rows, chunk_size):
+                counts["rows_in"] += 1
+                values, row_errors = validate(raw)
+                if row_errors:
+                    counts["rows_invalid"] += 1
+                    if len(errors) < MAX_ERROR_SAMPLES:
+                        errors.append({"row": counts["rows_in"], "errors": row_errors})
+                    if rejects is not None:
+                        data = raw if isinstance(raw, dict) else dict(zip(fields, raw))
+                        rejects.write(json.dumps({"row": counts["rows_in"], "errors": row_errors, "data": data}) + "\n")
+                    continue
+                counts["rows_valid"] += 1
+                batch[tuple(values[i] for i in key_positions)] = values
+            if counts["rows_in"] == rows_before:
+                break
+
+            # Writing in key order touches each index page once instead of once per row.
+            keys = sorted(batch)
+            if track_rollups or watch_departments:
+                conn.execute("DELETE FROM temp._sync_keys")
+                conn.executemany(f"INSERT INTO temp._sync_keys VALUES ({', '.join('?' * len(key))})", keys)
+            if track_rollups:
+                removed = _select_by_keys(conn, table, key, ROLLUP_COLUMNS[table])
+            elif watch_departments and not rebuild_rollups:
+                before = _select_by_keys(conn, table, key, ["employee_id", "dept", "role"])
+            conn.executemany(upsert, (batch[k] for k in keys))
+            if track_rollups:
+                added = [tuple(batch[k][i] for i in rollup_positions) for k in keys]
+                rollups.record(conn, table, added=added, removed=removed)
+            elif watch_departments and not rebuild_rollups:
+                after = set(_select_by_keys(conn, table, key, ["employee_id", "dept", "role"]))
+                rebuild_rollups = not after.issuperset(before)
+            conn.commit()
+
+        if rebuild_rollups:
+            rollups.rebuild(conn)
+        conn.execute(
+            "INSERT INTO sync_log (ts_utc, provider, rows_in, rows_valid, rows_invalid) VALUES (?, ?, ?, ?, ?)",
+            (ts_utc, provider, counts["rows_in"], counts["rows_valid"], counts["rows_invalid"])
+        )
+        conn.executemany(
+            "INSERT INTO mappings_log (ts_utc, provider, source_field, approved, suggested) VALUES (?, ?, ?, ?, ?)",
+            [(ts_utc, provider, field, column, json.dumps(suggested))
+             for field, (column, suggested) in field_mapping.items()]
+        )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        rows.close()
+
+    seconds = time.perf_counter() - started
+    return {
+        "ts_utc": ts_utc,
+        "table": table,
+        **counts,
+        "mapping": {field: column for field, (column, _) in field_mapping.items()},
+        "errors": errors,
+        "rollups_rebuilt": rebuild_rollups,
+        "seconds": round(seconds, 2),
+        "rows_per_second": round(counts["rows_in"] / seconds) if seconds else None,
+    }
+
+
+def connect(path):
+    conn = sqlite3.connect(path)
+    for name, value in CONNECTION_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name}={value}")
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('file', help="CSV or JSONL export (.gz is read compressed)")
+    parser.add_argument('--db', default='hr.sqlite')
+    parser.add_argument('--table', required=True, choices=list(TABLES))
+    parser.add_argument('--provider', required=True, help="source system, recorded in sync_log")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help="default: from the file name")
+    parser.add_argument('--map', action='append', default=[], metavar='FIELD=COLUMN')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="rows per transaction")
+    parser.add_argument('--rejects', help="write invalid rows here as JSONL")
+    args = parser.parse_args()
+
+    try:
+        mapping = dict(item.split('=', 1) for item in args.map)
+    except ValueError:
+        parser.error("--map takes FIELD=COLUMN")
+
+    conn = connect(args.db)
+    rejects = open(args.rejects, 'w') if args.rejects else None
+    try:
+        result = sync(conn, args.file, args.table, args.provider, mapping=mapping, chunk_size=args.chunk_size,
+                      fmt=args.format, rejects=rejects)
+    except ValueError as e:
+        raise SystemExit(f"Sync failed: {e}")
+    finally:
+        if rejects:
+            rejects.close()
+        conn.close()
+
+    print(f"Synced {result['rows_valid']} of {result['rows_in']} rows into {args.table} "
+          f"({result['rows_invalid']} invalid) in {result['seconds']}s, {result['rows_per_second']} rows/s")
+    for field, column in result["mapping"].items():
+        print(f"  {field} -> {column or '(ignored)'}")
+    for error in result["errors"]:
+        print(f"  row {error['row']}: {'; '.join(error['errors'])}")
+
+
+if __name__ == "__main__":
+    main()
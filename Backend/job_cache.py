@@ -0,0 +1,89 @@
+"""
+Job Cache
+In-process read-through cache of job postings with a content-derived version for conditional GETs
+"""
+
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime
+
+# Postings can also change through another portal process; a cached listing is re-read after this long.
+DEFAULT_TTL_SECONDS = 60
+
+
+class JobCache:
+    """All job postings held in memory, reloaded after ``invalidate()`` or once the TTL expires.
+
+    Cached documents are shared between requests and must not be mutated.
+    ``etag`` is a hash of the listing's content, so it is the same in every
+    process, and ``last_modified`` is when this process first saw that
+    content.
+    """
+
+    def __init__(self, collection, ttl_seconds=DEFAULT_TTL_SECONDS, projection=None):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self.projection = projection
+        # (jobs, jobs_by_id, etag, last_modified, loaded_at), replaced as a whole on every load.
+        self._state = None
+        self._last_etag = None
+        self._last_modified = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.hits = 0
+
+    def _fresh(self, state):
+        return state is not None and time.monotonic() - state[4] < self.ttl_seconds
+
+    def _load(self):
+        generation = self._generation
+        jobs = list(self.collection.find({}, self.projection))
+        for job in jobs:
+            job["_id"] = str(job["_id"])
+        etag = hashlib.sha1(json.dumps(jobs, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        if etag != self._last_etag:
+            self._last_etag = etag
+            self._last_modified = datetime.utcnow().replace(microsecond=0)
+        state = (jobs, {job.get("job_id"): job for job in jobs}, etag, self._last_modified, time.monotonic())
+        self.loads += 1
+        # A write that invalidated the cache while this load was reading may not be in it; don't keep it.
+        if generation == self._generation:
+            self._state = state
+        return state
+
+    def _snapshot(self):
+        state = self._state
+        if self._fresh(state):
+            self.hits += 1
+            return state
+        with self._lock:
+            state = self._state
+            if self._fresh(state):
+                self.hits += 1
+                return state
+            return self._load()
+
+    def all(self):
+        """``(jobs, etag, last_modified)`` for the whole listing."""
+        jobs, _, etag, last_modified, _ = self._snapshot()
+        return jobs, etag, last_modified
+
+    def get(self, job_id):
+        """One posting, or None. A posting missing from the cache is looked up once more in Mongo."""
+        job = self._snapshot()[1].get(job_id)
+        if job is None and self.collection.find_one({"job_id": job_id}, {"_id": 1}):
+            # Created by another process since the last load.
+            self.invalidate()
+            job = self._snapshot()[1].get(job_id)
+        return job
+
+    def invalidate(self):
+        self._generation += 1
+        self._state = None
+
+    def stats(self):
+        state = self._state
+        return {"loads": self.loads, "hits": self.hits, "jobs": len(state[0]) if state else 0}
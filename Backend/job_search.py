@@ -0,0 +1,221 @@
+"""
+Job Search
+In-process inverted index over job titles and descriptions: BM25 ranking, prefix matching
+and date-posted facets for the career page
+"""
+
+import bisect
+import heapq
+import math
+import re
+import threading
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+# A title match counts for this many description matches.
+FIELD_WEIGHTS = {"job_title": 3.0, "job_description": 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# A prefix stands for at most this many indexed terms (the most common ones), each scored a little lower
+# than an exact match.
+MAX_PREFIX_EXPANSIONS = 50
+PREFIX_DISCOUNT = 0.8
+# Shorter terms only match exactly; a one letter prefix would match most of the index.
+MIN_PREFIX_LENGTH = 2
+
+# date_posted facet buckets, by age in days; a posting falls in every bucket it is young enough for.
+POSTED_WITHIN_DAYS = {"day": 1, "week": 7, "month": 30}
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def _posted_date(job):
+    value = job.get("date_posted")
+    if isinstance(value, datetime):
+        return value.date()
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+class JobSearchIndex:
+    """Postings of every term in the indexed jobs, updated one job at a time.
+
+    ``add`` replaces a job that is already indexed, ``remove`` drops one and
+    ``sync`` brings the index in line with a full listing, re-tokenizing only
+    the postings that changed.
+    """
+
+    def __init__(self):
+        self._postings = defaultdict(dict)  # term -> {job_id: weighted term frequency}
+        self._terms = []  # sorted vocabulary, for prefix lookups
+        self._jobs = {}
+        self._versions = {}
+        self._lengths = {}
+        self._posted = {}
+        self._total_length = 0.0
+        # BM25 length normalisation per job; depends on the average length, so recomputed after changes.
+        self._norms = None
+        self._lock = threading.RLock()
+        self.synced_etag = None
+
+    def __len__(self):
+        return len(self._jobs)
+
+    @staticmethod
+    def _version(job):
+        return tuple(job.get(field) for field in (*FIELD_WEIGHTS, "date_posted"))
+
+    def add(self, job):
+        job_id = job["job_id"]
+        frequencies = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(job.get(field)):
+                frequencies[term] += weight
+        with self._lock:
+            self._remove(job_id)
+            for term, frequency in frequencies.items():
+                postings = self._postings[term]
+                if not postings:
+                    bisect.insort(self._terms, term)
+                postings[job_id] = frequency
+            length = sum(frequencies.values())
+            self._jobs[job_id] = job
+            self._versions[job_id] = self._version(job)
+            self._lengths[job_id] = length
+            self._posted[job_id] = _posted_date(job)
+            self._total_length += length
+            self._norms = None
+
+    def remove(self, job_id):
+        with self._lock:
+            self._remove(job_id)
+
+    def _remove(self, job_id):
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return
+        for term in set(tokenize(job.get("job_title")) + tokenize(job.get("job_description"))):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(job_id, None)
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect.bisect_left(self._terms, term)]
+        self._versions.pop(job_id, None)
+        self._posted.pop(job_id, None)
+        self._total_length -= self._lengths.pop(job_id, 0.0)
+        self._norms = None
+
+    def sync(self, jobs, etag=None):
+        """Make the index hold exactly ``jobs``; returns the number of jobs added, changed or removed."""
+        with self._lock:
+            current = {job["job_id"]: job for job in jobs if job.get("job_id")}
+            changed = [job for job_id, job in current.items() if self._versions.get(job_id) != self._version(job)]
+            stale = [job_id for job_id in self._jobs if job_id not in current]
+            for job_id in stale:
+                self._remove(job_id)
+            for job in changed:
+                self.add(job)
+            # Unchanged postings keep their old document; pick up any other field that changed.
+            self._jobs.update(current)
+            self.synced_etag = etag
+            return len(changed) + len(stale)
+
+    def _expand(self, term, prefix):
+        if not prefix or len(term) < MIN_PREFIX_LENGTH:
+            return [(term, 1.0)] if term in self._postings else []
+        start = bisect.bisect_left(self._terms, term)
+        end = bisect.bisect_left(self._terms, term + "\uffff")
+        candidates = self._terms[start:end]
+        if len(candidates) > MAX_PREFIX_EXPANSIONS:
+            candidates = heapq.nlargest(MAX_PREFIX_EXPANSIONS, candidates, key=lambda t: len(self._postings[t]))
+        return [(t, 1.0 if t == term else PREFIX_DISCOUNT) for t in candidates]
+
+    def _score(self, query):
+        """{job_id: BM25 score} for every job matching all query terms.
+
+        The last term (or any term ending in ``*``) also matches as a prefix,
+        so results follow the user while they type.
+        """
+        terms = query.lower().split()
+        parsed = []
+        for index, raw in enumerate(terms):
+            prefix = raw.endswith("*") or index == len(terms) - 1
+            tokens = tokenize(raw)
+            parsed.extend((token, prefix and position == len(tokens) - 1) for position, token in enumerate(tokens))
+
+        count = len(self._jobs)
+        if self._norms is None:
+            average_length = self._total_length / count if count else 1.0
+            self._norms = {
+                job_id: BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                for job_id, length in self._lengths.items()
+            }
+        norms = self._norms
+        scores = None
+        for term, prefix in parsed:
+            term_scores = {}
+            for expanded, factor in self._expand(term, prefix):
+                postings = self._postings[expanded]
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                weight = factor * idf * (BM25_K1 + 1)
+                for job_id, frequency in postings.items():
+                    value = weight * frequency / (frequency + norms[job_id])
+                    # Several expansions of one prefix in a job count once, at the best of them.
+                    if value > term_scores.get(job_id, 0.0):
+                        term_scores[job_id] = value
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {job_id: score + term_scores[job_id] for job_id, score in scores.items() if job_id in term_scores}
+            if not scores:
+                return {}
+        return scores or {}
+
+    def search(self, query="", posted_within=None, limit=20, offset=0, today=None):
+        """One page of matching jobs with the date_posted facet counts of all matches.
+
+        Without a query every job matches, newest first. ``posted_within`` is
+        one of the POSTED_WITHIN_DAYS keys.
+        """
+        if posted_within is not None and posted_within not in POSTED_WITHIN_DAYS:
+            raise ValueError(f"posted_within must be one of {', '.join(POSTED_WITHIN_DAYS)}")
+        today = today or date.today()
+        # A posting is in a bucket when it is younger than the bucket's number of days.
+        cutoffs = [(bucket, today - timedelta(days=days)) for bucket, days in POSTED_WITHIN_DAYS.items()]
+        oldest_cutoff = min(cutoff for _, cutoff in cutoffs)
+        within = dict(cutoffs).get(posted_within)
+        with self._lock:
+            if query.strip():
+                scores = self._score(query)
+            else:
+                scores = dict.fromkeys(self._jobs, 0.0)
+
+            facets = dict.fromkeys(POSTED_WITHIN_DAYS, 0)
+            facets["older"] = 0
+            matches = []
+            for job_id, score in scores.items():
+                posted = self._posted[job_id] or date.min
+                if posted <= oldest_cutoff:
+                    facets["older"] += 1
+                else:
+                    for bucket, cutoff in cutoffs:
+                        if posted > cutoff:
+                            facets[bucket] += 1
+                if within and posted <= within:
+                    continue
+                matches.append((score, posted, job_id))
+
+            # Best score first; newer postings win ties (and order a browse without a query).
+            page = heapq.nlargest(offset + limit, matches)[offset:]
+            results = [{**self._jobs[job_id], "score": round(score, 4)} for score, _, job_id in page]
+        return {"total": len(matches), "jobs": results, "facets": {"date_posted": facets}}
+
@@ -1,24 +1,18 @@
 import os
 import requests
 import uuid
+import time
 import random
-import smtplib
 import threading
-from datetime import datetime
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from pymongo import MongoClient
+import hashlib
+from datetime import datetime, timedelta
+from pymongo import MongoClient, UpdateOne
 from flask_cors import CORS
-from googleapiclient.discovery import build
-from flask import Flask, request, jsonify, url_for, redirect, session
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.http import MediaFileUpload 
+from flask import Flask, request, jsonify, url_for, redirect, session, Response
 from werkzeug.security import generate_password_hash, check_password_hash
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from orm import Admin, Session as DBSession
-from Analytics import get_analytics_summary
+from Analytics import ensure_hr_rollups, get_analytics_summary, get_data_version
 from authlib.integrations.flask_client import OAuth
 import pyotp
 import pyqrcode
@@ -27,6 +21,19 @@ from io import BytesIO
 from dotenv import load_dotenv
 import chromadb
 import json
+import queue
+import pdfplumber
+import candidate_index
+import resume_fingerprint
+from blob_store import BlobStore
+from drive_client import DriveClientManager, file_link as drive_file_link
+from email_outbox import EmailOutbox, SMTPPool
+import pagination
+from job_cache import JobCache
+from job_search import JobSearchIndex
+from analytics_snapshot import MaterializedSnapshot
+from status_events import StatusEventBus, TERMINAL_STATUSES, follow_change_stream, status_event
+from application_records import new_application, status_update
 
 load_dotenv()
 
@@ -38,26 +45,85 @@ app.config.update(
 CORS(app, supports_credentials=True, origins=["http://localhost:5173"])
 
 executor = ThreadPoolExecutor(max_workers=5)
+# Stages of a single application (Drive upload, extraction, scoring) run here rather than on
+# `executor`, so a task waiting on its own stages can never starve them of threads.
+stage_executor = ThreadPoolExecutor(max_workers=10)
 
 CONNECTION_STRING = ""
 client = MongoClient(CONNECTION_STRING)
 db = client["recruitment_db"]
 admin = db["admin"]
 job_posting = db["job_posting"]
-application_status = db["application_status"]
+job_cache = JobCache(job_posting, projection={"jd_embedding": 0})
+# Search index over the cached postings: updated directly by this process's writes and caught up
+# with the cache (changes from other processes) whenever the listing's etag moves.
+job_search = JobSearchIndex()
 applications = db["applications"]
+resume_fingerprints = db["resume_fingerprints"]
+pipeline_metrics = db["pipeline_metrics"]
+email_outbox = db["email_outbox"]
+assessment_cache = db["assessment_cache"]
 
-DRIVE_SCOPES = ['https://www.googleapis.com/auth/drive']
+DRIVE_FOLDER_ID = "1T0jvXp-AhR6NtXkmgsw5H8KR52duP-KS"
 
 script_dir = os.path.abspath(os.path.dirname(__file__))
-drive_credentials_path = os.path.join(script_dir, 'Applications/google_drive/credentials.json')
-drive_token_path = os.path.join(script_dir, 'Applications/google_drive/token.json')
+drive_manager = DriveClientManager(
+    credentials_path=os.path.join(script_dir, 'Applications/google_drive/credentials.json'),
+    token_path=os.path.join(script_dir, 'Applications/google_drive/token.json')
+)
+
+# Status transitions are pushed to listeners from this bus. With a replica set, a change stream on
+# applications feeds it (so writes from any process are seen); otherwise writers publish directly.
+STATUS_EVENTS_CHANGE_STREAM = os.environ.get('STATUS_EVENTS_CHANGE_STREAM', '1') == '1'
+STATUS_STREAM_MAX_SECONDS = 600
+STATUS_BULK_MAX_IDS = 500
+# Batch import results are written to Mongo in bulk_write groups of this many.
+BATCH_WRITE_SIZE = 50
+status_bus = StatusEventBus()
+status_change_stream_active = threading.Event()
+
+# Assessments generated at once when inviting a job's shortlist (each is one crew run on the scoring service).
+ASSESSMENT_MAX_PARALLEL = int(os.environ.get('ASSESSMENT_MAX_PARALLEL', 8))
+assessment_executor = ThreadPoolExecutor(max_workers=ASSESSMENT_MAX_PARALLEL)
+
+# Resume text beyond this is not embedded for candidate matching (the embedding model's context is limited).
+RESUME_EMBEDDING_CHARS = 8000
+
+# Resumes whose MinHash similarity to an earlier one reaches this are treated as duplicates.
+RESUME_DUPLICATE_THRESHOLD = float(os.environ.get('RESUME_DUPLICATE_THRESHOLD', 0.9))
+# How often a resume is offered to the scoring service while it answers 429 (queue full).
+# Between attempts the application goes back to "pending" and is resubmitted on a timer.
+SCORING_MAX_ATTEMPTS = 5
+# LLM calls made by one run of the scoring crew (one per task), i.e. what a reused score saves.
+SCORING_LLM_CALLS = 4
+
+fingerprint_index = None
+fingerprint_index_lock = threading.Lock()
+
+# Shared resume spool: blobs unused for BLOB_RETENTION_DAYS are removed, and the oldest
+# ones beyond BLOB_SPOOL_MAX_BYTES, checked every BLOB_CLEANUP_INTERVAL seconds.
+BLOB_RETENTION_DAYS = float(os.environ.get('BLOB_RETENTION_DAYS', 30))
+BLOB_SPOOL_MAX_BYTES = int(os.environ.get('BLOB_SPOOL_MAX_BYTES', 5 * 1024 ** 3))
+BLOB_CLEANUP_INTERVAL = 3600
+blob_store = BlobStore()
 
 SMTP_SERVER = 'smtp.gmail.com'
 SMTP_PORT = 587
 SENDER_EMAIL = ''
 SENDER_PASSWORD = ''
 
+# Outgoing mail is queued in `email_outbox` and sent in the background; Gmail throttles
+# bursts, so sends are capped per minute and transient failures retried with backoff.
+SMTP_POOL_SIZE = int(os.environ.get('SMTP_POOL_SIZE', 2))
+SMTP_MAX_PER_MINUTE = int(os.environ.get('SMTP_MAX_PER_MINUTE', 20))
+outbox = EmailOutbox(
+    email_outbox,
+    SMTPPool(SMTP_SERVER, SMTP_PORT, SENDER_EMAIL, SENDER_PASSWORD, size=SMTP_POOL_SIZE),
+    sender=SENDER_EMAIL,
+    workers=SMTP_POOL_SIZE,
+    per_minute=SMTP_MAX_PER_MINUTE
+)
+
 # --- Google SSO Configuration ---
 GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID', '')
 GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET', '')
@@ -224,35 +290,22 @@ def chatbot():
             "error": f"An error occurred: {str(e)}"
         }), 500
     
-def send_emails_to_candidates(candidate_reference, assessment_questions):
-    
+def send_emails_to_candidates(candidate_reference, job_id=None):
+    """Queue an assessment invite per candidate with their own questions; the outbox workers do the sending."""
     if not candidate_reference:
         print("No candidates provided to send emails.")
-        return
+        return []
 
-    try:
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls() # Secure the connection
-        server.login(SENDER_EMAIL, SENDER_PASSWORD)
-        print(f"Successfully logged in to {SMTP_SERVER}.")
+    messages = []
+    for name, data in candidate_reference.items():
+        candidate_email = data.get('email')
 
-        successful_sends = 0
-        failed_sends = 0
-        
-        for name, data in candidate_reference.items():
-            candidate_email = data.get('email')
-            
-            if not candidate_email:
-                print(f"Skipping {name}: Email address is missing.")
-                failed_sends += 1
-                continue
+        if not candidate_email:
+            print(f"Skipping {name}: Email address is missing.")
+            continue
 
-            msg = MIMEMultipart()
-            msg['From'] = SENDER_EMAIL
-            msg['To'] = candidate_email
-            msg['Subject'] = 'Your Online Assessment'
-            
-            body = f"""
+        assessment_questions = data.get('assessment_questions')
+        body = f"""
             Dear {name},
 
             Thank you for your interest in this opportunity. We were impressed with your resume and would like to invite you to complete a brief online assessment.
@@ -267,117 +320,269 @@ def send_emails_to_candidates(candidate_reference, assessment_questions):
 
             The Recruitment Team
             """
-            msg.attach(MIMEText(body, 'plain'))
+        messages.append({
+            "to": candidate_email,
+            "subject": 'Your Online Assessment',
+            "body": body,
+            "kind": "assessment_invite",
+            "job_id": job_id,
+            "application_id": data.get('application_id'),
+            "candidate_name": name
+        })
 
-            try:
-                # 3. Send the email
-                server.sendmail(SENDER_EMAIL, candidate_email, msg.as_string())
-                print(f"Successfully sent email to {name} at {candidate_email}")
-                successful_sends += 1
-            except Exception as e:
-                print(f"Failed to send email to {name} ({candidate_email}): {e}")
-                failed_sends += 1
+    return outbox.enqueue_many(messages)
 
-        # 4. Close the server connection
-        server.quit()
-        
+def upload_resume_to_drive(filepath, original_filename, folder_id):
+    uploaded_file = drive_manager.upload_file(filepath, original_filename, folder_id)
+    return drive_file_link(uploaded_file.get('id'))
+
+
+def refresh_job_profile(job_id, job_title, job_description):
+    """Extract the structured requirement profile and JD embedding for a posting and store them on it."""
+    try:
+        response = requests.post(
+            'http://127.0.0.1:5001/jd-profile',
+            json={'job_title': job_title, 'job_description': job_description}
+        )
+        response.raise_for_status()
+        profile = response.json()
+
+        jd_embedding = create_query_embedding(f"{job_title}\n{job_description}")
+
+        job_posting.update_one(
+            {"job_id": job_id, "job_description": job_description},
+            {
+                "$set": {
+                    "profile": profile,
+                    "jd_embedding": jd_embedding,
+                    "profile_updated_at": datetime.utcnow()
+                }
+            }
+        )
+        job_cache.invalidate()
+        print(f"Stored job profile for {job_id}")
     except Exception as e:
-        print(f"An error occurred during SMTP connection or login: {e}")
+        print(f"Failed to build job profile for {job_id}: {e}")
 
-def get_drive_service():
-    drive_creds = None
-    if os.path.exists(drive_token_path):
-        drive_creds = Credentials.from_authorized_user_file(drive_token_path, DRIVE_SCOPES)
 
-    if not drive_creds or not drive_creds.valid:
-        if drive_creds and drive_creds.expired and drive_creds.refresh_token:
-            drive_creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(drive_credentials_path, DRIVE_SCOPES)
-            drive_creds = flow.run_local_server(port=0)
-            
-        with open(drive_token_path, 'w') as token:
-            token.write(drive_creds.to_json())
+def extract_text_from_pdf(pdf_path):
+    with pdfplumber.open(pdf_path) as pdf:
+        return "".join(page.extract_text() or "" for page in pdf.pages)
+
+
+def index_scored_resume(application_id, resume_text, job_id, score, review, submitted_at):
+    """Add a scored resume to the local candidate index. Failures are logged, never raised."""
+    try:
+        document = f"{review}\n\n{resume_text}"
+        embedding = create_query_embedding(document[:RESUME_EMBEDDING_CHARS])
+        candidate_index.index_application(application_id, embedding, document, job_id, score, submitted_at)
+    except Exception as e:
+        print(f"Failed to index application {application_id}: {e}")
+
+
+def get_fingerprint_index():
+    """The process-wide duplicate index, loaded from Mongo on first use."""
+    global fingerprint_index
+    with fingerprint_index_lock:
+        if fingerprint_index is None:
+            index = resume_fingerprint.FingerprintIndex(threshold=RESUME_DUPLICATE_THRESHOLD)
+            for doc in resume_fingerprints.find({}, {"_id": 0}):
+                index.add(
+                    doc["application_id"],
+                    {"sha256": doc["sha256"], "minhash": doc["minhash"]},
+                    {key: doc.get(key) for key in ("job_id", "email", "score", "review")}
+                )
+            fingerprint_index = index
+        return fingerprint_index
+
+
+def find_duplicate(fp, job_id, email):
+    """Look up an earlier submission of the same (or nearly the same) resume.
+
+    Returns ``(duplicate_info, original)`` or ``(None, None)``. Matches for the
+    same job are preferred because only their score can be reused.
+    """
+    if fp is None:
+        return None, None
+    matches = get_fingerprint_index().find(fp)
+    if not matches:
+        return None, None
+
+    best = next((m for m in matches if m["metadata"].get("job_id") == job_id), matches[0])
+    original = best["metadata"]
+    duplicate_info = {
+        "duplicate_of": best["key"],
+        "similarity": best["similarity"],
+        "match": "exact" if best["exact"] else "near",
+        "same_candidate": bool(email) and (original.get("email") or "").lower() == email.lower(),
+        "same_job": original.get("job_id") == job_id,
+        "score_reused": False
+    }
+    return duplicate_info, original
+
+
+def remember_fingerprint(application_id, fp, job_id, email, score, review):
+    if fp is None:
+        return
+    metadata = {"job_id": job_id, "email": email, "score": score, "review": review}
+    resume_fingerprints.insert_one({
+        "application_id": application_id,
+        "sha256": fp["sha256"],
+        "minhash": fp["minhash"],
+        "created_at": datetime.utcnow(),
+        **metadata
+    })
+    get_fingerprint_index().add(application_id, fp, metadata)
+
+
+def record_dedup_outcome(duplicate_info):
+    counters = {"checked": 1}
+    if duplicate_info:
+        counters[f"{duplicate_info['match']}_duplicates"] = 1
+        if duplicate_info["score_reused"]:
+            counters["scores_reused"] = 1
+            counters["llm_calls_avoided"] = SCORING_LLM_CALLS
+    pipeline_metrics.update_one({"_id": "dedup"}, {"$inc": counters}, upsert=True)
+
+
+def set_status_stream_active(active):
+    if active:
+        status_change_stream_active.set()
+    else:
+        status_change_stream_active.clear()
 
-    drive_service = build('drive', 'v3', credentials=drive_creds)
-    return drive_service
 
+def publish_status(application_id, status, fields=None):
+    # With the change stream running, it publishes the write itself.
+    if not status_change_stream_active.is_set():
+        status_bus.publish(status_event(application_id, status, fields))
 
-def process_resume_task(application_id, filepath, original_filename, job_description, 
-                       user_name, user_emailid, job_id, folder_id):
+
+def set_application_status(application_id, status, **fields):
+    """Record a status transition (with any fields that change along with it) and notify push listeners."""
+    applications.update_one({"application_id": application_id}, status_update(status, fields))
+    publish_status(application_id, status, fields)
+
+
+def timed_stage(timings, stage, fn, *args):
+    started = time.perf_counter()
     try:
-        
-        application_status.update_one(
-            {"application_id": application_id},
-            {"$set": {"status": "processing", "updated_at": datetime.utcnow()}}
-        )
+        return fn(*args)
+    finally:
+        timings[stage] = round(time.perf_counter() - started, 3)
 
-        user_score = 0
-        user_review = ""
-        
-        with open(filepath, 'rb') as f:
-            files = {'file': (original_filename, f, 'application/pdf')}
-            payload = {'job_description': job_description}
-            response = requests.post('http://127.0.0.1:5001/process-resume', files=files, data=payload)
-            response.raise_for_status()
-
-            api_response = response.json()
-            user_score = api_response.get('final_score', 0)
-            user_review = api_response.get('profile_summary', '')
-            
-        drive_service = get_drive_service()
-
-        file_metadata = {
-            'name': original_filename,
-            'parents': [folder_id]
-        }
 
-        media = MediaFileUpload(filepath, resumable=True)
-        uploaded_file = drive_service.files().create(
-            body=file_metadata,
-            media_body=media,
-            fields='id, name, size'
-        ).execute()
+class ScoringBusy(Exception):
+    """The scoring service answered 429; ``retry_after`` is the wait it asked for, in seconds."""
 
-        uploaded_file_id = uploaded_file.get('id')
-        file_link = f"https://drive.google.com/file/d/{uploaded_file_id}/view"
+    def __init__(self, retry_after):
+        super().__init__(f"Scoring service busy, retry after {retry_after}s")
+        self.retry_after = retry_after
 
-        application_data = {
-            "application_id": application_id,
-            "job_id": job_id,
-            "name": user_name,
-            "email": user_emailid,
-            "resume_link": file_link,
-            "score": user_score,
-            "review": user_review,
-            "submitted_at": datetime.utcnow()
-        }
-        applications.insert_one(application_data)
 
-        application_status.update_one(
-            {"application_id": application_id},
-            {
-                "$set": {
-                    "status": "completed",
-                    "score": user_score,
-                    "review": user_review,
-                    "file_link": file_link,
-                    "completed_at": datetime.utcnow()
-                }
-            }
+def schedule_retry(delay, fn, *args, **kwargs):
+    """Submit ``fn`` to the executor after ``delay`` seconds; no worker is held while waiting."""
+    timer = threading.Timer(delay, executor.submit, args=(fn, *args), kwargs=kwargs)
+    timer.daemon = True
+    timer.start()
+    return datetime.utcnow() + timedelta(seconds=delay)
+
+
+def score_via_service(application_id, resume_ref, job_description, job_id, job_profile):
+    # The scoring service reads the resume from the shared blob spool; only the reference is sent.
+    payload = {'blob_ref': resume_ref, 'job_description': job_description, 'job_id': job_id}
+    if job_profile:
+        payload['job_profile'] = json.dumps(job_profile)
+    response = requests.post('http://127.0.0.1:5001/process-resume', data=payload)
+    if response.status_code == 429:
+        raise ScoringBusy(int(response.headers.get('Retry-After', 30)))
+    response.raise_for_status()
+
+    api_response = response.json()
+    return api_response.get('final_score', 0), api_response.get('profile_summary', '')
+
+
+def extract_and_score(application_id, resume_ref, job_description, user_emailid, job_id, job_profile, timings):
+    """Extraction, duplicate check and scoring; the duplicate check decides whether scoring runs at all."""
+    resume_text = timed_stage(timings, "extract", extract_text_from_pdf, blob_store.path(resume_ref))
+    fp = resume_fingerprint.fingerprint(resume_text)
+    duplicate_info, original = timed_stage(timings, "dedup", find_duplicate, fp, job_id, user_emailid)
+
+    if duplicate_info and duplicate_info["same_job"]:
+        user_score = original.get("score", 0)
+        user_review = original.get("review", "")
+        duplicate_info["score_reused"] = True
+        print(f"Application {application_id} duplicates {duplicate_info['duplicate_of']}; reusing its score")
+    else:
+        user_score, user_review = timed_stage(
+            timings, "score", score_via_service, application_id, resume_ref, job_description, job_id, job_profile
+        )
+    record_dedup_outcome(duplicate_info)
+    return resume_text, fp, duplicate_info, user_score, user_review
+
+
+def process_resume_task(application_id, resume_ref, original_filename, job_description, 
+                       user_name, user_emailid, job_id, folder_id, job_profile=None, submitted_at=None,
+                       file_link=None, attempt=1):
+    """Upload, score and record one application.
+
+    When the scoring service is busy the application goes back to "pending"
+    and the task is resubmitted after the Retry-After delay (keeping the
+    Drive link it already has), up to SCORING_MAX_ATTEMPTS times.
+    """
+    timings = {}
+    started = time.perf_counter()
+    try:
+        filepath = blob_store.path(resume_ref)
+
+        set_application_status(application_id, "processing")
+
+        # The Drive upload doesn't depend on the score, so it runs alongside extraction and scoring
+        # and the two only join for the final update below.
+        upload = None
+        if file_link is None:
+            upload = stage_executor.submit(timed_stage, timings, "upload", upload_resume_to_drive,
+                                           filepath, original_filename, folder_id)
+        scoring = stage_executor.submit(extract_and_score, application_id, resume_ref, job_description,
+                                        user_emailid, job_id, job_profile, timings)
+
+        try:
+            resume_text, fp, duplicate_info, user_score, user_review = scoring.result()
+        except ScoringBusy as e:
+            if attempt >= SCORING_MAX_ATTEMPTS:
+                raise
+            file_link = upload.result() if upload else file_link
+            retry_at = schedule_retry(
+                e.retry_after, process_resume_task, application_id, resume_ref, original_filename, job_description,
+                user_name, user_emailid, job_id, folder_id, job_profile, submitted_at,
+                file_link=file_link, attempt=attempt + 1
+            )
+            print(f"Scoring service busy, retrying application {application_id} in {e.retry_after}s")
+            set_application_status(application_id, "pending", retry_at=retry_at, scoring_attempts=attempt)
+            return
+        file_link = upload.result() if upload else file_link
+
+        index_scored_resume(application_id, resume_text, job_id, user_score, user_review,
+                            submitted_at or datetime.utcnow())
+        remember_fingerprint(application_id, fp, job_id, user_emailid, user_score, user_review)
+
+        # One write records the result and the transition together.
+        set_application_status(
+            application_id, "completed",
+            score=user_score,
+            review=user_review,
+            resume_link=file_link,
+            duplicate=duplicate_info,
+            stage_timings={**timings, "total": round(time.perf_counter() - started, 3)},
+            completed_at=datetime.utcnow()
         )
 
     except Exception as e:
         
-        application_status.update_one(
-            {"application_id": application_id},
-            {
-                "$set": {
-                    "status": "failed",
-                    "error": str(e),
-                    "updated_at": datetime.utcnow()
-                }
-            }
+        set_application_status(
+            application_id, "failed",
+            error=str(e),
+            stage_timings={**timings, "total": round(time.perf_counter() - started, 3)}
         )
 
 
@@ -529,12 +734,62 @@ def verify_2fa():
         return jsonify({'error': 'Invalid 2FA code'}), 401
 
 
+JOB_LIST_FIELDS = ("_id", "job_id", "job_title", "job_description", "date_posted", "profile", "profile_updated_at")
+
+
 @app.route("/jobs", methods=["GET"])
 def get_all_jobs():
-    all_jobs = list(job_posting.find())
-    for job in all_jobs:
-        job["_id"] = str(job["_id"])
-    return jsonify(all_jobs)
+    """All postings as a list; optional offset/limit (total in X-Total-Count) and fields projection.
+
+    Responses carry an ETag and Last-Modified, so an unchanged listing is
+    answered with 304 Not Modified.
+    """
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+        limit = request.args.get('limit')
+        limit = pagination.parse_page_size(limit) if limit is not None else None
+        projection = pagination.parse_fields(request.args.get('fields'), JOB_LIST_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    all_jobs, etag, last_modified = job_cache.all()
+    jobs = all_jobs[offset:offset + limit] if limit is not None else all_jobs[offset:]
+    if projection:
+        jobs = [{field: job[field] for field, keep in projection.items() if keep and field in job} for job in jobs]
+
+    response = jsonify(jobs)
+    # One listing can be served in several shapes; each gets its own validator.
+    response.set_etag(hashlib.sha1(f"{etag}?{request.query_string.decode()}".encode()).hexdigest())
+    response.last_modified = last_modified
+    response.headers['X-Total-Count'] = str(len(all_jobs))
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+@app.route("/jobs/search", methods=["GET"])
+def search_jobs():
+    """Postings matching ``q`` in the title or description, best match first.
+
+    The last word of ``q`` also matches as a prefix. Optional posted_within
+    (day, week or month), limit and offset; the response includes how many
+    matches fall in each date_posted bucket.
+    """
+    query = request.args.get('q', '')
+    posted_within = request.args.get('posted_within') or None
+    try:
+        limit = pagination.parse_page_size(request.args.get('limit'), default=20)
+        offset = max(0, int(request.args.get('offset', 0)))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    jobs, etag, _ = job_cache.all()
+    if job_search.synced_etag != etag:
+        job_search.sync(jobs, etag)
+    try:
+        result = job_search.search(query, posted_within=posted_within, limit=limit, offset=offset)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"query": query, **result}), 200
 
 
 @app.route("/jobs", methods=["POST"])
@@ -555,6 +810,9 @@ def create_job():
     }
 
     result = job_posting.insert_one(new_job)
+    job_cache.invalidate()
+    job_search.add({**new_job, "_id": str(result.inserted_id)})
+    executor.submit(refresh_job_profile, job_id, job_title, job_description)
 
     return jsonify({
         "message": "Job created successfully", 
@@ -565,18 +823,50 @@ def create_job():
 
 @app.route("/jobs/<string:job_id>", methods=["GET"])
 def get_job(job_id):
-    job = job_posting.find_one({"job_id": job_id})
+    job = job_cache.get(job_id)
     if job:
-        job["_id"] = str(job["_id"])
         return jsonify(job)
     return jsonify({"error": "Job not found"}), 404
 
 
 
+@app.route("/jobs/<string:job_id>", methods=["PUT"])
+def update_job(job_id):
+    data = request.get_json()
+    if not data or not any(field in data for field in ("job_title", "job_description")):
+        return jsonify({"error": "Missing job_title or job_description"}), 400
+
+    job = job_posting.find_one({"job_id": job_id})
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+
+    job_title = data.get("job_title", job.get("job_title"))
+    job_description = data.get("job_description", job.get("job_description"))
+
+    # The stored profile describes the old text; drop it until the new one is extracted.
+    job_posting.update_one(
+        {"job_id": job_id},
+        {
+            "$set": {"job_title": job_title, "job_description": job_description},
+            "$unset": {"profile": "", "jd_embedding": "", "profile_updated_at": ""}
+        }
+    )
+    job_cache.invalidate()
+    job_search.add({
+        "_id": str(job["_id"]), "job_id": job_id, "job_title": job_title,
+        "job_description": job_description, "date_posted": job.get("date_posted")
+    })
+    executor.submit(refresh_job_profile, job_id, job_title, job_description)
+
+    return jsonify({"message": "Job updated successfully", "job_id": job_id}), 200
+
+
 # Delete Job Opening
 @app.route("/jobs/<string:job_id>", methods=["DELETE"])
 def delete_job(job_id):
     result = job_posting.delete_one({"job_id": job_id})
+    job_cache.invalidate()
+    job_search.remove(job_id)
     if result.deleted_count > 0:
         return jsonify({"message": "Job deleted successfully"}), 200
     return jsonify({"error": "Job not found"}), 404
@@ -598,31 +888,136 @@ def get_filtered_candidates(job_id):
     filtered_candidates = list(applications.find({
         "job_id": job_id,
         "score": {"$gte": min_score}
-    }))
+    }, {"_id": 0}))
     
     if not filtered_candidates:
         return jsonify({"message": "No candidates found matching the criteria"}), 200
 
-    candidate_reference = {}
-    assessment_questions = ""
-    for candidate in filtered_candidates:
-        candidate.pop('_id', None)
-        
-        candidate_reference[candidate['name']] = {
-            'email': candidate["email"]
-        }
+    try:
+        parallelism = int(request.args.get('parallelism', ASSESSMENT_MAX_PARALLEL))
+    except ValueError:
+        return jsonify({"error": "parallelism must be an integer"}), 400
+    parallelism = max(1, min(parallelism, ASSESSMENT_MAX_PARALLEL))
+
+    job = job_cache.get(job_id)
+    job_description = (job or {}).get("job_description", "")
 
-    oa_creator_url = 'http://127.0.0.1:5001/oa-creator'
-    response = requests.post(oa_creator_url, json={'resume_link': candidate['resume_link']})
+    executor.submit(send_assessments, job_id, filtered_candidates, job_description, parallelism)
+
+    return jsonify({
+        "message": "Generating assessments; each candidate's invite is queued as soon as it is ready.",
+        "candidates": len(filtered_candidates)
+    }), 202
+
+
+def assessment_cache_key(candidate, job_description):
+    """Cache key of a candidate's assessment, or None when the resume can't be identified.
+
+    resume_sha256 is the hash of the uploaded PDF; applications from before it
+    was stored fall back to the Drive link. The job description is part of
+    the key because the assessment crew tailors its questions to it.
+    """
+    resume_hash = candidate.get("resume_sha256")
+    if not resume_hash:
+        if not candidate.get("resume_link"):
+            return None
+        resume_hash = hashlib.sha256(candidate["resume_link"].encode()).hexdigest()
+    jd_hash = hashlib.sha256((job_description or "").encode()).hexdigest()
+    return f"{resume_hash}:{jd_hash}"
+
+
+def generate_assessment(candidate, job_description, cache_key):
+    if cache_key is not None:
+        cached = assessment_cache.find_one({"_id": cache_key})
+        if cached:
+            return cached["questions"], True
+
+    response = requests.post('http://127.0.0.1:5001/oa-creator', json={
+        'resume_link': candidate.get('resume_link'),
+        'blob_ref': candidate.get('resume_sha256'),
+        'job_description': job_description
+    })
     response.raise_for_status()
+    questions = response.text
+
+    if cache_key is None:
+        return questions, False
+    assessment_cache.update_one(
+        {"_id": cache_key},
+        {"$set": {"questions": questions, "created_at": datetime.utcnow()}},
+        upsert=True
+    )
+    return questions, False
+
+
+def send_assessments(job_id, candidates, job_description, parallelism):
+    """Generate one assessment per candidate, at most ``parallelism`` at a time, inviting each as it finishes.
+
+    Candidates who submitted the same resume share one generation.
+    """
+    started = time.perf_counter()
+    semaphore = threading.Semaphore(parallelism)
+
+    def limited(candidate, cache_key):
+        with semaphore:
+            return generate_assessment(candidate, job_description, cache_key)
+
+    futures = {}
+    by_key = {}
+    for candidate in candidates:
+        cache_key = assessment_cache_key(candidate, job_description)
+        if cache_key is None:
+            # Nothing to share the generation with; /oa-creator reports the missing resume.
+            future = assessment_executor.submit(limited, candidate, None)
+            futures[future] = [candidate]
+            continue
+        if cache_key not in by_key:
+            by_key[cache_key] = assessment_executor.submit(limited, candidate, cache_key)
+        futures.setdefault(by_key[cache_key], []).append(candidate)
+
+    generated = cached = failed = 0
+    keys = {future: cache_key for cache_key, future in by_key.items()}
+    for future in as_completed(futures):
+        for candidate in futures[future]:
+            try:
+                questions, from_cache = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"Assessment generation failed for {candidate.get('application_id')}: {e}")
+                applications.update_one(
+                    {"application_id": candidate.get("application_id")},
+                    {"$set": {"assessment": {"status": "failed", "error": str(e), "updated_at": datetime.utcnow()}}}
+                )
+                continue
 
-    assessment_questions = response.text
+            cached += from_cache
+            generated += not from_cache
+            send_emails_to_candidates({
+                candidate['name']: {
+                    'email': candidate["email"],
+                    'application_id': candidate.get("application_id"),
+                    'assessment_questions': questions
+                }
+            }, job_id)
+            applications.update_one(
+                {"application_id": candidate.get("application_id")},
+                {"$set": {"assessment": {"status": "invited", "cache_key": keys.get(future), "updated_at": datetime.utcnow()}}}
+            )
 
-    send_emails_to_candidates(candidate_reference, assessment_questions)
+    print(f"Assessments for job {job_id}: {len(candidates)} candidates, {generated} generated, "
+          f"{cached} from cache, {failed} failed in {time.perf_counter() - started:.1f}s")
 
-    return jsonify({
-        "message": "Successfully processed candidates, sent emails, and generated assessment."
-    }), 200
+
+@app.route('/jobs/<string:job_id>/invites', methods=['GET'])
+def get_invite_status(job_id):
+    invites = list(email_outbox.find(
+        {"job_id": job_id, "kind": "assessment_invite"},
+        {"_id": 0, "body": 0}
+    ).sort("created_at", -1))
+    summary = {}
+    for invite in invites:
+        summary[invite["status"]] = summary.get(invite["status"], 0) + 1
+    return jsonify({"summary": summary, "invites": invites}), 200
 
 
 @app.route('/applicationform', methods=['POST'])
@@ -640,42 +1035,33 @@ def submit_form():
     if file.filename == '':
         return jsonify({"error": "No selected file"}), 400
 
-    job = job_posting.find_one({"job_id": job_id})
+    job = job_cache.get(job_id)
     if not job:
         return jsonify({"error": "Job not found"}), 404
     job_description = job.get("job_description")
 
-    folder_id = "1T0jvXp-AhR6NtXkmgsw5H8KR52duP-KS"
+    folder_id = DRIVE_FOLDER_ID
 
     application_id = str(uuid.uuid4())
     original_filename = file.filename
-    unique_filename = f"{application_id}-{original_filename}"
-
-    upload_folder = os.path.join(script_dir, 'uploads')
-    os.makedirs(upload_folder, exist_ok=True)
-    filepath = os.path.join(upload_folder, unique_filename)
-    file.save(filepath)
+    resume_ref = blob_store.put_stream(file.stream)
 
-    application_status.insert_one({
-        "application_id": application_id,
-        "user_name": user_name,
-        "user_email": user_emailid,
-        "job_id": job_id,
-        "status": "pending",
-        "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow()
-    })
+    application = new_application(application_id, job_id, user_name, user_emailid, resume_sha256=resume_ref)
+    applications.insert_one(application)
+    publish_status(application_id, "pending", {"job_id": job_id})
 
     executor.submit(
         process_resume_task,
         application_id,
-        filepath,
+        resume_ref,
         original_filename,
         job_description,
         user_name,
         user_emailid,
         job_id,
-        folder_id
+        folder_id,
+        job.get("profile"),
+        application["submitted_at"]
     )
 
     print(f"Application {application_id} submitted to background processing queue")
@@ -688,29 +1074,518 @@ def submit_form():
     }), 202
 
 
+@app.route('/jobs/<string:job_id>/applications/batch', methods=['POST'])
+def submit_batch_applications(job_id):
+    """Bulk-import resumes for one job and stream each candidate's result as it is scored.
+
+    Optional ``names`` and ``emails`` form lists line up with the uploaded
+    ``files``; the job description is analyzed once by the scoring service
+    for the whole batch.
+    """
+    files = [f for f in request.files.getlist('files') if f.filename]
+    if not files:
+        return jsonify({"error": "No files in request"}), 400
+
+    names = request.form.getlist('names')
+    emails = request.form.getlist('emails')
+    if (names and len(names) != len(files)) or (emails and len(emails) != len(files)):
+        return jsonify({"error": "names and emails must match the number of files"}), 400
+
+    job = job_cache.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+
+    batch = {}
+    for index, file in enumerate(files):
+        application_id = str(uuid.uuid4())
+        resume_ref = blob_store.put_stream(file.stream)
+        filepath = blob_store.path(resume_ref)
+        try:
+            resume_text = extract_text_from_pdf(filepath)
+        except Exception as e:
+            print(f"Could not extract text from {file.filename}: {e}")
+            resume_text = ""
+        batch[application_id] = {
+            "resume_ref": resume_ref,
+            "filepath": filepath,
+            "original_filename": file.filename,
+            "name": names[index] if names else os.path.splitext(file.filename)[0],
+            "email": emails[index] if emails else "",
+            "resume_text": resume_text,
+            "fingerprint": resume_fingerprint.fingerprint(resume_text)
+        }
+
+    # Uploads don't depend on the scores, so they all start now on the Drive upload pool.
+    for candidate in batch.values():
+        candidate["upload"] = drive_manager.submit_upload(
+            candidate["filepath"], candidate["original_filename"], DRIVE_FOLDER_ID
+        )
+
+    now = datetime.utcnow()
+    applications.insert_many([
+        new_application(application_id, job_id, candidate["name"], candidate["email"], status="processing",
+                        now=now, resume_sha256=candidate["resume_ref"])
+        for application_id, candidate in batch.items()
+    ])
+    for application_id in batch:
+        publish_status(application_id, "processing", {"job_id": job_id})
+
+    # Duplicates of resumes already scored for this job reuse that score instead of going to the crew.
+    reused = {}
+    for application_id, candidate in batch.items():
+        duplicate_info, original = find_duplicate(candidate["fingerprint"], job_id, candidate["email"])
+        candidate["duplicate"] = duplicate_info
+        if duplicate_info and duplicate_info["same_job"]:
+            duplicate_info["score_reused"] = True
+            reused[application_id] = {
+                "candidate_id": application_id,
+                "filename": candidate["original_filename"],
+                "status_code": 200,
+                "final_score": original.get("score", 0),
+                "profile_summary": original.get("review", ""),
+                "duplicate": duplicate_info
+            }
+    to_score = {application_id: c for application_id, c in batch.items() if application_id not in reused}
+
+    # Scoring and write-back run on the executor, so they finish even if the client goes away;
+    # the response only relays the results as they arrive.
+    results = queue.Queue()
+    executor.submit(run_batch_scoring, job_id, job, batch, reused, to_score, results)
+
+    def relay():
+        while True:
+            result = results.get()
+            if result is None:
+                return
+            yield json.dumps(result) + "\n"
+
+    return Response(relay(), mimetype='application/x-ndjson')
+
+
+def run_batch_scoring(job_id, job, batch, reused, to_score, results=None, attempt=1):
+    """Score ``to_score`` on the scoring service and write every outcome back.
+
+    Each result is put on ``results`` as soon as it arrives (None marks the
+    end). Uploads, indexing and the Mongo writes happen here, after the
+    result was passed on. Candidates the service never returned a result for
+    (it failed or the stream broke off) are marked failed. Candidates it
+    turned away with 429 go back to "pending" and are resubmitted as a
+    smaller batch (with no one listening) after the Retry-After delay.
+    """
+    emit = results.put if results is not None else (lambda result: None)
+    # Results are written back in bulk_write batches rather than one update per candidate.
+    transitions = []
+    pending = set(to_score)
+    busy = {}
+    retry_after = 0
+    try:
+        for application_id, result in reused.items():
+            emit(result)
+            transitions.append(batch_result_transition(job_id, batch[application_id], result))
+
+        if not to_score:
+            emit({"summary": {"job_id": job_id, "resumes": 0, "reused_scores": len(reused)}})
+            return
+
+        payload = {
+            'blob_refs': [candidate["resume_ref"] for candidate in to_score.values()],
+            'filenames': [candidate["original_filename"] for candidate in to_score.values()],
+            'job_description': job.get("job_description"),
+            'job_title': job.get("job_title", ""),
+            'job_id': job_id,
+            'candidate_ids': list(to_score.keys())
+        }
+        if job.get("profile"):
+            payload['job_profile'] = json.dumps(job["profile"])
+        response = requests.post('http://127.0.0.1:5001/process-resume-batch', data=payload, stream=True)
+        response.raise_for_status()
+
+        for line in response.iter_lines():
+            if not line:
+                continue
+            result = json.loads(line)
+            if "summary" in result:
+                result["summary"]["reused_scores"] = len(reused)
+                emit(result)
+                continue
+            emit(result)
+            pending.discard(result["candidate_id"])
+            if result.get("status_code") == 429:
+                busy[result["candidate_id"]] = to_score[result["candidate_id"]]
+                retry_after = max(retry_after, int(result.get("retry_after", 30)))
+                continue
+            transitions.append(batch_result_transition(job_id, batch[result["candidate_id"]], result))
+            if len(transitions) >= BATCH_WRITE_SIZE:
+                write_batch_transitions(transitions)
+    except Exception as e:
+        print(f"Batch scoring for job {job_id} failed: {e}")
+        emit({"error": f"Batch scoring failed: {e}"})
+    finally:
+        for application_id in pending:
+            error = "The scoring service returned no result"
+            emit({"candidate_id": application_id, "filename": batch[application_id]["original_filename"],
+                  "status_code": 500, "error": error})
+            transitions.append((application_id, "failed", {"job_id": job_id, "error": error}))
+        if busy and attempt < SCORING_MAX_ATTEMPTS:
+            retry_at = schedule_retry(retry_after, run_batch_scoring, job_id, job, batch, {}, busy, attempt=attempt + 1)
+            print(f"Scoring service busy, retrying {len(busy)} applications for job {job_id} in {retry_after}s")
+            transitions.extend((application_id, "pending", {"job_id": job_id, "retry_at": retry_at,
+                                                             "scoring_attempts": attempt})
+                               for application_id in busy)
+        else:
+            transitions.extend((application_id, "failed", {"job_id": job_id, "error": "Scoring service busy"})
+                               for application_id in busy)
+        try:
+            write_batch_transitions(transitions)
+        finally:
+            emit(None)
+
+
+def batch_result_transition(job_id, candidate, result):
+    """(application_id, status, fields) for one streamed batch result, to be written by write_batch_transitions."""
+    application_id = result["candidate_id"]
+    try:
+        if result.get("status_code") != 200:
+            raise RuntimeError(result.get("error", "Scoring failed"))
+
+        user_score = result.get('final_score', 0)
+        user_review = result.get('profile_summary', '')
+        file_link = drive_file_link(candidate["upload"].result().get('id'))
+
+        index_scored_resume(application_id, candidate["resume_text"], job_id, user_score, user_review, datetime.utcnow())
+        remember_fingerprint(application_id, candidate["fingerprint"], job_id, candidate["email"], user_score, user_review)
+        record_dedup_outcome(candidate["duplicate"])
+        return application_id, "completed", {
+            "job_id": job_id,
+            "score": user_score,
+            "review": user_review,
+            "resume_link": file_link,
+            "duplicate": candidate["duplicate"],
+            "completed_at": datetime.utcnow()
+        }
+    except Exception as e:
+        return application_id, "failed", {"job_id": job_id, "error": str(e)}
+
+
+def write_batch_transitions(transitions):
+    """Write the pending transitions in one bulk_write, publish them and empty the list."""
+    if not transitions:
+        return
+    now = datetime.utcnow()
+    applications.bulk_write([
+        UpdateOne({"application_id": application_id}, status_update(status, fields, now))
+        for application_id, status, fields in transitions
+    ], ordered=False)
+    for application_id, status, fields in transitions:
+        publish_status(application_id, status, fields)
+    transitions.clear()
+
+
 @app.route('/application-status/<string:application_id>', methods=['GET'])
 def check_application_status(application_id):
-    app_status = application_status.find_one({"application_id": application_id})
+    app_status = applications.find_one({"application_id": application_id})
     if not app_status:
         return jsonify({"error": "Application not found"}), 404
     app_status.pop('_id', None)
     return jsonify(app_status), 200
 
 
+# The pushed "current state" leaves out the history; the plain status endpoint returns it.
+STATUS_PROJECTION = {"_id": 0, "status_history": 0}
+
+
+def sse_message(payload, event_id=None):
+    lines = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{lines}event: status\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
+@app.route('/application-status/<string:application_id>/events', methods=['GET'])
+def stream_application_status(application_id):
+    """Server-sent events: the current status first, then every transition until completed or failed."""
+    # Read the cursor before the document so a transition in between is still delivered.
+    after = status_bus.last_seq
+    current = applications.find_one({"application_id": application_id}, STATUS_PROJECTION)
+    if not current:
+        return jsonify({"error": "Application not found"}), 404
+
+    def generate():
+        yield sse_message(current, after)
+        if current.get("status") in TERMINAL_STATUSES:
+            return
+        seq = after
+        deadline = time.monotonic() + STATUS_STREAM_MAX_SECONDS
+        while time.monotonic() < deadline:
+            events = status_bus.wait(seq, [application_id], timeout=15)
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                seq = event["seq"]
+                yield sse_message(event, seq)
+                if event["status"] in TERMINAL_STATUSES:
+                    return
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/application-status/<string:application_id>/wait', methods=['GET'])
+def wait_for_application_status(application_id):
+    """Long-poll: returns as soon as there is a transition after ``after`` (or after ``timeout`` seconds).
+
+    Without ``after`` (or with a cursor this process can no longer serve)
+    the current document is returned instead; pass the returned ``cursor``
+    as ``after`` on the next call.
+    """
+    after = request.args.get('after', type=int)
+    timeout = max(0, min(request.args.get('timeout', 25, type=float), 55))
+
+    if after is None or not status_bus.covers(after):
+        cursor = status_bus.last_seq
+        current = applications.find_one({"application_id": application_id}, STATUS_PROJECTION)
+        if not current:
+            return jsonify({"error": "Application not found"}), 404
+        return jsonify({"application": current, "events": [], "cursor": cursor}), 200
+
+    events = status_bus.wait(after, [application_id], timeout=timeout)
+    return jsonify({"events": events, "cursor": events[-1]["seq"] if events else after}), 200
+
+
+@app.route('/application-status/bulk', methods=['POST'])
+def bulk_application_status():
+    data = request.get_json() or {}
+    application_ids = data.get('application_ids')
+    if not isinstance(application_ids, list) or not application_ids:
+        return jsonify({"error": "application_ids must be a non-empty list"}), 400
+    if len(application_ids) > STATUS_BULK_MAX_IDS:
+        return jsonify({"error": f"At most {STATUS_BULK_MAX_IDS} application_ids per request"}), 400
+
+    statuses = {
+        doc["application_id"]: doc for doc in applications.find(
+            {"application_id": {"$in": application_ids}},
+            {"_id": 0, "application_id": 1, "job_id": 1, "name": 1, "status": 1, "score": 1,
+             "error": 1, "updated_at": 1, "completed_at": 1}
+        )
+    }
+    return jsonify({
+        "statuses": statuses,
+        "missing": [application_id for application_id in application_ids if application_id not in statuses]
+    }), 200
+
+
 @app.route('/applications/<string:job_id>', methods=['GET'])
 def get_applications_for_job(job_id):
-    job_applications = list(applications.find({"job_id": job_id}))
-    
-    for app in job_applications:
-        app.pop('_id', None)
-        
+    """Scored applications for a job; ``?status=all`` also includes ones still processing or failed."""
+    query = {"job_id": job_id}
+    status = request.args.get('status', 'completed')
+    if status != 'all':
+        query["status"] = status
+    job_applications = list(applications.find(query, {"_id": 0, "status_history": 0}))
     return jsonify(job_applications), 200
 
+
+# Ranking order: best score first, application_id breaks ties so every page boundary is unambiguous.
+RANKING_SORT = [("score", -1), ("application_id", 1)]
+RANKING_FIELDS = ("application_id", "name", "email", "score", "review", "resume_link", "submitted_at", "duplicate")
+
+
+@app.route('/jobs/<string:job_id>/ranking', methods=['GET'])
+def get_candidate_ranking(job_id):
+    """Candidates for a job by descending score, one page at a time.
+
+    Query parameters: limit, cursor (the previous page's next_cursor), fields
+    (comma separated), min_score, max_score, since and until (YYYY-MM-DD on
+    submitted_at).
+    """
+    try:
+        limit = pagination.parse_page_size(request.args.get('limit'))
+        projection = pagination.parse_fields(
+            request.args.get('fields'), RANKING_FIELDS, required=[field for field, _ in RANKING_SORT]
+        ) or {"_id": 0}
+        min_score = request.args.get('min_score', type=float)
+        max_score = request.args.get('max_score', type=float)
+        since = request.args.get('since')
+        until = request.args.get('until')
+        submitted = {}
+        if since:
+            submitted["$gte"] = datetime.strptime(since, '%Y-%m-%d')
+        if until:
+            submitted["$lt"] = datetime.strptime(until, '%Y-%m-%d')
+        cursor = request.args.get('cursor')
+        after = pagination.decode_cursor(cursor, RANKING_SORT) if cursor else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = {"job_id": job_id, "status": "completed"}
+    score = {}
+    if min_score is not None:
+        score["$gte"] = min_score
+    if max_score is not None:
+        score["$lte"] = max_score
+    if score:
+        query["score"] = score
+    if submitted:
+        query["submitted_at"] = submitted
+    if after:
+        query = {"$and": [query, pagination.keyset_filter(RANKING_SORT, after)]}
+
+    # Served by the (job_id, status, score, application_id) index: no in-memory sort, and
+    # each page reads only limit + 1 documents however deep into the ranking it is.
+    page = list(applications.find(query, projection).sort(RANKING_SORT).limit(limit + 1))
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = pagination.encode_cursor(page[-1], RANKING_SORT)
+
+    return jsonify({"candidates": page, "next_cursor": next_cursor}), 200
+
+
+def ensure_indexes():
+    """Create the indexes the list and ranking queries rely on (no-op when they already exist)."""
+    applications.create_index(
+        [("job_id", 1), ("status", 1), ("score", -1), ("application_id", 1)], name="job_status_score_rank"
+    )
+    applications.create_index([("job_id", 1), ("submitted_at", -1)], name="job_submitted")
+    applications.create_index("application_id", name="application_id")
+    job_posting.create_index("job_id", name="job_id")
+    email_outbox.create_index([("status", 1), ("next_attempt_at", 1)], name="outbox_due")
+    email_outbox.create_index([("job_id", 1), ("kind", 1), ("created_at", -1)], name="outbox_job")
+
+def blob_cleanup_loop():
+    while True:
+        try:
+            result = blob_store.cleanup(BLOB_RETENTION_DAYS * 86400, BLOB_SPOOL_MAX_BYTES)
+            if result["removed_blobs"]:
+                print(f"Blob spool cleanup removed {result['removed_blobs']} blobs ({result['removed_bytes']} bytes)")
+        except Exception as e:
+            print(f"Blob spool cleanup failed: {e}")
+        time.sleep(BLOB_CLEANUP_INTERVAL)
+
+
+@app.route('/metrics/blob-spool', methods=['GET'])
+def blob_spool_metrics():
+    return jsonify({
+        **blob_store.usage(),
+        "max_bytes": BLOB_SPOOL_MAX_BYTES,
+        "retention_days": BLOB_RETENTION_DAYS
+    }), 200
+
+
+@app.route('/metrics/analytics-snapshot', methods=['GET'])
+def analytics_snapshot_metrics():
+    return jsonify({**analytics_snapshot.stats(), "analysis_seconds": analytics_timings}), 200
+
+
+@app.route('/metrics/dedup', methods=['GET'])
+def dedup_metrics():
+    counters = pipeline_metrics.find_one({"_id": "dedup"}, {"_id": 0}) or {}
+    checked = counters.get("checked", 0)
+    duplicates = counters.get("exact_duplicates", 0) + counters.get("near_duplicates", 0)
+    return jsonify({
+        "checked": checked,
+        "exact_duplicates": counters.get("exact_duplicates", 0),
+        "near_duplicates": counters.get("near_duplicates", 0),
+        "duplicate_rate": round(duplicates / checked, 4) if checked else 0,
+        "scores_reused": counters.get("scores_reused", 0),
+        "llm_calls_avoided": counters.get("llm_calls_avoided", 0),
+        "threshold": RESUME_DUPLICATE_THRESHOLD
+    }), 200
+
+
+def parse_match_filters():
+    """Read the shared limit/min_score/since query parameters of the matching endpoints."""
+    limit = request.args.get('limit', 10, type=int)
+    min_score = request.args.get('min_score', type=float)
+    since = request.args.get('since')
+    if since:
+        since = datetime.strptime(since, '%Y-%m-%d')
+    return max(1, min(limit, 100)), min_score, since
+
+
+def attach_candidate_details(matches):
+    application_ids = [m["application_id"] for m in matches]
+    details = {
+        a["application_id"]: a for a in applications.find(
+            {"application_id": {"$in": application_ids}},
+            {"_id": 0, "application_id": 1, "name": 1, "email": 1, "resume_link": 1, "review": 1}
+        )
+    }
+    for match in matches:
+        match.update(details.get(match["application_id"], {}))
+    return matches
+
+
+@app.route('/jobs/<string:job_id>/matching-candidates', methods=['GET'])
+def get_matching_candidates(job_id):
+    """Top past applicants (for any job) whose resumes best match this job description."""
+    try:
+        limit, min_score, since = parse_match_filters()
+    except ValueError:
+        return jsonify({"error": "since must be a date in YYYY-MM-DD format"}), 400
+
+    job = job_posting.find_one({"job_id": job_id}, {"job_title": 1, "job_description": 1, "jd_embedding": 1})
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+
+    jd_embedding = job.get("jd_embedding")
+    if not jd_embedding:
+        jd_embedding = create_query_embedding(f"{job.get('job_title', '')}\n{job.get('job_description', '')}")
+
+    matches = candidate_index.top_candidates(jd_embedding, limit, min_score=min_score, since=since)
+    return jsonify(attach_candidate_details(matches)), 200
+
+
+@app.route('/applications/<string:application_id>/similar', methods=['GET'])
+def get_similar_candidates(application_id):
+    try:
+        limit, min_score, since = parse_match_filters()
+    except ValueError:
+        return jsonify({"error": "since must be a date in YYYY-MM-DD format"}), 400
+
+    matches = candidate_index.similar_candidates(application_id, limit, min_score=min_score, since=since)
+    if matches is None:
+        return jsonify({"error": "Application not found in candidate index"}), 404
+    return jsonify(attach_candidate_details(matches)), 200
+
+ANALYTICS_PARALLEL = os.environ.get('ANALYTICS_PARALLEL', '1') == '1'
+analytics_timings = {}
+
+
+def compute_analytics_body():
+    # Serialized once per data version instead of on every dashboard load.
+    timings = {}
+    body = app.json.dumps(get_analytics_summary(parallel=ANALYTICS_PARALLEL, timings=timings))
+    analytics_timings.clear()
+    analytics_timings.update(timings)
+    return body
+
+
+# The HR data only changes on sync, so the dashboard is served from a snapshot taken at the
+# current data version and recomputed in the background when that moves.
+analytics_snapshot = MaterializedSnapshot(compute_analytics_body, get_data_version)
+
+
+def warm_analytics_snapshot():
+    try:
+        if ensure_hr_rollups():
+            print("Built the HR analytics rollups")
+        analytics_snapshot.warm()
+        print(f"Analytics snapshot ready in {analytics_snapshot.last_duration}s")
+    except Exception as e:
+        print(f"Could not warm the analytics snapshot: {e}")
+
+
 @app.route('/api/hr-analytics-summary', methods=['GET'])
 def hr_analytics_summary():
     try:
-        summary = get_analytics_summary()
-        return jsonify(summary), 200
+        snapshot = analytics_snapshot.get()
+        response = Response(snapshot.value, mimetype='application/json')
+        response.set_etag(hashlib.sha1(f"{snapshot.version}@{snapshot.computed_at}".encode()).hexdigest())
+        response.last_modified = snapshot.computed_at.replace(microsecond=0)
+        response.headers['X-Data-Version'] = snapshot.version
+        response.headers['X-Snapshot-Stale'] = 'true' if snapshot.stale else 'false'
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
     except Exception as e:
         # Log the error for debugging
         print(f"Error in /api/hr-analytics-summary: {e}")
@@ -761,7 +1636,28 @@ def logout():
     return jsonify({'message': 'Logged out successfully'}), 200
 
 if __name__ == "__main__":
+    # debug=True runs this twice: the reloader's watcher process and the child that serves requests
+    # (WERKZEUG_RUN_MAIN=true). Only the child starts the background work, so it isn't done twice.
+    serving = os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+    if serving:
+        try:
+            ensure_indexes()
+        except Exception as e:
+            print(f"Could not create indexes: {e}")
+        threading.Thread(target=blob_cleanup_loop, name="blob-cleanup", daemon=True).start()
+        threading.Thread(target=warm_analytics_snapshot, name="analytics-warmup", daemon=True).start()
+        if STATUS_EVENTS_CHANGE_STREAM:
+            threading.Thread(
+                target=follow_change_stream, args=(applications, status_bus, set_status_stream_active),
+                name="status-change-stream", daemon=True
+            ).start()
+        outbox.start()
     try:
         app.run(debug=True, port=5002)
     finally:
         executor.shutdown(wait=True)
+        stage_executor.shutdown(wait=True)
+        drive_manager.shutdown()
+        assessment_executor.shutdown(wait=True)
+        if serving:
+            outbox.stop()
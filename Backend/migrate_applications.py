@@ -0,0 +1,96 @@
+"""
+Migration to the consolidated application documents.
+
+Folds every application_status entry into its applications document (or
+creates one for submissions that never completed), renames the old
+user_name / user_email / file_link fields and builds the embedded status
+history. Documents that already have a status_history are left alone, so
+the migration can be re-run safely.
+
+    python migrate_applications.py --mongo-uri mongodb://localhost:27017 [--dry-run] [--drop-legacy]
+"""
+
+import argparse
+import os
+
+from pymongo import MongoClient, ReplaceOne
+
+from application_records import merge_legacy
+
+BATCH_SIZE = 1000
+
+
+def _flush(applications, ops, dry_run):
+    if ops and not dry_run:
+        applications.bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+def migrate(db, dry_run=False, batch_size=BATCH_SIZE):
+    applications = db["applications"]
+    application_status = db["application_status"]
+    migrated = 0
+    # Only needed to keep a dry run from counting these again below.
+    seen = set()
+
+    batch = []
+    for status_doc in application_status.find({}).batch_size(batch_size):
+        batch.append(status_doc)
+        seen.add(status_doc["application_id"])
+        if len(batch) >= batch_size:
+            migrated += _migrate_status_batch(applications, batch, dry_run)
+            batch = []
+    migrated += _migrate_status_batch(applications, batch, dry_run)
+
+    # Applications scored before status tracking have no application_status entry at all.
+    ops = []
+    for application_doc in applications.find({"status_history": {"$exists": False}}).batch_size(batch_size):
+        if application_doc.get("application_id") in seen:
+            continue
+        ops.append(ReplaceOne({"_id": application_doc["_id"]}, merge_legacy(None, application_doc)))
+        if len(ops) >= batch_size:
+            migrated += _flush(applications, ops, dry_run)
+            ops = []
+    migrated += _flush(applications, ops, dry_run)
+    return migrated
+
+
+def _migrate_status_batch(applications, status_docs, dry_run):
+    if not status_docs:
+        return 0
+    existing = {
+        doc["application_id"]: doc for doc in applications.find(
+            {"application_id": {"$in": [doc["application_id"] for doc in status_docs]}}
+        )
+    }
+    ops = []
+    for status_doc in status_docs:
+        application_doc = existing.get(status_doc["application_id"])
+        if application_doc and "status_history" in application_doc:
+            continue
+        ops.append(ReplaceOne(
+            {"application_id": status_doc["application_id"]},
+            merge_legacy(status_doc, application_doc),
+            upsert=True
+        ))
+    return _flush(applications, ops, dry_run)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI', ''))
+    parser.add_argument('--db', default="recruitment_db")
+    parser.add_argument('--dry-run', action='store_true', help="report what would be migrated without writing")
+    parser.add_argument('--drop-legacy', action='store_true', help="drop application_status afterwards")
+    args = parser.parse_args()
+
+    db = MongoClient(args.mongo_uri)[args.db]
+    migrated = migrate(db, dry_run=args.dry_run)
+    print(f"{'Would migrate' if args.dry_run else 'Migrated'} {migrated} applications")
+    if args.drop_legacy and not args.dry_run:
+        db["application_status"].drop()
+        print("Dropped application_status")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, String, Integer, Float, DateTime, BigInteger, ForeignKey
+from sqlalchemy import create_engine, event, Column, String, Integer, Float, DateTime, BigInteger, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
@@ -7,8 +7,15 @@ from datetime import datetime
 Base = declarative_base()
 
 # Define ORM Models
+# Secondary indexes follow the analytics access paths: fact tables are joined to employees on
+# employee_id and the extra columns make the indexes covering for the aggregates read from them.
+# tune_db.py adds them to existing databases.
 class Employee(Base):
     __tablename__ = 'employees'
+    __table_args__ = (
+        Index('ix_employees_employee_id', 'employee_id', 'dept'),
+        Index('ix_employees_hire_date', 'hire_date', 'dept', 'role'),
+    )
     
     employee_id = Column(String, primary_key=True)
     first_name = Column(String)
@@ -31,6 +38,7 @@ class Employee(Base):
 
 class Attendance(Base):
     __tablename__ = 'attendance'
+    __table_args__ = (Index('ix_attendance_employee', 'employee_id', 'absent', 'date'),)
     
     employee_id = Column(String, ForeignKey('employees.employee_id'), primary_key=True)
     date = Column(DateTime, primary_key=True)
@@ -45,6 +53,7 @@ class Attendance(Base):
 
 class Event(Base):
     __tablename__ = 'events'
+    __table_args__ = (Index('ix_events_type_employee', 'event_type', 'employee_id'),)
     
     employee_id = Column(String, ForeignKey('employees.employee_id'), primary_key=True)
     event_type = Column(String, primary_key=True)
@@ -72,8 +81,11 @@ class KPIOverview(Base):
 class MappingsLog(Base):
     __tablename__ = 'mappings_log'
     
-    ts_utc = Column(String, primary_key=True)
-    provider = Column(String, primary_key=True)
+    # A sync logs one row per source field (hr_sync.py), and a field may map differently from one
+    # sync to the next, so rows get a surrogate key; migrate_mappings_log() adds it to older tables.
+    id = Column(Integer, primary_key=True)
+    ts_utc = Column(String)
+    provider = Column(String)
     source_field = Column(String)
     approved = Column(String)
     suggested = Column(String)
@@ -84,6 +96,7 @@ class MappingsLog(Base):
 
 class Payroll(Base):
     __tablename__ = 'payroll'
+    __table_args__ = (Index('ix_payroll_employee', 'employee_id', 'pay_period', 'base_salary'),)
     
     employee_id = Column(String, ForeignKey('employees.employee_id'), primary_key=True)
     email = Column(String)
@@ -100,6 +113,7 @@ class Payroll(Base):
 
 class Review(Base):
     __tablename__ = 'reviews'
+    __table_args__ = (Index('ix_reviews_employee', 'employee_id', 'review_date', 'score'),)
     
     employee_id = Column(String, ForeignKey('employees.employee_id'), primary_key=True)
     review_date = Column(DateTime, primary_key=True)
@@ -141,7 +155,48 @@ class Admin(Base):
         return f"<Admin(employee_id={self.employee_id}, username={self.username}, role={self.role})>"
 
 
+# Applied to every new connection. journal_mode=WAL is stored in the database file itself,
+# so it is set once by tune_db.py rather than here.
+CONNECTION_PRAGMAS = {
+    'cache_size': -65536,      # 64 MB page cache (negative = KiB)
+    'mmap_size': 268435456,    # read through a 256 MB memory map instead of read() calls
+    'temp_store': 'MEMORY',    # sorts and GROUP BY temp tables stay in memory
+    'synchronous': 'NORMAL',   # safe with WAL, avoids an fsync per commit
+    'busy_timeout': 5000,      # wait for a writer instead of failing with "database is locked"
+}
+
+
+def install_pragmas(engine, pragmas=CONNECTION_PRAGMAS):
+    """Set ``pragmas`` on every connection ``engine`` opens."""
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    return engine
+
+
+def migrate_mappings_log(dbapi_connection):
+    """Give a mappings_log table created without the ``id`` key one (hr.sqlite has no key at all,
+    older orm.py versions keyed it on (ts_utc, provider)); returns True if it was rebuilt."""
+    columns = [row[1] for row in dbapi_connection.execute("PRAGMA table_info('mappings_log')").fetchall()]
+    if not columns or 'id' in columns:
+        return False
+    dbapi_connection.execute("ALTER TABLE mappings_log RENAME TO _mappings_log_old")
+    dbapi_connection.execute(
+        "CREATE TABLE mappings_log (id INTEGER NOT NULL PRIMARY KEY, ts_utc VARCHAR, provider VARCHAR, "
+        "source_field VARCHAR, approved VARCHAR, suggested VARCHAR)"
+    )
+    dbapi_connection.execute(
+        "INSERT INTO mappings_log (ts_utc, provider, source_field, approved, suggested) "
+        "SELECT ts_utc, provider, source_field, approved, suggested FROM _mappings_log_old ORDER BY rowid"
+    )
+    dbapi_connection.execute("DROP TABLE _mappings_log_old")
+    return True
+
+
 # Database connection and session setup
-engine = create_engine('sqlite:///hr.sqlite', echo=False)
+engine = install_pragmas(create_engine('sqlite:///hr.sqlite', echo=False))
 Session = sessionmaker(bind=engine)
 session = Session()
@@ -0,0 +1,80 @@
+"""
+Pagination
+Opaque keyset cursors and field projection helpers for the Mongo-backed list endpoints
+"""
+
+import base64
+import json
+from datetime import datetime
+
+MAX_PAGE_SIZE = 200
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "$date" in value:
+        return datetime.fromisoformat(value["$date"])
+    return value
+
+
+def encode_cursor(doc, sort):
+    """Cursor pointing just after ``doc`` in a listing ordered by ``sort`` ([(field, 1 | -1), ...])."""
+    values = [_encode_value(doc.get(field)) for field, _ in sort]
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, sort):
+    """Sort-key values stored in ``token``; raises ValueError if it is not a cursor for ``sort``."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Malformed cursor")
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise ValueError("Malformed cursor")
+    return [_decode_value(value) for value in values]
+
+
+def keyset_filter(sort, values):
+    """Mongo filter for documents after ``values`` in ``sort`` order.
+
+    The last sort field must be unique so ties on the earlier fields are
+    broken deterministically.
+    """
+    clauses = []
+    for index, (field, direction) in enumerate(sort):
+        clause = {f: v for (f, _), v in zip(sort[:index], values[:index])}
+        clause[field] = {"$lt" if direction < 0 else "$gt": values[index]}
+        clauses.append(clause)
+    return {"$or": clauses}
+
+
+def parse_page_size(value, default=50):
+    try:
+        size = int(value) if value is not None else default
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def parse_fields(value, allowed, required=()):
+    """Projection for a comma separated ``fields`` parameter, restricted to ``allowed``.
+
+    ``required`` fields (e.g. the ones the cursor is built from) are always
+    included. Returns None when no fields were requested.
+    """
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    projection = {"_id": 0}
+    projection.update({field: 1 for field in (*fields, *required)})
+    return projection
@@ -0,0 +1,128 @@
+"""
+Resume Fingerprinting
+Exact (SHA-256) and near-duplicate (MinHash + LSH) detection over extracted resume text
+"""
+
+import hashlib
+import random
+import re
+import threading
+
+NUM_PERM = 128
+LSH_BANDS = 32
+SHINGLE_SIZE = 3
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_rng = random.Random(1729)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+
+def normalize_text(text):
+    """Lowercase and reduce to alphanumeric tokens so layout and punctuation changes don't matter."""
+    return " ".join(re.findall(r"[a-z0-9]+", (text or "").lower()))
+
+
+def shingles(normalized_text, size=SHINGLE_SIZE):
+    tokens = normalized_text.split()
+    if len(tokens) < size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def _shingle_hash(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'big')
+
+
+def minhash(shingle_set):
+    hashes = [_shingle_hash(s) for s in shingle_set]
+    if not hashes:
+        return [_MAX_HASH] * NUM_PERM
+    return [
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def fingerprint(text):
+    """Fingerprint of a resume's text: ``{'sha256': ..., 'minhash': [...]}``.
+
+    Returns None when the text has no usable tokens (e.g. a scanned PDF), so
+    unreadable uploads are never reported as duplicates of each other.
+    """
+    normalized = normalize_text(text)
+    if not normalized:
+        return None
+    return {
+        "sha256": hashlib.sha256(normalized.encode('utf-8')).hexdigest(),
+        "minhash": minhash(shingles(normalized))
+    }
+
+
+def estimated_similarity(signature_a, signature_b):
+    """MinHash estimate of the Jaccard similarity of the two shingle sets."""
+    matches = sum(1 for a, b in zip(signature_a, signature_b) if a == b)
+    return matches / len(signature_a)
+
+
+class FingerprintIndex:
+    """Thread-safe in-memory index answering "which earlier resumes look like this one?"
+
+    Exact matches are found through the SHA-256 of the normalized text;
+    near duplicates through LSH banding of the MinHash signature followed by
+    a similarity check against ``threshold``.
+    """
+
+    def __init__(self, threshold=0.9, bands=LSH_BANDS):
+        if NUM_PERM % bands:
+            raise ValueError("bands must divide the signature length")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self._entries = {}
+        self._by_sha = {}
+        self._buckets = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, tuple(signature[band * self.rows:(band + 1) * self.rows])
+
+    def add(self, key, fp, metadata=None):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = (fp, metadata or {})
+            self._by_sha.setdefault(fp["sha256"], []).append(key)
+            for band, band_key in self._band_keys(fp["minhash"]):
+                self._buckets[band].setdefault(band_key, []).append(key)
+
+    def find(self, fp):
+        """Earlier entries matching ``fp``, best first, as dicts with key, similarity, exact and metadata."""
+        with self._lock:
+            exact = set(self._by_sha.get(fp["sha256"], []))
+            candidates = set(exact)
+            for band, band_key in self._band_keys(fp["minhash"]):
+                candidates.update(self._buckets[band].get(band_key, []))
+
+            matches = []
+            for key in candidates:
+                stored, metadata = self._entries[key]
+                similarity = 1.0 if key in exact else estimated_similarity(fp["minhash"], stored["minhash"])
+                if similarity >= self.threshold:
+                    matches.append({
+                        "key": key,
+                        "similarity": round(similarity, 4),
+                        "exact": key in exact,
+                        "metadata": metadata
+                    })
+
+        matches.sort(key=lambda m: (m["exact"], m["similarity"]), reverse=True)
+        return matches
@@ -0,0 +1,297 @@
+"""
+Rollups
+Pre-aggregated attendance, payroll and review tables for the HR dashboard, kept up to date
+incrementally as rows are ingested, with a rebuild and consistency check.
+
+    python rollups.py --db hr.sqlite rebuild
+    python rollups.py --db hr.sqlite check [--fix]
+
+All functions take a DB-API (sqlite3) connection and leave committing to the caller, so
+ingestion can update facts and rollups in the same transaction. Rollups group by the
+employee's department (and role) at ingest time; after employees change department run
+``rebuild``.
+
+Triggers on the fact tables count every row written to them (and every department or
+role change of an employee) in rollup_changes; ``record`` counts the rows it was told
+about. A writer that changes a fact table without calling ``record`` leaves the two
+apart, and ``is_current`` then reports the rollups as stale (readers fall back to the
+facts until the next ``rebuild``), at the cost of one small-table read rather than a
+scan of the facts.
+"""
+
+import argparse
+import sqlite3
+from datetime import datetime
+
+STATE_TABLE = "rollup_state"
+CHANGES_TABLE = "rollup_changes"
+# Fact table columns the rollups read; writes to other columns don't make them stale.
+SOURCE_COLUMNS = {
+    "attendance": ("employee_id", "date", "absent"),
+    "payroll": ("employee_id", "pay_period", "base_salary"),
+    "reviews": ("employee_id", "review_date", "score"),
+}
+# Moving an employee regroups their facts; record() never covers that, only rebuild() does.
+SOURCES = (*SOURCE_COLUMNS, "employees")
+
+
+def _change_triggers():
+    bump = "UPDATE " + CHANGES_TABLE + " SET changes = changes + 1 WHERE fact = '{fact}'"
+    triggers = {}
+    for fact, columns in SOURCE_COLUMNS.items():
+        for event in ("INSERT", "DELETE", f"UPDATE OF {', '.join(columns)}"):
+            triggers[f"rollup_mark_{fact}_{event.split()[0].lower()}"] = (
+                f"AFTER {event} ON {fact} BEGIN {bump.format(fact=fact)}; END"
+            )
+    triggers["rollup_mark_employees_update"] = (
+        "AFTER UPDATE OF employee_id, dept, role ON employees "
+        "WHEN OLD.employee_id IS NOT NEW.employee_id OR OLD.dept IS NOT NEW.dept OR OLD.role IS NOT NEW.role "
+        f"BEGIN {bump.format(fact='employees')}; END"
+    )
+    triggers["rollup_mark_employees_delete"] = f"AFTER DELETE ON employees BEGIN {bump.format(fact='employees')}; END"
+    return triggers
+
+
+CHANGE_TRIGGERS = _change_triggers()
+
+TABLES = {
+    "rollup_attendance_employee_month": """
+        CREATE TABLE IF NOT EXISTS rollup_attendance_employee_month (
+            employee_id TEXT NOT NULL, month TEXT NOT NULL, days INTEGER NOT NULL, absent_days INTEGER NOT NULL,
+            PRIMARY KEY (employee_id, month))""",
+    "rollup_attendance_dept_month": """
+        CREATE TABLE IF NOT EXISTS rollup_attendance_dept_month (
+            dept TEXT NOT NULL, month TEXT NOT NULL, days INTEGER NOT NULL, absent_days INTEGER NOT NULL,
+            PRIMARY KEY (dept, month))""",
+    "rollup_payroll_dept_period": """
+        CREATE TABLE IF NOT EXISTS rollup_payroll_dept_period (
+            dept TEXT NOT NULL, role TEXT NOT NULL, pay_period TEXT NOT NULL, records INTEGER NOT NULL,
+            salary_sum REAL NOT NULL, salary_min REAL, salary_max REAL,
+            PRIMARY KEY (dept, role, pay_period))""",
+    "rollup_reviews_dept": """
+        CREATE TABLE IF NOT EXISTS rollup_reviews_dept (
+            dept TEXT NOT NULL PRIMARY KEY, score_sum REAL NOT NULL, score_count INTEGER NOT NULL)""",
+}
+
+# Group keys are never NULL (a NULL key would never match ON CONFLICT): unknown values become ''.
+FULL_QUERIES = {
+    "rollup_attendance_employee_month": """
+        SELECT employee_id, COALESCE(substr(date, 1, 7), ''), COUNT(date), COALESCE(SUM(absent), 0)
+        FROM attendance WHERE employee_id IS NOT NULL GROUP BY 1, 2""",
+    "rollup_attendance_dept_month": """
+        SELECT COALESCE(e.dept, ''), COALESCE(substr(a.date, 1, 7), ''), COUNT(a.date), COALESCE(SUM(a.absent), 0)
+        FROM attendance a LEFT JOIN employees e ON e.employee_id = a.employee_id GROUP BY 1, 2""",
+    "rollup_payroll_dept_period": """
+        SELECT COALESCE(e.dept, ''), COALESCE(e.role, ''), COALESCE(p.pay_period, ''), COUNT(p.base_salary),
+               COALESCE(SUM(p.base_salary), 0), MIN(p.base_salary), MAX(p.base_salary)
+        FROM payroll p LEFT JOIN employees e ON e.employee_id = p.employee_id GROUP BY 1, 2, 3""",
+    "rollup_reviews_dept": """
+        SELECT COALESCE(e.dept, ''), COALESCE(SUM(r.score), 0), COUNT(r.score)
+        FROM reviews r LEFT JOIN employees e ON e.employee_id = r.employee_id GROUP BY 1""",
+}
+
+EMPTY_GROUP = {
+    "rollup_attendance_employee_month": "days = 0 AND absent_days = 0",
+    "rollup_attendance_dept_month": "days = 0 AND absent_days = 0",
+    "rollup_payroll_dept_period": "records = 0",
+    "rollup_reviews_dept": "score_count = 0",
+}
+
+# Staging tables for incremental updates: the rows being added (sign +1) or replaced/removed (sign -1).
+DELTA_TABLES = {
+    "attendance": "CREATE TEMP TABLE IF NOT EXISTS _delta_attendance (employee_id TEXT, date TEXT, absent INTEGER, sign INTEGER)",
+    "payroll": "CREATE TEMP TABLE IF NOT EXISTS _delta_payroll (employee_id TEXT, pay_period TEXT, base_salary REAL, sign INTEGER)",
+    "reviews": "CREATE TEMP TABLE IF NOT EXISTS _delta_reviews (employee_id TEXT, review_date TEXT, score REAL, sign INTEGER)",
+}
+
+DELTA_UPDATES = {
+    "attendance": [
+        """INSERT INTO rollup_attendance_employee_month (employee_id, month, days, absent_days)
+           SELECT employee_id, COALESCE(substr(date, 1, 7), ''), SUM(sign * (date IS NOT NULL)),
+                  SUM(sign * COALESCE(absent, 0))
+           FROM _delta_attendance WHERE employee_id IS NOT NULL GROUP BY 1, 2
+           ON CONFLICT (employee_id, month) DO UPDATE SET
+               days = days + excluded.days, absent_days = absent_days + excluded.absent_days""",
+        """INSERT INTO rollup_attendance_dept_month (dept, month, days, absent_days)
+           SELECT COALESCE(e.dept, ''), COALESCE(substr(d.date, 1, 7), ''), SUM(d.sign * (d.date IS NOT NULL)),
+                  SUM(d.sign * COALESCE(d.absent, 0))
+           FROM _delta_attendance d LEFT JOIN employees e ON e.employee_id = d.employee_id WHERE true GROUP BY 1, 2
+           ON CONFLICT (dept, month) DO UPDATE SET
+               days = days + excluded.days, absent_days = absent_days + excluded.absent_days""",
+    ],
+    "payroll": [
+        """INSERT INTO rollup_payroll_dept_period (dept, role, pay_period, records, salary_sum, salary_min, salary_max)
+           SELECT COALESCE(e.dept, ''), COALESCE(e.role, ''), COALESCE(d.pay_period, ''),
+                  SUM(d.sign * (d.base_salary IS NOT NULL)), COALESCE(SUM(d.sign * d.base_salary), 0),
+                  MIN(CASE WHEN d.sign > 0 THEN d.base_salary END), MAX(CASE WHEN d.sign > 0 THEN d.base_salary END)
+           FROM _delta_payroll d LEFT JOIN employees e ON e.employee_id = d.employee_id WHERE true GROUP BY 1, 2, 3
+           ON CONFLICT (dept, role, pay_period) DO UPDATE SET
+               records = records + excluded.records,
+               salary_sum = salary_sum + excluded.salary_sum,
+               salary_min = MIN(COALESCE(salary_min, excluded.salary_min), COALESCE(excluded.salary_min, salary_min)),
+               salary_max = MAX(COALESCE(salary_max, excluded.salary_max), COALESCE(excluded.salary_max, salary_max))""",
+        # A removed salary may have been the group's min or max; those groups are recomputed from the facts.
+        """UPDATE rollup_payroll_dept_period AS r SET (salary_min, salary_max) = (
+               SELECT MIN(p.base_salary), MAX(p.base_salary)
+               FROM payroll p LEFT JOIN employees e ON e.employee_id = p.employee_id
+               WHERE COALESCE(e.dept, '') = r.dept AND COALESCE(e.role, '') = r.role
+                 AND COALESCE(p.pay_period, '') = r.pay_period)
+           WHERE (r.dept, r.role, r.pay_period) IN (
+               SELECT COALESCE(e.dept, ''), COALESCE(e.role, ''), COALESCE(d.pay_period, '')
+               FROM _delta_payroll d LEFT JOIN employees e ON e.employee_id = d.employee_id WHERE d.sign < 0)""",
+    ],
+    "reviews": [
+        """INSERT INTO rollup_reviews_dept (dept, score_sum, score_count)
+           SELECT COALESCE(e.dept, ''), COALESCE(SUM(d.sign * d.score), 0), SUM(d.sign * (d.score IS NOT NULL))
+           FROM _delta_reviews d LEFT JOIN employees e ON e.employee_id = d.employee_id WHERE true GROUP BY 1
+           ON CONFLICT (dept) DO UPDATE SET
+               score_sum = score_sum + excluded.score_sum, score_count = score_count + excluded.score_count""",
+    ],
+}
+
+
+def create_tables(conn):
+    for ddl in TABLES.values():
+        conn.execute(ddl)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {STATE_TABLE} (name TEXT PRIMARY KEY, rebuilt_at TEXT)")
+    # changes: rows written, counted by the triggers; synced: rows the rollups account for.
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {CHANGES_TABLE} "
+                 "(fact TEXT PRIMARY KEY, changes INTEGER NOT NULL, synced INTEGER NOT NULL)")
+    for name, body in CHANGE_TRIGGERS.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def is_built(conn):
+    """Whether the rollups exist and have been filled (the dashboard falls back to the facts otherwise)."""
+    exists = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = ?", (STATE_TABLE,)
+    ).fetchall()[0][0]
+    if not exists:
+        return False
+    return bool(conn.execute(f"SELECT COUNT(*) FROM {STATE_TABLE} WHERE name = 'rollups'").fetchall()[0][0])
+
+
+def stale_sources(conn):
+    """Source tables written since the last rebuild in ways ``record`` doesn't account for."""
+    exists = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = ?", (CHANGES_TABLE,)
+    ).fetchall()[0][0]
+    # Rollups built before the changes were tracked can't be vouched for.
+    in_sync = {fact for fact, changes, synced in conn.execute(
+        f"SELECT fact, changes, synced FROM {CHANGES_TABLE}"
+    ).fetchall() if changes == synced} if exists else set()
+    return [fact for fact in SOURCES if fact not in in_sync]
+
+
+def is_current(conn):
+    """Whether the rollups are built and no fact table was written behind their back."""
+    return is_built(conn) and not stale_sources(conn)
+
+
+def rebuild(conn):
+    """Recompute every rollup from the fact tables."""
+    create_tables(conn)
+    for table, query in FULL_QUERIES.items():
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute(f"INSERT INTO {table} {query}")
+    conn.execute(f"DELETE FROM {CHANGES_TABLE}")
+    conn.executemany(f"INSERT INTO {CHANGES_TABLE} (fact, changes, synced) VALUES (?, 0, 0)",
+                     [(fact,) for fact in SOURCES])
+    conn.execute(
+        f"INSERT INTO {STATE_TABLE} (name, rebuilt_at) VALUES ('rollups', ?) "
+        "ON CONFLICT (name) DO UPDATE SET rebuilt_at = excluded.rebuilt_at",
+        (datetime.utcnow().isoformat(),)
+    )
+
+
+def ensure_rollups(conn):
+    """Build the rollups if this database doesn't have them yet, or rebuild them if they no longer
+    match the facts; returns True if it (re)built them."""
+    if is_built(conn):
+        create_tables(conn)
+        stale = stale_sources(conn)
+        if not stale and not any(check(conn).values()):
+            return False
+        print(f"HR rollups no longer match {', '.join(stale) or 'the facts'}; rebuilding")
+    rebuild(conn)
+    return True
+
+
+def check(conn):
+    """Rows that differ between each stored rollup and a fresh aggregate of the facts (0 everywhere = consistent)."""
+    mismatches = {}
+    for table, query in FULL_QUERIES.items():
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+        # Sums of floats may differ in the last bits depending on the order they were added in.
+        rounded = ", ".join(f"ROUND({c}, 4)" if c.startswith(("salary", "score_sum")) else c for c in columns)
+        conn.execute("DROP TABLE IF EXISTS temp._expected")
+        conn.execute(f"CREATE TEMP TABLE _expected AS SELECT * FROM {table} WHERE 0")
+        conn.execute(f"INSERT INTO _expected {query}")
+        expected = f"SELECT {rounded} FROM _expected"
+        # Groups whose rows were all removed stay behind with zero counts; they are not a mismatch.
+        stored = f"SELECT {rounded} FROM {table} WHERE NOT ({EMPTY_GROUP[table]})"
+        missing = conn.execute(f"SELECT COUNT(*) FROM ({expected} EXCEPT {stored})").fetchall()[0][0]
+        extra = conn.execute(f"SELECT COUNT(*) FROM ({stored} EXCEPT {expected})").fetchall()[0][0]
+        mismatches[table] = missing + extra
+    conn.execute("DROP TABLE IF EXISTS temp._expected")
+    return mismatches
+
+
+def record(conn, fact, added=(), removed=()):
+    """Apply rows added to (or removed from) the ``fact`` table to its rollups.
+
+    ``fact`` is attendance, payroll or reviews; rows are
+    (employee_id, date, absent), (employee_id, pay_period, base_salary) or
+    (employee_id, review_date, score). Call after the fact table itself was
+    written, with a replaced row passed as removed (old values) and added
+    (new values). Every row written counts once: an insert is only added, a
+    delete only removed, an update both. Does nothing if the rollups have not
+    been built.
+    """
+    if not is_built(conn):
+        return
+    create_tables(conn)
+    added, removed = list(added), list(removed)
+    delta = f"_delta_{fact}"
+    conn.execute(DELTA_TABLES[fact])
+    conn.execute(f"DELETE FROM {delta}")
+    conn.executemany(f"INSERT INTO {delta} VALUES (?, ?, ?, 1)", added)
+    conn.executemany(f"INSERT INTO {delta} VALUES (?, ?, ?, -1)", removed)
+    for statement in DELTA_UPDATES[fact]:
+        conn.execute(statement)
+    conn.execute(f"UPDATE {CHANGES_TABLE} SET synced = synced + ? WHERE fact = ?",
+                 (max(len(added), len(removed)), fact))
+    conn.execute(f"DELETE FROM {delta}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='hr.sqlite')
+    parser.add_argument('command', choices=['rebuild', 'check'])
+    parser.add_argument('--fix', action='store_true', help="with check: rebuild when anything is off")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.command == 'rebuild':
+            rebuild(conn)
+            conn.commit()
+            print("Rollups rebuilt")
+            return
+        create_tables(conn)
+        mismatches = check(conn)
+        for table, count in mismatches.items():
+            print(f"{table}: {'OK' if count == 0 else f'{count} rows differ'}")
+        if any(mismatches.values()):
+            if args.fix:
+                rebuild(conn)
+                conn.commit()
+                print("Rollups rebuilt")
+            else:
+                raise SystemExit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
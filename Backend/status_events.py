@@ -0,0 +1,114 @@
+"""
+Status Events
+In-process bus of application status transitions for the push (SSE / long-poll) endpoints,
+optionally fed from a MongoDB change stream
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+# Document fields carried in an event besides the status itself.
+EVENT_FIELDS = ("job_id", "score", "review", "error", "duplicate")
+
+
+def status_event(application_id, status, fields=None):
+    event = {"application_id": application_id, "status": status}
+    for key, value in (fields or {}).items():
+        if key in EVENT_FIELDS:
+            event[key] = value
+    event["at"] = datetime.utcnow().isoformat() + "Z"
+    return event
+
+
+class StatusEventBus:
+    """Keeps the last ``history_size`` events, each numbered with an increasing ``seq``.
+
+    Listeners remember the last seq they saw and ask for anything newer, so
+    an event published between two waits is never lost (as long as it is
+    still in the history).
+    """
+
+    def __init__(self, history_size=5000):
+        self._events = deque(maxlen=history_size)
+        self._seq = 0
+        self._condition = threading.Condition()
+
+    @property
+    def last_seq(self):
+        return self._seq
+
+    def covers(self, after_seq):
+        """Whether every event after ``after_seq`` is still available from this bus.
+
+        False when they have dropped out of the history or the cursor comes
+        from before a restart; the caller should re-read the current state.
+        """
+        with self._condition:
+            if after_seq > self._seq:
+                return False
+            return not self._events or self._events[0]["seq"] <= after_seq + 1
+
+    def publish(self, event):
+        with self._condition:
+            self._seq += 1
+            self._events.append({**event, "seq": self._seq})
+            self._condition.notify_all()
+            return self._seq
+
+    def _matching(self, after_seq, application_ids):
+        return [
+            event for event in self._events
+            if event["seq"] > after_seq and (application_ids is None or event["application_id"] in application_ids)
+        ]
+
+    def wait(self, after_seq=0, application_ids=None, timeout=30.0):
+        """Events newer than ``after_seq`` (optionally only for ``application_ids``), waiting up to ``timeout``.
+
+        Returns an empty list on timeout.
+        """
+        if application_ids is not None:
+            application_ids = set(application_ids)
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                events = self._matching(after_seq, application_ids)
+                remaining = deadline - time.monotonic()
+                if events or remaining <= 0:
+                    return events
+                # Nothing so far matched, so there is no need to rescan it on the next wakeup.
+                after_seq = self._seq
+                self._condition.wait(remaining)
+
+
+def follow_change_stream(collection, bus, ready=None):
+    """Publish status changes of ``collection`` from a MongoDB change stream until it fails.
+
+    Needs a replica set or sharded cluster; on a standalone server the watch
+    is refused, ``ready(False)`` is called and the function returns.
+    ``ready(True)`` is called once the stream is open.
+    """
+    pipeline = [{
+        "$match": {
+            "operationType": {"$in": ["insert", "update", "replace"]},
+            "$or": [
+                {"operationType": {"$ne": "update"}},
+                {"updateDescription.updatedFields.status": {"$exists": True}}
+            ]
+        }
+    }]
+    try:
+        with collection.watch(pipeline, full_document='updateLookup') as stream:
+            if ready:
+                ready(True)
+            for change in stream:
+                doc = change.get("fullDocument")
+                if doc and doc.get("status"):
+                    bus.publish(status_event(doc["application_id"], doc["status"], doc))
+    except Exception as e:
+        print(f"Status change stream unavailable: {e}")
+        if ready:
+            ready(False)
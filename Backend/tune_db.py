@@ -0,0 +1,111 @@
+"""
+Index and tuning migration for hr.sqlite.
+
+Creates the secondary indexes declared in orm.py, switches the database to
+WAL and runs ANALYZE. Every HRAnalytics method is timed and the query plan
+of each statement it runs is captured before and after, so the effect of
+the migration is visible per analysis. Connection pragmas (cache_size,
+mmap_size, ...) are applied by orm.install_pragmas on every connection.
+
+    python tune_db.py --db hr.sqlite --output tune_report.json
+    python tune_db.py --db hr.sqlite --report-only
+"""
+
+import argparse
+import json
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from Analytics import HRAnalytics
+from orm import Base, install_pragmas, migrate_mappings_log
+
+
+def migrate(engine):
+    """Add missing indexes and keys, switch to WAL and refresh the planner statistics; returns what was done."""
+    created = []
+    with engine.begin() as conn:
+        mappings_log_keyed = migrate_mappings_log(conn.connection.dbapi_connection)
+        for table in Base.metadata.sorted_tables:
+            existing = {row[1] for row in conn.exec_driver_sql(f"PRAGMA index_list('{table.name}')")}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(conn)
+                    created.append(index.name)
+    with engine.connect() as conn:
+        journal_mode = conn.exec_driver_sql("PRAGMA journal_mode=WAL").scalar()
+        conn.exec_driver_sql("ANALYZE")
+        conn.commit()
+    return {"indexes_created": created, "mappings_log_keyed": mappings_log_keyed, "journal_mode": journal_mode}
+
+
+def _explain(conn, statement, parameters):
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def profile(engine, repeat=3):
+    """Best-of-``repeat`` time and the query plans of every HRAnalytics method."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    Session = sessionmaker(bind=engine)
+    report = {}
+    for name in HRAnalytics.ANALYSES:
+        timings = []
+        for attempt in range(repeat):
+            session = Session()
+            if attempt == 0:
+                statements.clear()
+                event.listen(engine, "before_cursor_execute", capture)
+            try:
+                timings.append(HRAnalytics(session).run_analysis(name)[1])
+            finally:
+                if attempt == 0:
+                    event.remove(engine, "before_cursor_execute", capture)
+                session.close()
+        with engine.connect() as conn:
+            plans = [
+                {"sql": " ".join(statement.split())[:200], "plan": _explain(conn, statement, parameters)}
+                for statement, parameters in statements
+            ]
+        report[name] = {"seconds": min(timings), "queries": len(plans), "plans": plans}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='hr.sqlite')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--report-only', action='store_true', help="profile without migrating")
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    # "before" runs with default connection settings, "after" with the tuned ones.
+    plain = create_engine(f"sqlite:///{args.db}")
+    report = {"db": args.db, "before": profile(plain, args.repeat)}
+    plain.dispose()
+
+    if not args.report_only:
+        tuned = install_pragmas(create_engine(f"sqlite:///{args.db}"))
+        report["migration"] = migrate(tuned)
+        report["after"] = profile(tuned, args.repeat)
+        report["speedup"] = {
+            name: round(report["before"][name]["seconds"] / max(report["after"][name]["seconds"], 1e-6), 2)
+            for name in HRAnalytics.ANALYSES
+        }
+        tuned.dispose()
+
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+        print(f"Report written to {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
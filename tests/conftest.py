@@ -1,5 +1,15 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
 import pytest
 
+# Backend modules import each other as top-level modules (the services run from Backend/
+# and Backend/Applications/).
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Backend")
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "Applications"))
+
 class MockResponse:
     def __init__(self, status_code=200, json_data=None):
         self.status_code = status_code
@@ -110,3 +120,36 @@ def hr_client():
 @pytest.fixture
 def rag_client():
     return MockClient()
+
+
+@pytest.fixture
+def hr_sessions(tmp_path):
+    """Sessions on a small HR database (30 employees) in a temporary file."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from orm import Attendance, Base, Employee, Event, KPIOverview, Payroll, Review
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'hr.sqlite'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    now = datetime.now()
+    depts = ["Engineering", "Sales", "HR"]
+    for i in range(30):
+        employee_id = f"E{i:03d}"
+        session.add(Employee(employee_id=employee_id, first_name=f"First{i}", last_name=f"Last{i}",
+                             email=f"e{i}@example.com", dept=depts[i % 3], role=["Engineer", "Manager"][i % 2],
+                             location="Pune", hire_date=now - timedelta(days=40 * i + 10)))
+        session.add(Payroll(employee_id=employee_id, email=f"e{i}@example.com", base_salary=50000 + 1000 * i,
+                            currency="INR", pay_period="2024-06"))
+        session.add(Review(employee_id=employee_id, review_date=datetime(2024, 6, 1), score=1 + i % 5))
+        for day in range(5):
+            session.add(Attendance(employee_id=employee_id, date=datetime(2024, 6, 3 + day),
+                                   absent=int((i + day) % 7 == 0)))
+        if i % 10 == 0:
+            session.add(Event(employee_id=employee_id, event_type="Termination", event_date=datetime(2024, 5, 1)))
+    session.add(KPIOverview(headcount=30, terminations=3, turnover_rate=0.1))
+    session.commit()
+    session.close()
+    yield Session
+    engine.dispose()
@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+from admission import AdmissionController, QueueFull
+
+
+def occupy_worker(controller, job_id):
+    """Submit a task that holds a worker until the returned event is set."""
+    started, release = threading.Event(), threading.Event()
+
+    def hold():
+        started.set()
+        return release.wait()
+
+    future = controller.submit(job_id, hold)
+    assert started.wait(timeout=5)
+    return future, release
+
+
+def test_runs_work_and_returns_results():
+    controller = AdmissionController(max_workers=2, max_queue=10)
+    futures = [controller.submit("JOB1", pow, 2, n) for n in range(5)]
+    assert [f.result(timeout=5) for f in futures] == [1, 2, 4, 8, 16]
+    assert controller.stats()["completed"] == 5
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    controller = AdmissionController(max_workers=1, max_queue=1)
+    running, release = occupy_worker(controller, "JOB1")
+    queued = controller.submit("JOB1", release.wait)
+
+    with pytest.raises(QueueFull) as excinfo:
+        controller.submit("JOB1", release.wait)
+    assert excinfo.value.retry_after >= 1
+    assert controller.stats()["rejected"] == 1
+
+    release.set()
+    assert running.result(timeout=5) and queued.result(timeout=5)
+
+
+def test_jobs_are_served_round_robin():
+    order = []
+    controller = AdmissionController(max_workers=1, max_queue=20)
+    blocker, gate = occupy_worker(controller, "BIG")
+
+    for n in range(4):
+        controller.submit("BIG", order.append, f"big-{n}")
+    small = controller.submit("SMALL", order.append, "small-0")
+    assert controller.stats()["queued_by_job"] == {"BIG": 4, "SMALL": 1}
+
+    gate.set()
+    blocker.result(timeout=5)
+    small.result(timeout=5)
+    assert order.index("small-0") <= 1
+
+
+def test_exceptions_propagate_to_the_caller():
+    controller = AdmissionController(max_workers=1, max_queue=5)
+    future = controller.submit("JOB1", int, "not a number")
+    with pytest.raises(ValueError):
+        future.result(timeout=5)
@@ -0,0 +1,83 @@
+import json
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pandas")
+
+from Analytics import HRAnalytics
+from orm import Payroll, Review
+
+
+def test_parallel_run_matches_sequential_and_records_timings(hr_sessions):
+    session = hr_sessions()
+    analytics = HRAnalytics(session)
+    sequential = analytics.run_all_analyses()
+    parallel = analytics.run_all_analyses(parallel=True, session_factory=hr_sessions, max_workers=4)
+    session.close()
+
+    assert list(parallel) == HRAnalytics.ANALYSES
+    assert json.dumps(parallel, sort_keys=True) == json.dumps(sequential, sort_keys=True)
+    assert set(analytics.timings) == set(HRAnalytics.ANALYSES) | {"total"}
+    assert parallel["turnover_metrics"]["terminations"] == 3
+
+
+def test_tenure_and_hiring_trends_from_columns(hr_sessions):
+    session = hr_sessions()
+    analytics = HRAnalytics(session)
+
+    tenure = analytics.analyze_tenure_distribution()
+    assert sum(tenure["tenure_brackets"].values()) == 30
+    assert tenure["tenure_brackets"]["0-1 years"] == 9  # hired 10, 50, ..., 330 days ago
+    assert set(tenure["dept_avg_tenure"]) == {"Engineering", "Sales", "HR"}
+
+    assert analytics.analyze_hiring_trends() == {
+        "recent_hires_count": 5, "by_department": {"Engineering": 2, "Sales": 2, "HR": 1}
+    }
+    assert analytics.analyze_hiring_trends_by_role() == {"Engineer": 3, "Manager": 2}
+    session.close()
+
+
+def test_performance_vs_compensation_is_one_bounded_point_per_employee(hr_sessions):
+    session = hr_sessions()
+    # More history for one employee must not add points: latest review, latest pay period.
+    session.add(Review(employee_id="E000", review_date=datetime(2023, 6, 1), score=5))
+    session.add(Payroll(employee_id="E000", email="e0@example.com", base_salary=10.0, currency="INR",
+                        pay_period="2024-05"))
+    session.commit()
+
+    result = HRAnalytics(session).analyze_performance_vs_compensation(sample_size=10)
+    assert result["employees"] == 30
+    assert len(result["sample"]) == 10
+    assert sum(map(sum, result["histogram"]["counts"])) == 30
+    assert len(result["histogram"]["score_edges"]) == 6 and len(result["histogram"]["salary_edges"]) == 11
+    assert -1 <= result["correlation"]["pearson"] <= 1
+
+    full = HRAnalytics(session).analyze_performance_vs_compensation(sample_size=30)
+    e000 = next(point for point in full["sample"] if point["name"] == "First0 Last0")
+    assert e000 == {"name": "First0 Last0", "performance": 1.0, "compensation": 50000.0}
+    averaged = HRAnalytics(session).analyze_performance_vs_compensation(score_basis="average", sample_size=30)
+    assert next(p for p in averaged["sample"] if p["name"] == "First0 Last0")["performance"] == 3.0
+    session.close()
+
+
+def test_performance_vs_compensation_without_sortable_pay_periods(hr_sessions):
+    session = hr_sessions()
+    # hr.sqlite stores the pay frequency in pay_period: the row written last is the current salary.
+    session.query(Payroll).filter_by(employee_id="E001").delete()
+    session.add(Payroll(employee_id="E001", email="e1@example.com", base_salary=70000.0, currency="INR",
+                        pay_period="monthly"))
+    session.commit()
+    session.add(Payroll(employee_id="E001", email="e1@example.com", base_salary=80000.0, currency="INR",
+                        pay_period="annual"))
+    # A dated period still outranks a frequency label.
+    session.add(Payroll(employee_id="E002", email="e2@example.com", base_salary=10.0, currency="INR",
+                        pay_period="monthly"))
+    session.commit()
+
+    sample = HRAnalytics(session).analyze_performance_vs_compensation(sample_size=30)["sample"]
+    salaries = {point["name"]: point["compensation"] for point in sample}
+    assert salaries["First1 Last1"] == 80000.0
+    assert salaries["First2 Last2"] == 52000.0
+    session.close()
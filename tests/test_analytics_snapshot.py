@@ -0,0 +1,53 @@
+import threading
+
+from analytics_snapshot import MaterializedSnapshot
+
+
+def wait_for(condition):
+    for _ in range(200):
+        if condition():
+            return True
+        threading.Event().wait(0.01)
+    return False
+
+
+def test_serves_stale_snapshot_while_refreshing_in_background():
+    state = {"version": 1, "computed": 0}
+    release = threading.Event()
+
+    def compute():
+        state["computed"] += 1
+        if state["computed"] > 1:
+            release.wait(5)
+        return f"summary-{state['computed']}"
+
+    snapshot = MaterializedSnapshot(compute, lambda: state["version"], check_interval=0)
+    assert snapshot.warm().value == "summary-1"
+    assert snapshot.get() == snapshot.get()
+    assert state["computed"] == 1
+
+    state["version"] = 2
+    stale = snapshot.get()
+    assert stale.value == "summary-1" and stale.stale
+    assert snapshot.get().value == "summary-1"  # still refreshing; no second computation starts
+    release.set()
+    assert wait_for(lambda: not snapshot.get().stale)
+    assert snapshot.get().value == "summary-2" and snapshot.get().version == 2
+    assert state["computed"] == 2
+
+
+def test_failed_refresh_keeps_serving_the_last_snapshot():
+    state = {"version": 1, "fail": False}
+
+    def compute():
+        if state["fail"]:
+            raise RuntimeError("database is locked")
+        return "summary"
+
+    snapshot = MaterializedSnapshot(compute, lambda: state["version"], check_interval=0)
+    snapshot.warm()
+    state.update(version=2, fail=True)
+    assert snapshot.get().stale
+    assert wait_for(lambda: snapshot.last_error == "database is locked")
+    assert snapshot.get().value == "summary"
+    assert snapshot.stats()["version"] == 1
@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from application_records import merge_legacy, new_application, status_update
+
+
+def test_transition_sets_fields_and_appends_history_in_one_update():
+    now = datetime(2024, 3, 1, 12, 0)
+    update = status_update("failed", {"error": "Scoring failed", "stage_timings": {"total": 1.5}}, now)
+
+    assert update["$set"] == {"error": "Scoring failed", "stage_timings": {"total": 1.5},
+                              "status": "failed", "updated_at": now}
+    assert update["$push"] == {"status_history": {"status": "failed", "at": now, "error": "Scoring failed"}}
+
+
+def test_new_application_starts_its_history():
+    now = datetime(2024, 3, 1, 12, 0)
+    doc = new_application("A1", "J1", "Ada", "ada@example.com", now=now, resume_sha256="abc")
+
+    assert doc["status"] == "pending"
+    assert doc["status_history"] == [{"status": "pending", "at": now}]
+    assert doc["submitted_at"] == now
+    assert doc["resume_sha256"] == "abc"
+
+
+def test_merge_legacy_combines_both_collections():
+    created = datetime(2024, 3, 1, 12, 0)
+    completed = datetime(2024, 3, 1, 12, 5)
+    status_doc = {"_id": 1, "application_id": "A1", "user_name": "Ada", "user_email": "ada@example.com",
+                  "job_id": "J1", "status": "completed", "file_link": "https://drive/x", "score": 80,
+                  "created_at": created, "updated_at": completed, "completed_at": completed}
+    application_doc = {"_id": 2, "application_id": "A1", "job_id": "J1", "name": "Ada", "email": "ada@example.com",
+                       "resume_link": "https://drive/x", "score": 80, "review": "Strong", "submitted_at": completed}
+
+    merged = merge_legacy(status_doc, application_doc)
+
+    assert "_id" not in merged and "user_name" not in merged and "created_at" not in merged
+    assert merged["name"] == "Ada" and merged["review"] == "Strong"
+    assert merged["submitted_at"] == created
+    assert merged["status_history"] == [{"status": "pending", "at": created}, {"status": "completed", "at": completed}]
+
+
+def test_merge_legacy_marks_untracked_applications_completed():
+    submitted = datetime(2023, 1, 1)
+    merged = merge_legacy(None, {"application_id": "A0", "job_id": "J1", "score": 50, "submitted_at": submitted})
+
+    assert merged["status"] == "completed"
+    assert merged["status_history"] == [{"status": "completed", "at": submitted}]
+
+    pending = merge_legacy({"application_id": "A2", "status": "pending", "created_at": submitted}, None)
+    assert pending["status_history"] == [{"status": "pending", "at": submitted}]
@@ -0,0 +1,67 @@
+import hashlib
+import io
+import os
+import time
+
+import pytest
+
+from blob_store import BlobNotFound, BlobStore
+
+
+def age(store, ref, seconds):
+    past = time.time() - seconds
+    os.utime(store.path(ref), (past, past))
+
+
+def test_put_returns_sha256_and_stores_once(tmp_path):
+    store = BlobStore(str(tmp_path))
+    data = b"%PDF-1.4 resume"
+    ref = store.put_stream(io.BytesIO(data))
+    assert ref == hashlib.sha256(data).hexdigest()
+    assert store.put_bytes(data) == ref
+    assert store.usage() == {"blobs": 1, "bytes": len(data)}
+    with store.open(ref) as f:
+        assert f.read() == data
+    assert not [name for name in os.listdir(tmp_path) if name.startswith('.incoming-')]
+
+
+def test_rejects_malformed_and_missing_refs(tmp_path):
+    store = BlobStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.path("../../etc/passwd")
+    with pytest.raises(BlobNotFound):
+        store.open("0" * 64)
+
+
+def test_cleanup_removes_expired_then_oldest_over_budget(tmp_path):
+    store = BlobStore(str(tmp_path))
+    expired = store.put_bytes(b"a" * 10)
+    older = store.put_bytes(b"b" * 10)
+    newer = store.put_bytes(b"c" * 10)
+    age(store, expired, 100)
+    age(store, older, 20)
+    age(store, newer, 10)
+
+    result = store.cleanup(max_age_seconds=50, max_bytes=10)
+    assert result == {"removed_blobs": 2, "removed_bytes": 20}
+    assert not store.exists(expired)
+    assert not store.exists(older)
+    assert store.exists(newer)
+
+
+def test_rewriting_a_blob_keeps_it_from_expiring(tmp_path):
+    store = BlobStore(str(tmp_path))
+    ref = store.put_bytes(b"resume")
+    age(store, ref, 100)
+    store.put_bytes(b"resume")
+    store.cleanup(max_age_seconds=50)
+    assert store.exists(ref)
+
+
+def test_spool_directory_is_created_by_the_first_write(tmp_path):
+    store = BlobStore(str(tmp_path / "spool"))
+    assert not os.path.exists(store.root)
+    assert store.usage() == {"blobs": 0, "bytes": 0}
+    assert store.cleanup(0) == {"removed_blobs": 0, "removed_bytes": 0}
+    ref = store.put_bytes(b"resume")
+    assert store.exists(ref)
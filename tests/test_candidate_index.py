@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("chromadb")
+
+import candidate_index
+
+SUBMITTED = datetime(2025, 3, 1, 12, 0)  # naive UTC, as stored by datetime.utcnow()
+
+
+@pytest.fixture
+def collection(tmp_path):
+    collection = candidate_index.get_collection(str(tmp_path / "chroma"))
+    candidate_index.index_applications([
+        {"application_id": "A1", "embedding": [1.0, 0.0, 0.0], "document": "python", "job_id": "J1",
+         "score": 80, "submitted_at": SUBMITTED},
+        {"application_id": "A2", "embedding": [0.9, 0.1, 0.0], "document": "python sql", "job_id": "J2",
+         "score": 55, "submitted_at": SUBMITTED - timedelta(days=30)},
+        {"application_id": "A3", "embedding": [0.0, 1.0, 0.0], "document": "sales", "job_id": "J1",
+         "score": 90, "submitted_at": SUBMITTED - timedelta(days=1)},
+    ], collection=collection)
+    return collection
+
+
+def test_naive_datetimes_are_stored_as_utc(collection):
+    stored = collection.get(ids=["A1"], include=["metadatas"])["metadatas"][0]
+    assert stored == {"job_id": "J1", "score": 80.0,
+                      "submitted_at": SUBMITTED.replace(tzinfo=timezone.utc).timestamp()}
+
+
+def test_top_candidates_returns_metadata_in_similarity_order(collection):
+    matches = candidate_index.top_candidates([1.0, 0.0, 0.0], n_results=3, collection=collection)
+    assert [m["application_id"] for m in matches] == ["A1", "A2", "A3"]
+    assert matches[0] == {"application_id": "A1", "job_id": "J1", "score": 80.0,
+                          "submitted_at": "2025-03-01T12:00:00+00:00", "similarity": 1.0}
+
+
+def test_filters_by_min_score_since_and_job_id(collection):
+    query = [1.0, 0.0, 0.0]
+    assert {m["application_id"] for m in candidate_index.top_candidates(
+        query, min_score=60, collection=collection)} == {"A1", "A3"}
+    # Naive and aware cut-offs mean the same instant.
+    for since in (SUBMITTED - timedelta(days=1), (SUBMITTED - timedelta(days=1)).replace(tzinfo=timezone.utc)):
+        assert {m["application_id"] for m in candidate_index.top_candidates(
+            query, since=since, collection=collection)} == {"A1", "A3"}
+    assert [m["application_id"] for m in candidate_index.top_candidates(
+        query, min_score=85, since=SUBMITTED - timedelta(days=7), job_id="J1", collection=collection)] == ["A3"]
+
+
+def test_upsert_replaces_and_similar_candidates_excludes_itself(collection):
+    candidate_index.index_application("A2", [0.0, 0.9, 0.1], "sales ops", "J2", 70, SUBMITTED, collection=collection)
+    assert collection.count() == 3
+    assert [m["application_id"] for m in candidate_index.similar_candidates(
+        "A3", n_results=1, collection=collection)] == ["A2"]
+    assert candidate_index.similar_candidates("missing", collection=collection) is None
@@ -0,0 +1,212 @@
+import json
+import os
+import re
+import threading
+import uuid
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+pytest.importorskip("google_auth_oauthlib")
+
+from drive_client import DriveClientManager
+
+
+class FakeDrive:
+    """Just enough of the Drive v3 API (token refresh, resumable upload, get, batch) to talk to."""
+
+    def __init__(self):
+        self.files = {}
+        self.sessions = {}
+        self.refreshes = 0
+        self.unauthorized = 0
+        self.lock = threading.Lock()
+
+
+def make_handler(drive):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _body(self):
+            return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        def _send(self, status, body=b"", headers=None, content_type='application/json'):
+            if isinstance(body, dict):
+                body = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _authorized(self):
+            if self.headers.get('Authorization') != 'Bearer fresh-token':
+                with drive.lock:
+                    drive.unauthorized += 1
+                self._send(401, {"error": "unauthorized"})
+                return False
+            return True
+
+        def _metadata(self, file_id):
+            stored = drive.files.get(file_id)
+            if stored is None:
+                return 404, {"error": {"code": 404, "message": "File not found"}}
+            return 200, {"id": file_id, "name": stored["name"], "size": str(len(stored["content"]))}
+
+        def do_POST(self):
+            path = urlparse(self.path).path
+            if path == '/token':
+                self._body()
+                with drive.lock:
+                    drive.refreshes += 1
+                self._send(200, {"access_token": "fresh-token", "expires_in": 3600, "token_type": "Bearer"})
+            elif path == '/upload/drive/v3/files':
+                metadata = json.loads(self._body() or b"{}")
+                if not self._authorized():
+                    return
+                session_id = uuid.uuid4().hex
+                with drive.lock:
+                    drive.sessions[session_id] = {"metadata": metadata, "content": b""}
+                host = self.headers['Host']
+                self._send(200, headers={'Location': f"http://{host}/upload-session/{session_id}"})
+            elif path == '/batch/drive/v3':
+                self._batch()
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_PUT(self):
+            session_id = urlparse(self.path).path.rsplit('/', 1)[-1]
+            chunk = self._body()
+            session = drive.sessions[session_id]
+            session["content"] += chunk
+            start, end, total = map(int, re.match(r"bytes (\d+)-(\d+)/(\d+)", self.headers['Content-Range']).groups())
+            if end + 1 < total:
+                self._send(308, headers={'Range': f"bytes=0-{end}"})
+                return
+            file_id = uuid.uuid4().hex
+            with drive.lock:
+                drive.files[file_id] = {"name": session["metadata"]["name"], "content": session["content"]}
+            self._send(200, {"id": file_id, "name": session["metadata"]["name"], "size": str(total)})
+
+        def do_GET(self):
+            if not self._authorized():
+                return
+            parsed = urlparse(self.path)
+            file_id = parsed.path.rsplit('/', 1)[-1]
+            if 'alt=media' in parsed.query:
+                self._send(200, drive.files[file_id]["content"], content_type='application/pdf')
+            else:
+                self._send(*self._metadata(file_id))
+
+        def _batch(self):
+            body = self._body()
+            message = BytesParser().parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+            )
+            boundary = "batch_" + uuid.uuid4().hex
+            parts = []
+            for part in message.get_payload():
+                # Long Content-IDs arrive folded over two lines.
+                content_id = " ".join(part['Content-ID'].split())
+                request_line = part.get_payload().split("\n", 1)[0].strip()
+                _, target, _ = request_line.split(" ", 2)
+                status, payload = self._metadata(urlparse(target).path.rsplit('/', 1)[-1])
+                parts.append(
+                    f"--{boundary}\r\nContent-Type: application/http\r\n"
+                    f"Content-ID: <response-{content_id[1:-1]}>\r\n\r\n"
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Not Found'}\r\n"
+                    f"Content-Type: application/json\r\n\r\n{json.dumps(payload)}\r\n"
+                )
+            response = ("".join(parts) + f"--{boundary}--\r\n").encode()
+            self._send(200, response, content_type=f"multipart/mixed; boundary={boundary}")
+
+    return Handler
+
+
+@pytest.fixture
+def fake_drive(tmp_path):
+    drive = FakeDrive()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(drive))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    root = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    token_path = tmp_path / "token.json"
+    token_path.write_text(json.dumps({
+        "token": "stale-token",
+        "refresh_token": "refresh-me",
+        "client_id": "client",
+        "client_secret": "secret",
+        "scopes": ["https://www.googleapis.com/auth/drive"],
+        "expiry": "2000-01-01T00:00:00Z"
+    }))
+    manager = DriveClientManager(
+        credentials_path=str(tmp_path / "credentials.json"),
+        token_path=str(token_path),
+        api_root=root,
+        token_uri=f"{root}token",
+        chunk_size=256 * 1024,
+        upload_workers=6
+    )
+    yield drive, manager, token_path
+    manager.shutdown()
+    server.shutdown()
+
+
+def test_concurrent_chunked_uploads_share_one_refresh(fake_drive, tmp_path):
+    drive, manager, token_path = fake_drive
+    paths = []
+    for i in range(8):
+        path = tmp_path / f"resume-{i}.pdf"
+        path.write_bytes(os.urandom(600 * 1024))
+        paths.append(path)
+
+    futures = [manager.submit_upload(str(path), path.name, "folder") for path in paths]
+    uploaded = [future.result(timeout=30) for future in futures]
+
+    assert drive.refreshes == 1
+    assert drive.unauthorized == 0
+    assert json.loads(token_path.read_text())["token"] == "fresh-token"
+    for path, result in zip(paths, uploaded):
+        assert drive.files[result["id"]]["content"] == path.read_bytes()
+        assert result["name"] == path.name
+
+    assert manager.download(uploaded[0]["id"]).read() == paths[0].read_bytes()
+
+
+def test_each_thread_gets_its_own_client(fake_drive):
+    _, manager, _ = fake_drive
+    clients = []
+
+    def grab():
+        clients.append(manager.service())
+
+    threads = [threading.Thread(target=grab) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(client) for client in clients}) == 3
+    assert manager.service() is manager.service()
+
+
+def test_batched_metadata_reports_missing_files(fake_drive, tmp_path):
+    drive, manager, _ = fake_drive
+    ids = []
+    for i in range(3):
+        path = tmp_path / f"cv-{i}.pdf"
+        path.write_bytes(b"%PDF" + bytes([i]) * 100)
+        ids.append(manager.upload_file(str(path), path.name, "folder")["id"])
+
+    metadata, errors = manager.get_metadata(ids + ["missing"], fields="id, name, size")
+
+    assert {file_id: m["name"] for file_id, m in metadata.items()} == {
+        file_id: f"cv-{i}.pdf" for i, file_id in enumerate(ids)
+    }
+    assert list(errors) == ["missing"]
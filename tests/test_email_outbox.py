@@ -0,0 +1,206 @@
+import itertools
+import socket
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from pymongo import ReturnDocument
+
+from email_outbox import EmailOutbox, RateLimiter, SMTPPool
+
+
+class FakeCollection:
+    """The handful of collection operations the outbox uses, over a list of dicts."""
+
+    def __init__(self):
+        self.docs = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def insert_many(self, docs):
+        with self._lock:
+            ids = []
+            for doc in docs:
+                doc = dict(doc, _id=next(self._ids))
+                self.docs.append(doc)
+                ids.append(doc["_id"])
+        return SimpleNamespace(inserted_ids=ids)
+
+    @staticmethod
+    def _matches(doc, query):
+        for key, condition in query.items():
+            if key == "$or":
+                if not any(FakeCollection._matches(doc, q) for q in condition):
+                    return False
+            elif isinstance(condition, dict):
+                value = doc.get(key)
+                if "$in" in condition and value not in condition["$in"]:
+                    return False
+                if "$lte" in condition and (value is None or value > condition["$lte"]):
+                    return False
+            elif doc.get(key) != condition:
+                return False
+        return True
+
+    def find_one_and_update(self, query, update, sort=None, return_document=ReturnDocument.BEFORE):
+        with self._lock:
+            matches = [doc for doc in self.docs if self._matches(doc, query)]
+            if sort:
+                matches.sort(key=lambda doc: doc[sort[0][0]])
+            if not matches:
+                return None
+            doc = matches[0]
+            before = dict(doc)
+            doc.update(update.get("$set", {}))
+            for key, amount in update.get("$inc", {}).items():
+                doc[key] = doc.get(key, 0) + amount
+            return dict(doc) if return_document == ReturnDocument.AFTER else before
+
+    def update_one(self, query, update):
+        with self._lock:
+            for doc in self.docs:
+                if self._matches(doc, query):
+                    doc.update(update["$set"])
+                    return
+
+
+class FakeSMTPServer:
+    """Minimal SMTP server; the first ``fail_first`` messages get a 451 (try again later)."""
+
+    def __init__(self, fail_first=0, reject=()):
+        self.fail_first = fail_first
+        self.reject = set(reject)
+        self.messages = []
+        self.connections = 0
+        self._sock = socket.socket()
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen()
+        self.port = self._sock.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._session, args=(conn,), daemon=True).start()
+
+    def _session(self, conn):
+        stream = conn.makefile('rb')
+
+        def reply(line):
+            conn.sendall(line.encode() + b"\r\n")
+
+        reply("220 fake ESMTP")
+        recipient = None
+        for raw in stream:
+            command = raw.decode().strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                reply("250 fake")
+            elif verb in ("MAIL", "NOOP", "RSET"):
+                reply("250 OK")
+            elif verb == "RCPT":
+                recipient = command.split(":", 1)[1].strip(" <>")
+                reply("550 No such user" if recipient in self.reject else "250 OK")
+            elif verb == "DATA":
+                reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                for data_line in stream:
+                    if data_line in (b".\r\n", b".\n"):
+                        break
+                    lines.append(data_line)
+                if self.fail_first:
+                    self.fail_first -= 1
+                    reply("451 Try again later")
+                else:
+                    self.messages.append((recipient, b"".join(lines).decode()))
+                    reply("250 Queued")
+            elif verb == "QUIT":
+                reply("221 Bye")
+                break
+            else:
+                reply("502 Not implemented")
+        conn.close()
+
+    def close(self):
+        self._sock.close()
+
+
+@pytest.fixture
+def smtp_server():
+    server = FakeSMTPServer()
+    yield server
+    server.close()
+
+
+def make_outbox(server, collection=None, **kwargs):
+    pool = SMTPPool("127.0.0.1", server.port, starttls=False, size=2, timeout=5)
+    return EmailOutbox(collection or FakeCollection(), pool, sender="hr@example.com",
+                       backoff_seconds=0, **kwargs)
+
+
+def test_sends_queued_messages_over_one_pooled_connection(smtp_server):
+    outbox = make_outbox(smtp_server)
+    outbox.enqueue_many([
+        {"to": f"candidate{i}@example.com", "subject": "Your Online Assessment", "body": f"Questions {i}"}
+        for i in range(5)
+    ])
+
+    assert outbox.process_pending() == 5
+    assert [doc["status"] for doc in outbox.collection.docs] == ["sent"] * 5
+    assert sorted(recipient for recipient, _ in smtp_server.messages) == [
+        f"candidate{i}@example.com" for i in range(5)
+    ]
+    assert "Questions 3" in dict(smtp_server.messages)["candidate3@example.com"]
+    assert smtp_server.connections == 1
+    outbox.pool.close()
+
+
+def test_transient_failures_are_retried_and_permanent_ones_fail():
+    server = FakeSMTPServer(fail_first=1, reject={"gone@example.com"})
+    outbox = make_outbox(server, max_attempts=3)
+    outbox.enqueue("ok@example.com", "Subject", "Body", application_id="A1")
+    outbox.enqueue("gone@example.com", "Subject", "Body", application_id="A2")
+
+    outbox.process_pending()
+    docs = {doc["application_id"]: doc for doc in outbox.collection.docs}
+    assert docs["A1"]["status"] == "sent"
+    assert docs["A1"]["attempts"] == 2
+    assert docs["A2"]["status"] == "failed"
+    assert docs["A2"]["attempts"] == 1
+    assert "550" in docs["A2"]["last_error"]
+    outbox.pool.close()
+    server.close()
+
+
+def test_background_workers_drain_the_outbox(smtp_server):
+    outbox = make_outbox(smtp_server, workers=2, poll_seconds=0.05)
+    outbox.start()
+    try:
+        outbox.enqueue_many([{"to": f"c{i}@example.com", "subject": "S", "body": "B"} for i in range(6)])
+        for _ in range(100):
+            if all(doc["status"] == "sent" for doc in outbox.collection.docs):
+                break
+            threading.Event().wait(0.05)
+    finally:
+        outbox.stop()
+    assert len(smtp_server.messages) == 6
+
+
+def test_rate_limiter_blocks_past_the_per_minute_cap(monkeypatch):
+    limiter = RateLimiter(per_minute=2)
+    sleeps = []
+    clock = iter([0.0, 1.0, 2.0, 61.0])
+    monkeypatch.setattr("email_outbox.time.monotonic", lambda: next(clock))
+    monkeypatch.setattr("email_outbox.time.sleep", sleeps.append)
+
+    limiter.wait()
+    limiter.wait()
+    limiter.wait()
+    assert sleeps == [58.0]
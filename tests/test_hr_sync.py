@@ -0,0 +1,124 @@
+import io
+import json
+import sqlite3
+
+import pytest
+
+import hr_sync
+import rollups
+
+# The hr.sqlite layout: no primary keys or unique indexes.
+SCHEMA = """
+CREATE TABLE employees (employee_id TEXT, first_name TEXT, last_name TEXT, email TEXT, dept TEXT, role TEXT,
+                        location TEXT, hire_date DATETIME);
+CREATE TABLE attendance (employee_id TEXT, date DATETIME, absent BIGINT);
+CREATE TABLE payroll (employee_id TEXT, email TEXT, base_salary FLOAT, currency TEXT, pay_period TEXT);
+CREATE TABLE reviews (employee_id TEXT, review_date DATETIME, score BIGINT);
+CREATE TABLE sync_log (ts_utc TEXT, provider TEXT, rows_in BIGINT, rows_valid BIGINT, rows_invalid BIGINT);
+CREATE TABLE mappings_log (ts_utc TEXT, provider TEXT, source_field TEXT, approved TEXT, suggested TEXT);
+INSERT INTO employees VALUES ('E1', 'Ann', 'Lee', 'ann@example.com', 'Sales', 'AE', 'NYC', '2024-01-01 00:00:00.000000');
+INSERT INTO employees VALUES ('E2', 'Bo', 'Kim', 'bo@example.com', 'IT', 'SysEng', 'SF', '2024-01-01 00:00:00.000000');
+INSERT INTO attendance VALUES ('E1', '2025-01-06 00:00:00.000000', 0);
+"""
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(tmp_path / "hr.sqlite")
+    conn.executescript(SCHEMA)
+    rollups.rebuild(conn)
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_csv_attendance_is_validated_upserted_and_logged(conn, tmp_path):
+    export = tmp_path / "attendance.csv"
+    export.write_text(
+        "Emp ID,Attendance Date,Status,Shift\n"
+        "E1,2025-01-06,absent,day\n"      # replaces the stored present day
+        "E1,2025-01-07,present,day\n"
+        "E2,01/07/2025,Y,night\n"
+        "E2,2025-02-30,present,day\n"     # no such date
+        ",2025-01-08,present,day\n"       # no employee
+        "E2,2025-01-08,sick,day\n"        # not a yes/no value
+        "E2,2025-01-09,N,day\n"
+    )
+    rejects = io.StringIO()
+    result = hr_sync.sync(conn, str(export), "attendance", "workday_csv", chunk_size=2, rejects=rejects)
+
+    assert (result["rows_in"], result["rows_valid"], result["rows_invalid"]) == (7, 4, 3)
+    assert result["mapping"] == {"Emp ID": "employee_id", "Attendance Date": "date", "Status": "absent",
+                                 "Shift": None}
+    assert conn.execute("SELECT employee_id, date, absent FROM attendance ORDER BY 1, 2").fetchall() == [
+        ("E1", "2025-01-06 00:00:00.000000", 1),
+        ("E1", "2025-01-07 00:00:00.000000", 0),
+        ("E2", "2025-01-07 00:00:00.000000", 1),
+        ("E2", "2025-01-09 00:00:00.000000", 0),
+    ]
+    rejected = [json.loads(line) for line in rejects.getvalue().splitlines()]
+    assert [r["row"] for r in rejected] == [4, 5, 6]
+    assert rejected[1]["errors"] == ["employee_id is required"]
+    assert rejected[2]["data"]["Status"] == "sick"
+
+    assert conn.execute("SELECT provider, rows_in, rows_valid, rows_invalid FROM sync_log").fetchall() == [
+        ("workday_csv", 7, 4, 3)
+    ]
+    mappings = conn.execute("SELECT source_field, approved, suggested FROM mappings_log ORDER BY 1").fetchall()
+    assert [(field, approved) for field, approved, _ in mappings] == [
+        ("Attendance Date", "date"), ("Emp ID", "employee_id"), ("Shift", None), ("Status", "absent")
+    ]
+    assert json.loads(mappings[1][2])[0] == "employee_id"
+    # hr.sqlite's unkeyed mappings_log gets the orm.py surrogate key.
+    assert conn.execute("SELECT name, pk FROM pragma_table_info('mappings_log')").fetchall()[0] == ("id", 1)
+    assert set(rollups.check(conn).values()) == {0}
+
+    # Syncing the same export again changes nothing.
+    hr_sync.sync(conn, str(export), "attendance", "workday_csv")
+    assert conn.execute("SELECT COUNT(*) FROM attendance").fetchall()[0][0] == 4
+    assert set(rollups.check(conn).values()) == {0}
+    assert rollups.is_current(conn)
+
+
+def test_jsonl_employees_with_explicit_mapping_rebuild_rollups_on_moves(conn, tmp_path):
+    export = tmp_path / "employees.jsonl"
+    export.write_text("\n".join(json.dumps(row) for row in [
+        {"worker": "E2", "department": "Sales", "title": "AE"},
+        {"worker": "E3", "department": "HR", "title": "HRBP", "start_date": "2025-03-01T09:00:00Z"},
+    ]) + "\n")
+    conn.execute("INSERT INTO payroll VALUES ('E2', 'bo@example.com', 90000, 'USD', '2025-01')")
+    rollups.rebuild(conn)
+    conn.commit()
+
+    with pytest.raises(ValueError, match="employee_id"):
+        hr_sync.sync(conn, str(export), "employees", "bamboo")
+    result = hr_sync.sync(conn, str(export), "employees", "bamboo", mapping={"worker": "employee_id"})
+
+    assert result["rows_valid"] == 2
+    assert result["rollups_rebuilt"]
+    assert conn.execute("SELECT dept, role, first_name, hire_date FROM employees WHERE employee_id IN ('E2', 'E3') "
+                        "ORDER BY employee_id").fetchall() == [
+        ("Sales", "AE", "Bo", "2024-01-01 00:00:00.000000"),
+        ("HR", "HRBP", None, "2025-03-01 09:00:00.000000"),
+    ]
+    assert conn.execute("SELECT dept, records FROM rollup_payroll_dept_period").fetchall() == [("Sales", 1)]
+    assert set(rollups.check(conn).values()) == {0}
+    assert rollups.is_current(conn)
+
+
+def test_mappings_log_keyed_by_older_orm_is_migrated(conn, tmp_path):
+    conn.executescript("""
+        DROP TABLE mappings_log;
+        CREATE TABLE mappings_log (ts_utc TEXT, provider TEXT, source_field TEXT, approved TEXT, suggested TEXT,
+                                   PRIMARY KEY (ts_utc, provider));
+        INSERT INTO mappings_log VALUES ('2025-01-01T00:00:00', 'workday_csv', 'Emp ID', 'employee_id', '[]');
+    """)
+    export = tmp_path / "attendance.csv"
+    export.write_text("Emp ID,Attendance Date,Status\nE1,2025-01-07,present\n")
+
+    # Several fields per sync, and the same field logged again by the next sync.
+    hr_sync.sync(conn, str(export), "attendance", "workday_csv")
+    hr_sync.sync(conn, str(export), "attendance", "workday_csv")
+    assert conn.execute("SELECT id, approved FROM mappings_log WHERE source_field = 'Status' "
+                        "ORDER BY id").fetchall() == [(4, "absent"), (7, "absent")]
+    assert conn.execute("SELECT COUNT(*) FROM mappings_log").fetchall()[0][0] == 7
@@ -0,0 +1,57 @@
+from job_cache import JobCache
+
+
+class FakeJobs:
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.finds = 0
+
+    def find(self, query, projection=None):
+        self.finds += 1
+        return [dict(job) for job in self.jobs]
+
+    def find_one(self, query, projection=None):
+        return next((dict(job) for job in self.jobs if job["job_id"] == query["job_id"]), None)
+
+
+def make_jobs():
+    return FakeJobs([
+        {"_id": 1, "job_id": "JOB1", "job_title": "Data Engineer"},
+        {"_id": 2, "job_id": "JOB2", "job_title": "Backend Engineer"},
+    ])
+
+
+def test_listing_and_lookups_share_one_read():
+    collection = make_jobs()
+    cache = JobCache(collection)
+    jobs, etag, last_modified = cache.all()
+    assert [job["job_id"] for job in jobs] == ["JOB1", "JOB2"]
+    assert jobs[0]["_id"] == "1"
+    assert cache.get("JOB2")["job_title"] == "Backend Engineer"
+    assert cache.all()[1] == etag
+    assert collection.finds == 1
+
+
+def test_invalidate_reloads_and_changes_etag_only_when_content_changes():
+    collection = make_jobs()
+    cache = JobCache(collection)
+    _, etag, _ = cache.all()
+
+    cache.invalidate()
+    assert cache.all()[1] == etag
+
+    collection.jobs.append({"_id": 3, "job_id": "JOB3", "job_title": "ML Engineer"})
+    cache.invalidate()
+    jobs, new_etag, _ = cache.all()
+    assert new_etag != etag
+    assert len(jobs) == 3
+    assert collection.finds == 3
+
+
+def test_posting_created_elsewhere_is_picked_up_and_expiry_reloads():
+    collection = make_jobs()
+    cache = JobCache(collection, ttl_seconds=0)
+    cache.all()
+    collection.jobs.append({"_id": 3, "job_id": "JOB3", "job_title": "ML Engineer"})
+    assert cache.get("JOB3")["job_title"] == "ML Engineer"
+    assert cache.get("missing") is None
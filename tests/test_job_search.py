@@ -0,0 +1,53 @@
+from datetime import date
+
+from job_search import JobSearchIndex
+
+TODAY = date(2024, 6, 30)
+
+
+def make_index():
+    index = JobSearchIndex()
+    index.sync([
+        {"job_id": "J1", "job_title": "Python Developer", "job_description": "Flask services and SQL",
+         "date_posted": "2024-06-30"},
+        {"job_id": "J2", "job_title": "Data Engineer", "job_description": "Python, Spark and Airflow pipelines",
+         "date_posted": "2024-06-25"},
+        {"job_id": "J3", "job_title": "Sales Executive", "job_description": "Enterprise accounts",
+         "date_posted": "2024-03-01"},
+    ], etag="v1")
+    return index
+
+
+def test_title_matches_rank_above_description_matches():
+    result = make_index().search("python", today=TODAY)
+    assert [job["job_id"] for job in result["jobs"]] == ["J1", "J2"]
+    assert result["total"] == 2
+
+
+def test_last_term_matches_as_prefix_and_all_terms_are_required():
+    index = make_index()
+    assert [job["job_id"] for job in index.search("data pipe", today=TODAY)["jobs"]] == ["J2"]
+    assert index.search("data flask", today=TODAY)["total"] == 0
+
+
+def test_date_facets_and_filter():
+    result = make_index().search("", posted_within="week", today=TODAY)
+    assert [job["job_id"] for job in result["jobs"]] == ["J1", "J2"]
+    assert result["facets"]["date_posted"] == {"day": 1, "week": 2, "month": 2, "older": 1}
+
+
+def test_incremental_add_remove_and_sync():
+    index = make_index()
+    index.add({"job_id": "J4", "job_title": "Flask Engineer", "job_description": "", "date_posted": "2024-06-29"})
+    index.remove("J1")
+    assert [job["job_id"] for job in index.search("flask", today=TODAY)["jobs"]] == ["J4"]
+    assert index.search("developer", today=TODAY)["total"] == 0
+
+    changed = index.sync([
+        {"job_id": "J2", "job_title": "Data Engineer", "job_description": "Python, Spark and Airflow pipelines",
+         "date_posted": "2024-06-25"},
+        {"job_id": "J4", "job_title": "Flask Engineer", "job_description": "", "date_posted": "2024-06-29"},
+    ], etag="v2")
+    assert changed == 1  # only J3 had to go
+    assert len(index) == 2 and index.synced_etag == "v2"
+    assert index.search("sales", today=TODAY)["total"] == 0
@@ -0,0 +1,69 @@
+from datetime import datetime
+
+import pytest
+
+from pagination import decode_cursor, encode_cursor, keyset_filter, parse_fields, parse_page_size
+
+SORT = [("score", -1), ("submitted_at", -1), ("application_id", 1)]
+
+
+def test_cursor_round_trips_sort_values():
+    doc = {"score": 87.5, "submitted_at": datetime(2025, 3, 1, 12, 30), "application_id": "a-1", "name": "x"}
+    token = encode_cursor(doc, SORT)
+    assert "=" not in token
+    assert decode_cursor(token, SORT) == [87.5, datetime(2025, 3, 1, 12, 30), "a-1"]
+
+
+@pytest.mark.parametrize("token", ["not-a-cursor", encode_cursor({"score": 1}, [("score", -1)])])
+def test_bad_cursors_are_rejected(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token, SORT)
+
+
+def test_keyset_filter_breaks_ties_on_later_fields():
+    assert keyset_filter([("score", -1), ("application_id", 1)], [80, "b"]) == {"$or": [
+        {"score": {"$lt": 80}},
+        {"score": 80, "application_id": {"$gt": "b"}},
+    ]}
+
+
+def test_keyset_filter_pages_through_ties_without_gaps_or_repeats():
+    sort = [("score", -1), ("application_id", 1)]
+    docs = [{"score": s, "application_id": f"app-{i:02d}"} for i, s in enumerate([90, 80, 80, 80, 70, 70, 60])]
+    ordered = sorted(docs, key=lambda d: (-d["score"], d["application_id"]))
+
+    def matches(doc, query):
+        for clause in query["$or"]:
+            ok = True
+            for field, cond in clause.items():
+                if isinstance(cond, dict):
+                    (op, value), = cond.items()
+                    ok &= doc[field] < value if op == "$lt" else doc[field] > value
+                else:
+                    ok &= doc[field] == cond
+            if ok:
+                return True
+        return False
+
+    seen, after = [], None
+    while True:
+        remaining = [d for d in ordered if after is None or matches(d, keyset_filter(sort, after))]
+        page = remaining[:3]
+        if not page:
+            break
+        seen.extend(page)
+        after = decode_cursor(encode_cursor(page[-1], sort), sort)
+    assert seen == ordered
+
+
+def test_parse_fields_and_page_size():
+    assert parse_fields(None, ("name",)) is None
+    assert parse_fields("name, email", ("name", "email", "score"), required=["score"]) == {
+        "_id": 0, "name": 1, "email": 1, "score": 1
+    }
+    with pytest.raises(ValueError):
+        parse_fields("password", ("name",))
+    assert parse_page_size(None) == 50
+    assert parse_page_size("5000") == 200
+    with pytest.raises(ValueError):
+        parse_page_size("ten")
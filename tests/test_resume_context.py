@@ -0,0 +1,79 @@
+from resume_context import (
+    ATS_SECTIONS, PARAMETER_SECTIONS, build_resume_context, estimate_tokens, render_sections
+)
+
+RESUME = """Jane Doe
+jane@example.com | Seattle, WA
+SUMMARY
+Data engineer focused on streaming systems.
+EDUCATION
+M.S. Computer Science, University of Washington, 2016
+B.Tech Information Technology, 2014
+Jane Doe - Resume | Page 1 of 2\f2
+EXPERIENCE
+Senior Data Engineer, Acme Corp 2019 - Present
+Built Kafka and Spark pipelines processing 2B events a day.
+Data Engineer, Initech 2016 - 2019
+PROJECTS
+Fraud scoring service - github.com/jane/fraud
+TECHNICAL SKILLS
+Python, SQL, Spark, Kafka, Airflow
+Jane Doe - Resume | Page 2 of 2
+"""
+
+
+def test_sections_and_extract():
+    context = build_resume_context(RESUME, current_year=2024)
+    sections = context["sections"]
+
+    assert "Kafka and Spark pipelines" in sections["experience"]
+    text = "\n".join(sections.values())
+    assert "Page" not in text and "\n2\n" not in text
+    assert sections["header"].startswith("Jane Doe\n")
+    extract = context["extract"]
+    assert extract["skills"] == ["Python", "SQL", "Spark", "Kafka", "Airflow"]
+    assert len(extract["degrees"]) == 2
+    assert extract["experience_years"] == 8
+    assert extract["project_links"] == 1
+
+
+def test_tasks_only_get_their_sections():
+    context = build_resume_context(RESUME, current_year=2024)
+
+    ats_text = render_sections(context, ATS_SECTIONS, include_extract=True)
+    assert "[EXPERIENCE]" in ats_text and "[SKILLS]" in ats_text
+    assert "[SUMMARY]" not in ats_text
+    assert "[EXTRACTED FACTS]" in ats_text
+
+    scoring_text = render_sections(context, PARAMETER_SECTIONS)
+    assert "[PROJECTS]" in scoring_text
+    assert "[SUMMARY]" not in scoring_text
+
+
+def test_long_sections_are_capped():
+    long_resume = "EXPERIENCE\n" + "\n".join(f"Shipped feature number {i} to production." for i in range(2000))
+    context = build_resume_context(long_resume, current_year=2024)
+
+    assert context["sections"]["experience"].endswith("[...]")
+    assert estimate_tokens(context["sections"]["experience"]) < context["original_tokens"] / 5
+
+
+def test_resume_without_headings_is_kept():
+    context = build_resume_context("Just a paragraph about me and my Python work.", current_year=2024)
+    assert "Python work" in render_sections(context, ATS_SECTIONS)
+
+
+def test_projects_only_resume_reaches_ats():
+    context = build_resume_context("Sam Roe\nPROJECTS\nKafka stream processor - github.com/sam/ks\n"
+                                   "PUBLICATIONS\nStreaming joins at scale, VLDB 2023", current_year=2024)
+    ats_text = render_sections(context, ATS_SECTIONS, include_extract=True)
+    assert "Kafka stream processor" in ats_text
+    assert "Streaming joins at scale" in ats_text
+
+
+def test_repeated_lines_inside_pages_are_kept():
+    resume = ("Sam Roe\nEXPERIENCE\nData Engineer\nRemote\n2021 - Present\nData Engineer\nRemote\n"
+              "2019 - 2021\fData Engineer\nRemote\n2017 - 2019\nSKILLS\nPython")
+    experience = build_resume_context(resume, current_year=2024)["sections"]["experience"]
+    assert experience.count("Data Engineer") == 3
+    assert experience.count("Remote") == 3
@@ -0,0 +1,46 @@
+from resume_fingerprint import FingerprintIndex, fingerprint
+
+RESUME = (
+    "Jane Doe. Senior Data Engineer with 7 years of experience building streaming "
+    "pipelines in Python, Spark and Kafka. Led the migration of a 40 TB warehouse to "
+    "Snowflake, cutting query costs by 35 percent. MSc Computer Science, University of "
+    "Washington. Projects: real-time fraud scoring service, open-source Airflow operators. "
+    "Skills: Python, SQL, Spark, Kafka, Airflow, dbt, AWS, Terraform, Docker, Kubernetes."
+)
+
+
+def test_exact_duplicate_ignores_formatting():
+    index = FingerprintIndex(threshold=0.9)
+    index.add("a1", fingerprint(RESUME), {"job_id": "JOB1"})
+
+    reformatted = RESUME.upper().replace(". ", ".\n\n")
+    matches = index.find(fingerprint(reformatted))
+    assert matches[0]["key"] == "a1"
+    assert matches[0]["exact"]
+    assert matches[0]["metadata"] == {"job_id": "JOB1"}
+
+
+def test_near_duplicate_detected():
+    index = FingerprintIndex(threshold=0.7)
+    index.add("a1", fingerprint(RESUME))
+
+    edited = RESUME.replace("7 years", "8 years")
+    matches = index.find(fingerprint(edited))
+    assert [m["key"] for m in matches] == ["a1"]
+    assert not matches[0]["exact"]
+    assert 0.7 <= matches[0]["similarity"] < 1.0
+
+
+def test_different_resume_not_matched():
+    index = FingerprintIndex(threshold=0.7)
+    index.add("a1", fingerprint(RESUME))
+
+    other = (
+        "John Smith. Registered nurse with 12 years in emergency and intensive care units. "
+        "BSN from Ohio State University, ACLS and PALS certified, charge nurse for a 30 bed ward."
+    )
+    assert index.find(fingerprint(other)) == []
+
+
+def test_empty_text_has_no_fingerprint():
+    assert fingerprint("  \n ") is None
@@ -0,0 +1,92 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pandas")
+
+import rollups
+from Analytics import HRAnalytics
+
+
+def _raw(hr_sessions):
+    return hr_sessions.kw["bind"].raw_connection()
+
+
+def test_rebuild_is_consistent_and_incremental_updates_match_a_rebuild(hr_sessions):
+    conn = _raw(hr_sessions)
+    assert not rollups.is_built(conn.dbapi_connection)
+    assert rollups.ensure_rollups(conn.dbapi_connection)
+    assert not rollups.ensure_rollups(conn.dbapi_connection)
+    assert set(rollups.check(conn.dbapi_connection).values()) == {0}
+
+    db = conn.dbapi_connection
+    db.execute("INSERT INTO attendance (employee_id, date, absent) VALUES ('E001', '2024-07-01', 1)")
+    rollups.record(db, "attendance", added=[("E001", "2024-07-01", 1)])
+    # Raise the highest salary of a group, then drop it again: min/max follow the facts.
+    db.execute("UPDATE payroll SET base_salary = 99000 WHERE employee_id = 'E029'")
+    rollups.record(db, "payroll", added=[("E029", "2024-06", 99000)], removed=[("E029", "2024-06", 79000)])
+    db.execute("DELETE FROM payroll WHERE employee_id = 'E029'")
+    rollups.record(db, "payroll", removed=[("E029", "2024-06", 99000)])
+    db.execute("INSERT INTO reviews (employee_id, review_date, score) VALUES ('E002', '2024-12-01', 4.5)")
+    rollups.record(db, "reviews", added=[("E002", "2024-12-01", 4.5)])
+    assert set(rollups.check(db).values()) == {0}
+    assert rollups.is_current(db)
+
+    db.execute("UPDATE attendance SET absent = 1 WHERE employee_id = 'E003'")
+    assert rollups.check(db)["rollup_attendance_dept_month"] > 0
+    assert not rollups.is_current(db)
+    conn.commit()
+    conn.close()
+
+
+def test_analyses_read_from_rollups_give_the_same_results(hr_sessions):
+    session = hr_sessions()
+    before = {name: HRAnalytics(session).run_analysis(name)[0] for name in HRAnalytics.ANALYSES}
+    session.close()
+
+    conn = _raw(hr_sessions)
+    rollups.rebuild(conn.dbapi_connection)
+    conn.commit()
+    conn.close()
+
+    session = hr_sessions()
+    analytics = HRAnalytics(session)
+    assert analytics.use_rollups
+    after = {name: analytics.run_analysis(name)[0] for name in HRAnalytics.ANALYSES}
+    session.close()
+    # Departments with equal averages come back in no particular order.
+    for result in (before, after):
+        result["performance_reviews"]["dept_performance"].sort(key=lambda d: (-d["avg_score"], d["dept"]))
+    assert after == before
+
+
+def test_writes_that_bypass_record_make_readers_fall_back_until_rebuilt(hr_sessions):
+    conn = _raw(hr_sessions)
+    db = conn.dbapi_connection
+    rollups.rebuild(db)
+    db.execute("INSERT INTO reviews (employee_id, review_date, score) VALUES ('E002', '2024-12-01', 4.5)")
+    rollups.record(db, "reviews", added=[("E002", "2024-12-01", 4.5)])
+    assert rollups.is_current(db)
+    # Another writer adds attendance without telling the rollups.
+    db.execute("INSERT INTO attendance (employee_id, date, absent) VALUES ('E001', '2024-07-01', 1)")
+    conn.commit()
+    assert rollups.stale_sources(db) == ["attendance"]
+
+    session = hr_sessions()
+    assert not HRAnalytics(session).use_rollups
+    session.close()
+
+    assert rollups.ensure_rollups(db)
+    assert rollups.is_current(db)
+    # Updates in place are caught too, but only changes to columns the rollups read.
+    db.execute("UPDATE payroll SET email = 'new@example.com' WHERE employee_id = 'E003'")
+    assert rollups.is_current(db)
+    db.execute("UPDATE attendance SET absent = 1 - absent WHERE employee_id = 'E003'")
+    assert rollups.stale_sources(db) == ["attendance"]
+    assert rollups.ensure_rollups(db)
+    assert rollups.is_current(db)
+    db.execute("UPDATE employees SET dept = 'HR' WHERE employee_id = 'E000'")
+    assert rollups.stale_sources(db) == ["employees"]
+    assert rollups.ensure_rollups(db)
+    assert set(rollups.check(db).values()) == {0}
+    conn.commit()
+    conn.close()
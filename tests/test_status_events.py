@@ -0,0 +1,50 @@
+import threading
+import time
+
+from status_events import StatusEventBus, status_event
+
+
+def test_wait_returns_only_newer_matching_events():
+    bus = StatusEventBus()
+    bus.publish(status_event("A", "pending"))
+    bus.publish(status_event("B", "pending"))
+    seq = bus.publish(status_event("A", "processing", {"job_id": "JOB1", "resume_text": "not carried"}))
+
+    events = bus.wait(after_seq=1, application_ids=["A"], timeout=0)
+    assert [(e["application_id"], e["status"], e["seq"]) for e in events] == [("A", "processing", seq)]
+    assert events[0]["job_id"] == "JOB1"
+    assert "resume_text" not in events[0]
+
+
+def test_wait_blocks_until_a_matching_event_is_published():
+    bus = StatusEventBus()
+    received = []
+
+    def listen():
+        received.extend(bus.wait(after_seq=bus.last_seq, application_ids=["A"], timeout=5))
+
+    listener = threading.Thread(target=listen)
+    listener.start()
+    time.sleep(0.05)
+    bus.publish(status_event("B", "completed"))
+    time.sleep(0.05)
+    assert not received
+    bus.publish(status_event("A", "completed", {"score": 82}))
+    listener.join(timeout=5)
+    assert [(e["status"], e["score"]) for e in received] == [("completed", 82)]
+
+
+def test_wait_times_out_empty():
+    bus = StatusEventBus()
+    started = time.monotonic()
+    assert bus.wait(after_seq=0, timeout=0.05) == []
+    assert time.monotonic() - started >= 0.05
+
+
+def test_covers_detects_evicted_history_and_restarted_cursors():
+    bus = StatusEventBus(history_size=2)
+    for status in ("pending", "processing", "completed"):
+        bus.publish(status_event("A", status))
+    assert bus.covers(2)
+    assert not bus.covers(0)
+    assert not bus.covers(10)
@@ -0,0 +1,57 @@
+import sqlite3
+from datetime import date
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pandas")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import bench_analytics
+import rollups
+from Analytics import HRAnalytics
+from generate_synthetic_hr import generate
+
+
+def test_generated_database_is_consistent_and_benchmarks(tmp_path):
+    path = str(tmp_path / "hr.sqlite")
+    result = generate(path, 60, years=1, today=date(2025, 11, 14))
+    assert result["rows"]["employees"] == 60
+    assert result["rows"]["attendance"] > 60 * 100
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM attendance").fetchall()[0][0] == result["rows"]["attendance"]
+    # Nobody works before they were hired.
+    assert conn.execute("""
+        SELECT COUNT(*) FROM attendance a JOIN employees e ON e.employee_id = a.employee_id
+        WHERE a.date < e.hire_date""").fetchall()[0][0] == 0
+    terminations = conn.execute("SELECT COUNT(*) FROM events WHERE event_type = 'termination'").fetchall()[0][0]
+    assert conn.execute("SELECT terminations FROM kpi_overview").fetchall()[0][0] == terminations
+    assert rollups.is_built(conn)
+    assert set(rollups.check(conn).values()) == {0}
+    conn.close()
+
+    session = sessionmaker(bind=create_engine(f"sqlite:///{path}"))()
+    turnover = HRAnalytics(session).analyze_turnover_by_department()
+    session.close()
+    assert sum(d["terminations"] for d in turnover) == terminations > 0
+
+    report = bench_analytics.bench_database(path, repeat=1)
+    assert set(report) == {"rollups", "facts"}
+    assert list(report["facts"]["analyses"]) == HRAnalytics.ANALYSES
+    assert report["rollups"]["summary"]["parallel"]["seconds"] > 0
+
+    sizes = {"60": {"modes": report}, "120": {"modes": report}}
+    assert bench_analytics.scaling(sizes)["60->120"]["facts"]["summary_sequential"] == 0
+    slower = {"sizes": {"60": {"modes": {"facts": {
+        "analyses": {name: {"seconds": 0.0} for name in HRAnalytics.ANALYSES},
+        "summary": {"sequential": {"seconds": 0.0}}
+    }}}}}
+    found = bench_analytics.regressions({"sizes": {"60": {"modes": report}}}, slower, 1.25)
+    assert {r["name"] for r in found} <= set(HRAnalytics.ANALYSES) | {"summary_sequential"}
+    assert bench_analytics.regressions({"sizes": {"60": {"modes": report}}}, {"sizes": {}}, 1.25) == []
+
+    with pytest.raises(FileExistsError):
+        generate(path, 10)
@@ -0,0 +1,24 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pandas")
+
+import tune_db
+from Analytics import HRAnalytics
+
+
+def test_migration_adds_indexes_wal_and_reports_plans(hr_sessions):
+    engine = hr_sessions.kw["bind"]
+    with engine.begin() as conn:
+        for name in ("ix_attendance_employee", "ix_events_type_employee"):
+            conn.exec_driver_sql(f"DROP INDEX {name}")
+
+    result = tune_db.migrate(engine)
+    assert sorted(result["indexes_created"]) == ["ix_attendance_employee", "ix_events_type_employee"]
+    assert result["journal_mode"] == "wal"
+    assert tune_db.migrate(engine)["indexes_created"] == []
+
+    report = tune_db.profile(engine, repeat=1)
+    assert list(report) == HRAnalytics.ANALYSES
+    plans = [step for query in report["turnover_by_department"]["plans"] for step in query["plan"]]
+    assert any("ix_events_type_employee" in step for step in plans)